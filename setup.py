@@ -20,6 +20,14 @@ setup(
     packages=find_packages("src"),
     package_dir={"": "src"},
     install_requires=[],
+    extras_require={
+        # Faster compact JSON output
+        "fast": ["orjson"],
+        # Parquet output
+        "parquet": ["pyarrow"],
+        # Statistical profiling with --profiler pyinstrument
+        "profile": ["pyinstrument"],
+    },
     python_requires=">=3.7",
     entry_points={
         "console_scripts": [
@@ -1,14 +1,68 @@
 """Main CLI module for the Mudag tool."""
 
 import argparse
+import importlib.util
+import json
 import logging
 import os
+import sqlite3
 import sys
+import tempfile
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
 
-from ..core.analyzer import count_lines, is_workflow_file, scan_directory
-from ..utils.formatter import format_csv, format_json, format_table
+from ..core.analyzer import (
+    FileResult,
+    analyze_file,
+    is_workflow_file,
+    iter_scan,
+)
+from ..core.archives import expand_archive_members
+from ..core.batch import RepositoryResult, iter_batch, read_repository_list
+from ..core.metrics import METRICS
+from ..core.results import ScanResult
+from ..core.watch import WatchUpdate, watch
+from ..utils.benchmark import CorpusSpec, benchmark, parse_languages
+from ..utils.cache import DEFAULT_MAX_ENTRIES, ResultCache
+from ..utils.formatter import (
+    format_batch_csv,
+    format_batch_jsonl,
+    format_csv,
+    format_csv_stream,
+    format_history_csv,
+    format_history_json,
+    format_json,
+    format_jsonl,
+    format_npz,
+    format_parquet,
+    format_table,
+    format_watch_updates,
+)
+from ..utils.git_utils import (
+    HistoryPoint,
+    is_git_repo,
+    iter_history,
+    iter_scan_revision,
+    scan_revision,
+)
 from ..utils.ignore_patterns import IgnorePatterns
+from ..utils.instrumentation import STATS
 from ..utils.logging_utils import setup_logger
+from ..utils.server import (
+    DEFAULT_PORT,
+    Address,
+    ServerError,
+    analyze_params,
+    create_server,
+    default_socket_path,
+    parse_address,
+    request,
+    rows_to_results,
+)
+from ..utils.walker import walk_files
+
+# Output formats written in binary mode
+BINARY_FORMATS = ("npz", "parquet")
 
 
 def parse_args() -> argparse.Namespace:
@@ -32,6 +86,25 @@ def parse_args() -> argparse.Namespace:
         help="Set the logging level",
     )
     parser.add_argument("--log-file", help="Path to the log file")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the time spent per phase and the counters to stderr",
+    )
+    parser.add_argument(
+        "--stats-json", help="Write the phase timings and counters to a JSON file"
+    )
+    parser.add_argument(
+        "--profiler",
+        choices=["cprofile", "pyinstrument"],
+        help="Run the command under a profiler",
+    )
+    parser.add_argument(
+        "--profiler-output",
+        help="File for the profiler output (default: a summary on stderr); "
+        "cProfile writes pstats data, pyinstrument HTML for .html files and "
+        "text otherwise",
+    )
 
     # Create subparsers for different commands
     subparsers = parser.add_subparsers(dest="command", help="Command to execute")
@@ -42,19 +115,286 @@ def parse_args() -> argparse.Namespace:
         "analyze", help="Analyze a file or directory"
     )
     analyze_parser.add_argument("path", help="Path to the file or directory to analyze")
+    analyze_parser.add_argument(
+        "--rev",
+        help="Analyze this revision of the git repository at path from the object "
+        "database, without a checkout (bare repositories are supported)",
+    )
     analyze_parser.add_argument(
         "--format",
-        choices=["table", "json", "csv"],
+        choices=["table", "json", "csv", "jsonl", "npz", "parquet"],
         default="table",
-        help="Output format",
+        help="Output format (jsonl is always streamed; npz and parquet are binary)",
+    )
+    analyze_parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write CSV rows as files are analyzed, in traversal order",
     )
     analyze_parser.add_argument("--output", help="Output file path (default: stdout)")
+    analyze_parser.add_argument(
+        "--relative-to",
+        help="Directory that reported file paths are relative to "
+        "(default: current directory)",
+    )
+    analyze_parser.add_argument(
+        "--json-compact",
+        action="store_true",
+        help="Write JSON output without whitespace (faster with orjson installed)",
+    )
+    analyze_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes for directory scans (0: one per CPU)",
+    )
+    analyze_parser.add_argument(
+        "--cache-dir",
+        help="Directory of the persistent result cache (default: ~/.cache/mudag)",
+    )
+    analyze_parser.add_argument(
+        "--follow-symlinks",
+        action="store_true",
+        help="Descend into symbolic links to directories",
+    )
+    analyze_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the persistent result cache",
+    )
+    analyze_parser.add_argument(
+        "--archive-members",
+        action="store_true",
+        help="Report the members of KNIME archives (.knwf, .knar) as separate "
+        "rows instead of one row per archive",
+    )
+    analyze_parser.add_argument(
+        "--server",
+        nargs="?",
+        const=f"unix:{default_socket_path()}",
+        help="Send directory analyses to a 'mudag serve' process at this address "
+        "(unix:PATH or HOST:PORT, default: its default socket); falls back to "
+        "analyzing in-process",
+    )
 
     # Add 'list-workflows' command
     list_parser = subparsers.add_parser(
         "list-workflows", help="List workflow files in a directory"
     )
     list_parser.add_argument("path", help="Path to the directory to scan")
+    list_parser.add_argument(
+        "--follow-symlinks",
+        action="store_true",
+        help="Descend into symbolic links to directories",
+    )
+    list_parser.add_argument(
+        "--server",
+        nargs="?",
+        const=f"unix:{default_socket_path()}",
+        help="Ask a 'mudag serve' process at this address (unix:PATH or "
+        "HOST:PORT, default: its default socket); falls back to scanning "
+        "in-process",
+    )
+
+    # Add 'batch' command
+    batch_parser = subparsers.add_parser(
+        "batch", help="Analyze many repositories in one run"
+    )
+    batch_parser.add_argument(
+        "--repos-file",
+        required=True,
+        help="File listing one repository path per line",
+    )
+    batch_parser.add_argument(
+        "--format",
+        choices=["csv", "jsonl"],
+        default="csv",
+        help="Output format, with a repository column",
+    )
+    batch_parser.add_argument("--output", help="Output file path (default: stdout)")
+    batch_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of repositories analyzed in parallel (0: one per CPU)",
+    )
+    batch_parser.add_argument(
+        "--cache-dir",
+        help="Directory of the persistent result cache (default: ~/.cache/mudag)",
+    )
+    batch_parser.add_argument(
+        "--follow-symlinks",
+        action="store_true",
+        help="Descend into symbolic links to directories",
+    )
+    batch_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the persistent result cache",
+    )
+
+    # Add 'history' command
+    history_parser = subparsers.add_parser(
+        "history", help="Report line counts along the history of a git repository"
+    )
+    history_parser.add_argument("path", help="Path to the git repository")
+    history_parser.add_argument(
+        "--rev", default="HEAD", help="Revision whose history is analyzed"
+    )
+    history_parser.add_argument(
+        "--since", help="Only include commits more recent than this date"
+    )
+    history_parser.add_argument(
+        "--until", help="Only include commits older than this date"
+    )
+    history_parser.add_argument(
+        "--every",
+        type=int,
+        default=1,
+        help="Report every N-th commit (the last commit is always reported)",
+    )
+    history_parser.add_argument(
+        "--format", choices=["csv", "json"], default="csv", help="Output format"
+    )
+    history_parser.add_argument("--output", help="Output file path (default: stdout)")
+
+    # Add 'watch' command
+    watch_parser = subparsers.add_parser(
+        "watch",
+        help="Analyze a directory and report updated totals whenever workflow "
+        "files change",
+    )
+    watch_parser.add_argument("path", help="Path to the directory to watch")
+    watch_parser.add_argument("--output", help="Output file path (default: stdout)")
+    watch_parser.add_argument(
+        "--relative-to",
+        help="Directory that reported file paths are relative to "
+        "(default: current directory)",
+    )
+    watch_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes for full scans (0: one per CPU)",
+    )
+    watch_parser.add_argument(
+        "--polling",
+        action="store_true",
+        help="Detect changes by polling instead of inotify",
+    )
+    watch_parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="Seconds between polls when inotify is not used",
+    )
+    # Updates are written as JSON Lines
+    watch_parser.set_defaults(format="jsonl")
+
+    # Add 'bench' command
+    defaults = CorpusSpec()
+    bench_parser = subparsers.add_parser(
+        "bench", help="Benchmark Mudag on a generated synthetic repository"
+    )
+    bench_parser.add_argument(
+        "--files",
+        type=int,
+        default=defaults.files,
+        help="Number of generated files",
+    )
+    bench_parser.add_argument(
+        "--lines",
+        type=int,
+        default=defaults.lines,
+        help="Average number of lines per workflow file",
+    )
+    bench_parser.add_argument(
+        "--languages",
+        default=",".join(defaults.languages),
+        help="Comma-separated workflow languages of the generated files",
+    )
+    bench_parser.add_argument(
+        "--comment-ratio",
+        type=float,
+        default=defaults.comment_ratio,
+        help="Fraction of comment lines",
+    )
+    bench_parser.add_argument(
+        "--blank-ratio",
+        type=float,
+        default=defaults.blank_ratio,
+        help="Fraction of blank lines",
+    )
+    bench_parser.add_argument(
+        "--other-ratio",
+        type=float,
+        default=defaults.other_ratio,
+        help="Fraction of files that are not workflow files",
+    )
+    bench_parser.add_argument(
+        "--ignore-patterns",
+        type=int,
+        default=defaults.ignore_patterns,
+        help="Number of patterns in the generated .mudagignore file",
+    )
+    bench_parser.add_argument(
+        "--seed",
+        type=int,
+        default=defaults.seed,
+        help="Seed of the generator; equal seeds generate equal repositories",
+    )
+    bench_parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of runs per step; the fastest run is reported",
+    )
+    bench_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes for the directory scan (0: one per CPU)",
+    )
+    bench_parser.add_argument(
+        "--directory",
+        help="Empty directory to generate the repository in and keep "
+        "(default: a temporary directory)",
+    )
+    bench_parser.add_argument("--output", help="Output file path (default: stdout)")
+
+    # Add 'serve' command
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Run a daemon answering analyze, list-workflows and compare requests "
+        "with warm caches",
+    )
+    serve_parser.add_argument(
+        "--socket",
+        help="Unix socket to listen on (default: server.sock in the cache directory)",
+    )
+    serve_parser.add_argument(
+        "--host",
+        help="Listen on a TCP port of this address instead of a Unix socket "
+        "(default with --port: 127.0.0.1)",
+    )
+    serve_parser.add_argument(
+        "--port",
+        type=int,
+        help=f"Listen on this TCP port instead of a Unix socket (default with "
+        f"--host: {DEFAULT_PORT})",
+    )
+    serve_parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of requests handled concurrently",
+    )
+    serve_parser.add_argument(
+        "--max-entries",
+        type=int,
+        default=DEFAULT_MAX_ENTRIES,
+        help="Maximum number of files in the in-memory line count cache",
+    )
 
     return parser.parse_args()
 
@@ -71,46 +411,511 @@ def analyze_command(args: argparse.Namespace, logger: logging.Logger) -> int:
         Exit code (0 for success, non-zero for failure)
     """
     path = args.path
-    output_path = args.output
-    output_format = args.format
+    streaming = args.format == "jsonl" or (args.stream and args.format == "csv")
+
+    # Fail before scanning if the optional dependency is missing
+    if args.format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        logger.error("Parquet output requires pyarrow (pip install mudag[parquet])")
+        return 1
+
+    if args.archive_members and args.rev is not None:
+        logger.error("--archive-members cannot be combined with --rev")
+        return 1
+
+    if args.server and os.path.isdir(path):
+        exit_code = analyze_remote(args, logger)
+        if exit_code is not None:
+            return exit_code
+
+    if args.rev is not None:
+        return analyze_revision(args, logger, streaming)
 
     logger.info(f"Analyzing workflow files in {path}")
 
     if os.path.isdir(path):
-        results = scan_directory(path)
+        cache = None
+        if not args.no_cache:
+            try:
+                cache = ResultCache(args.cache_dir)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Result cache disabled: {e}")
+
+        try:
+            records = iter_scan(
+                path,
+                workers=args.jobs,
+                cache=cache,
+                follow_symlinks=args.follow_symlinks,
+                relative_to=args.relative_to,
+            )
+            if args.archive_members:
+                records = expand_archive_members(records)
+            if streaming:
+                return write_output(records, args, logger)
+            results = ScanResult()
+            results.extend(records)
+        finally:
+            if cache is not None:
+                cache.close()
     elif os.path.isfile(path):
-        if not is_workflow_file(path):
+        result = analyze_file(path)
+        if result is None:
             logger.warning(f"{path} is not a workflow file, skipping")
             return 0
-        results = {path: count_lines(path)}
+        result = result._replace(
+            rel_path=os.path.relpath(path, args.relative_to or os.curdir)
+        )
+        records = [result]
+        if args.archive_members:
+            records = list(expand_archive_members(records))
+        if streaming:
+            return write_output(records, args, logger)
+        results = ScanResult(with_metadata=False)
+        results.extend(records)
     else:
         logger.error(f"{path} does not exist")
         return 1
 
+    return write_output(results, args, logger)
+
+
+def query_server(
+    args: argparse.Namespace,
+    logger: logging.Logger,
+    endpoint: str,
+    params: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    """
+    Send a request to the server named by the --server option.
+
+    Args:
+        args: Parsed command-line arguments
+        logger: Logger instance
+        endpoint: Endpoint name, e.g. 'analyze'
+        params: Request parameters
+
+    Returns:
+        Response data, or None if the server cannot be reached
+
+    Raises:
+        ServerError: If the server answers with an error
+    """
+    try:
+        address = parse_address(args.server)
+        return request(address, endpoint, params)
+    except (ValueError, ConnectionError) as e:
+        logger.warning(f"{e}; running in-process")
+        return None
+
+
+def analyze_remote(args: argparse.Namespace, logger: logging.Logger) -> Optional[int]:
+    """
+    Execute the 'analyze' command for a directory on the server.
+
+    The output is identical to an in-process analysis.
+
+    Args:
+        args: Parsed command-line arguments
+        logger: Logger instance
+
+    Returns:
+        Exit code, or None if the server cannot be reached
+    """
+    logger.info(f"Analyzing workflow files in {args.path} on {args.server}")
+    params = analyze_params(
+        args.path,
+        args.rev,
+        args.relative_to,
+        args.follow_symlinks,
+        args.archive_members,
+    )
+    try:
+        response = query_server(args, logger, "analyze", params)
+    except ServerError as e:
+        logger.error(f"Server error: {e}")
+        return 1
+    if response is None:
+        return None
+
+    records = rows_to_results(response["files"], args.path)
+    if args.format == "jsonl" or (args.stream and args.format == "csv"):
+        return write_output(records, args, logger)
+    results = ScanResult()
+    results.extend(records)
+    return write_output(results, args, logger)
+
+
+def analyze_revision(
+    args: argparse.Namespace, logger: logging.Logger, streaming: bool
+) -> int:
+    """
+    Execute the 'analyze' command for a git revision.
+
+    Args:
+        args: Parsed command-line arguments
+        logger: Logger instance
+        streaming: Whether results are written as they are produced
+
+    Returns:
+        Exit code (0 for success, non-zero for failure)
+    """
+    path = args.path
+    if not os.path.isdir(path):
+        logger.error(f"{path} is not a directory")
+        return 1
+
+    logger.info(f"Analyzing workflow files of {args.rev} in {path}")
+
+    try:
+        if streaming:
+            records = iter_scan_revision(path, args.rev, args.relative_to)
+            return write_output(records, args, logger)
+        results = scan_revision(path, args.rev, args.relative_to)
+    except ValueError as e:
+        logger.error(f"Error reading {args.rev} in {path}: {e}")
+        return 1
+    return write_output(results, args, logger)
+
+
+def write_output(
+    results: Union[
+        ScanResult,
+        Dict[str, Dict[str, int]],
+        Iterable[FileResult],
+        Iterable[RepositoryResult],
+        Iterable[HistoryPoint],
+        Iterable[WatchUpdate],
+    ],
+    args: argparse.Namespace,
+    logger: logging.Logger,
+) -> int:
+    """
+    Format results and write them to the requested output.
+
+    Args:
+        results: Scan result or dictionary mapping file paths to line count
+            dictionaries, an iterable of file results for the streaming formats, or an
+            iterable of repository results, history points or watch updates
+            for the 'batch', 'history' and 'watch' commands
+        args: Parsed command-line arguments
+        logger: Logger instance
+
+    Returns:
+        Exit code (0 for success, non-zero for failure)
+    """
+    output_path = args.output
+    output_format = args.format
+
     # Open output file or use stdout
-    output_file = sys.stdout
+    binary = output_format in BINARY_FORMATS
+    output_file = sys.stdout.buffer if binary else sys.stdout
     if output_path:
         try:
-            output_file = open(output_path, "w", encoding="utf-8")
+            if binary:
+                output_file = open(output_path, "wb")
+            else:
+                output_file = open(output_path, "w", encoding="utf-8")
         except IOError as e:
             logger.error(f"Error opening output file {output_path}: {e}")
             return 1
 
     try:
         # Format and output results
-        if output_format == "table":
+        if args.command == "batch":
+            if output_format == "jsonl":
+                format_batch_jsonl(results, output_file)
+            else:
+                format_batch_csv(results, output_file, tuple(METRICS))
+        elif args.command == "watch":
+            format_watch_updates(results, output_file)
+        elif args.command == "history":
+            if output_format == "json":
+                format_history_json(results, output_file)
+            else:
+                format_history_csv(results, output_file)
+        elif output_format == "table":
             format_table(results, output_file)
         elif output_format == "json":
-            format_json(results, output_file)
+            format_json(results, output_file, compact=args.json_compact)
+        elif output_format == "csv" and args.stream:
+            # Rows are written before it is known which metrics occur
+            format_csv_stream(results, output_file, tuple(METRICS))
         elif output_format == "csv":
             format_csv(results, output_file)
+        elif output_format == "jsonl":
+            format_jsonl(results, output_file)
+        elif output_format == "npz":
+            format_npz(results, output_file)
+        elif output_format == "parquet":
+            format_parquet(results, output_file)
     finally:
-        if output_file is not sys.stdout:
+        if output_path:
             output_file.close()
 
     return 0
 
 
+def batch_command(args: argparse.Namespace, logger: logging.Logger) -> int:
+    """
+    Execute the 'batch' command.
+
+    Args:
+        args: Parsed command-line arguments
+        logger: Logger instance
+
+    Returns:
+        Exit code (0 for success, non-zero if any repository failed)
+    """
+    try:
+        repositories = read_repository_list(args.repos_file)
+    except (IOError, UnicodeDecodeError) as e:
+        logger.error(f"Error reading repository list {args.repos_file}: {e}")
+        return 1
+
+    logger.info(f"Analyzing {len(repositories)} repositories")
+
+    # The cache is only shared by serial runs
+    cache = None
+    if not args.no_cache and args.jobs == 1:
+        try:
+            cache = ResultCache(args.cache_dir)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Result cache disabled: {e}")
+
+    failed = []
+
+    def report(results: Iterable[RepositoryResult]) -> Iterator[RepositoryResult]:
+        """
+        Log the repositories that could not be analyzed.
+
+        Args:
+            results: Results of the repositories
+
+        Yields:
+            The results, unchanged
+        """
+        for result in results:
+            if result.error is not None:
+                logger.error(f"Error analyzing {result.repository}: {result.error}")
+                failed.append(result.repository)
+            yield result
+
+    try:
+        results = iter_batch(
+            repositories,
+            workers=args.jobs,
+            cache=cache,
+            follow_symlinks=args.follow_symlinks,
+        )
+        exit_code = write_output(report(results), args, logger)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    if failed:
+        logger.error(f"{len(failed)} of {len(repositories)} repositories failed")
+        return 1
+    return exit_code
+
+
+def history_command(args: argparse.Namespace, logger: logging.Logger) -> int:
+    """
+    Execute the 'history' command.
+
+    Args:
+        args: Parsed command-line arguments
+        logger: Logger instance
+
+    Returns:
+        Exit code (0 for success, non-zero for failure)
+    """
+    path = args.path
+
+    if args.every < 1:
+        logger.error("--every must be at least 1")
+        return 1
+    if not is_git_repo(path):
+        logger.error(f"{path} is not a git repository")
+        return 1
+
+    logger.info(f"Analyzing the history of {path}")
+
+    points = iter_history(
+        path, rev=args.rev, since=args.since, until=args.until, every=args.every
+    )
+    try:
+        return write_output(points, args, logger)
+    except ValueError as e:
+        logger.error(f"Error reading the history of {path}: {e}")
+        return 1
+
+
+def watch_command(args: argparse.Namespace, logger: logging.Logger) -> int:
+    """
+    Execute the 'watch' command.
+
+    Runs until interrupted.
+
+    Args:
+        args: Parsed command-line arguments
+        logger: Logger instance
+
+    Returns:
+        Exit code (0 for success, non-zero for failure)
+    """
+    path = args.path
+    if not os.path.isdir(path):
+        logger.error(f"{path} is not a directory")
+        return 1
+    if args.interval <= 0:
+        logger.error("--interval must be positive")
+        return 1
+
+    logger.info(f"Watching workflow files in {path}")
+
+    def report(updates: Iterable[WatchUpdate]) -> Iterator[WatchUpdate]:
+        """
+        Log the changes behind each update.
+
+        Args:
+            updates: Updates of the watch session
+
+        Yields:
+            The updates, unchanged
+        """
+        for update in updates:
+            logger.debug(
+                f"{update.event}: {len(update.updated)} updated, "
+                f"{len(update.removed)} removed"
+            )
+            yield update
+
+    updates = watch(
+        path,
+        workers=args.jobs,
+        relative_to=args.relative_to,
+        polling=args.polling,
+        interval=args.interval,
+    )
+    try:
+        return write_output(report(updates), args, logger)
+    except KeyboardInterrupt:
+        logger.info("Stopped watching")
+        return 0
+
+
+def bench_command(args: argparse.Namespace, logger: logging.Logger) -> int:
+    """
+    Execute the 'bench' command.
+
+    Args:
+        args: Parsed command-line arguments
+        logger: Logger instance
+
+    Returns:
+        Exit code (0 for success, non-zero for failure)
+    """
+    try:
+        languages = parse_languages(args.languages)
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
+    if args.files < 0 or args.lines < 1 or args.repeat < 1:
+        logger.error(
+            "--files must not be negative, --lines and --repeat must be positive"
+        )
+        return 1
+
+    spec = CorpusSpec(
+        files=args.files,
+        lines=args.lines,
+        languages=languages,
+        comment_ratio=args.comment_ratio,
+        blank_ratio=args.blank_ratio,
+        other_ratio=args.other_ratio,
+        ignore_patterns=args.ignore_patterns,
+        seed=args.seed,
+    )
+
+    if args.directory:
+        if os.path.isdir(args.directory) and os.listdir(args.directory):
+            logger.error(f"{args.directory} is not empty")
+            return 1
+        os.makedirs(args.directory, exist_ok=True)
+        logger.info(f"Benchmarking on {spec.files} files in {args.directory}")
+        report = benchmark(spec, args.directory, args.repeat, args.jobs)
+    else:
+        with tempfile.TemporaryDirectory(prefix="mudag-bench-") as directory:
+            logger.info(f"Benchmarking on {spec.files} files in {directory}")
+            report = benchmark(spec, directory, args.repeat, args.jobs)
+
+    output = json.dumps(report, indent=2) + "\n"
+    if args.output:
+        try:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(output)
+        except IOError as e:
+            logger.error(f"Error writing to output file: {e}")
+            return 1
+        logger.info(f"Results written to {args.output}")
+    else:
+        sys.stdout.write(output)
+    return 0
+
+
+def serve_command(args: argparse.Namespace, logger: logging.Logger) -> int:
+    """
+    Execute the 'serve' command.
+
+    Runs until interrupted.
+
+    Args:
+        args: Parsed command-line arguments
+        logger: Logger instance
+
+    Returns:
+        Exit code (0 for success, non-zero for failure)
+    """
+    if args.workers < 1 or args.max_entries < 1:
+        logger.error("--workers and --max-entries must be positive")
+        return 1
+
+    address: Address
+    if args.host is None and args.port is None:
+        address = args.socket or default_socket_path()
+        name = f"unix:{address}"
+    elif args.socket:
+        logger.error("--socket cannot be combined with --host or --port")
+        return 1
+    else:
+        address = (
+            args.host or "127.0.0.1",
+            DEFAULT_PORT if args.port is None else args.port,
+        )
+        name = f"{address[0]}:{address[1]}"
+
+    try:
+        if isinstance(address, str):
+            os.makedirs(os.path.dirname(os.path.abspath(address)), exist_ok=True)
+        server = create_server(address, args.workers, args.max_entries)
+    except OSError as e:
+        logger.error(f"Cannot listen on {name}: {e}")
+        return 1
+
+    if isinstance(address, str):
+        logger.info(f"Serving on {name}")
+    else:
+        host, port = server.server_address[:2]
+        logger.info(f"Serving on {host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Server stopped")
+    finally:
+        server.server_close()
+    return 0
+
+
 def list_workflows_command(args: argparse.Namespace, logger: logging.Logger) -> int:
     """
     Execute the 'list-workflows' command.
@@ -130,29 +935,31 @@ def list_workflows_command(args: argparse.Namespace, logger: logging.Logger) ->
         logger.error(f"{path} is not a directory")
         return 1
 
-    # Initialize ignore patterns
-    ignore_patterns = IgnorePatterns()
+    response = None
+    if args.server:
+        params = {
+            "path": os.path.abspath(path),
+            "working_dir": os.getcwd(),
+            "follow_symlinks": args.follow_symlinks,
+        }
+        try:
+            response = query_server(args, logger, "list-workflows", params)
+        except ServerError as e:
+            logger.error(f"Server error: {e}")
+            return 1
 
-    # Collect all workflow files
-    workflow_files = []
-    for root, dirs, files in os.walk(path):
-        # Skip directories that match ignore patterns
-        dirs[:] = [
-            d for d in dirs if not ignore_patterns.is_ignored(os.path.join(root, d))
+    if response is not None:
+        workflow_files = response["files"]
+    else:
+        # Collect all workflow files, relative to the scanned directory
+        workflow_files = [
+            rel_path
+            for _, rel_path in walk_files(
+                path, IgnorePatterns(directory=path), args.follow_symlinks
+            )
+            if is_workflow_file(rel_path)
         ]
 
-        for file in files:
-            full_path = os.path.join(root, file)
-
-            # Skip files that match ignore patterns
-            if ignore_patterns.is_ignored(full_path):
-                continue
-
-            if is_workflow_file(full_path):
-                # Use relative path from the scanned directory
-                rel_path = os.path.relpath(full_path, path)
-                workflow_files.append(rel_path)
-
     # Print sorted list of workflow files
     for file in sorted(workflow_files):
         print(file)
@@ -173,19 +980,123 @@ def main() -> int:
     # Set up logging
     logger = setup_logger(args.log_level, args.log_file)
 
+    if (
+        args.profiler == "pyinstrument"
+        and importlib.util.find_spec("pyinstrument") is None
+    ):
+        logger.error(
+            "--profiler pyinstrument requires pyinstrument; "
+            "install it with 'pip install pyinstrument'"
+        )
+        return 1
+
+    STATS.reset()
+    start = time.perf_counter()
+
     # Execute the requested command
     try:
-        if args.command == "analyze":
-            return analyze_command(args, logger)
-        elif args.command == "list-workflows":
-            return list_workflows_command(args, logger)
+        if args.profiler:
+            exit_code = run_profiled(args, logger)
         else:
-            logger.error(f"Unknown command: {args.command}")
-            return 1
+            exit_code = run_command(args, logger)
     except Exception as e:
         logger.exception(f"Unexpected error: {e}")
+        exit_code = 1
+
+    wall_time = time.perf_counter() - start
+    if args.profile:
+        sys.stderr.write(STATS.format_report(wall_time))
+    if args.stats_json:
+        stats = STATS.snapshot()
+        stats["wall_time"] = wall_time
+        try:
+            with open(args.stats_json, "w", encoding="utf-8") as f:
+                json.dump(stats, f, indent=2)
+        except IOError as e:
+            logger.error(f"Error writing statistics file: {e}")
+            return 1
+    return exit_code
+
+
+def run_command(args: argparse.Namespace, logger: logging.Logger) -> int:
+    """
+    Execute the requested command.
+
+    Args:
+        args: Parsed command-line arguments
+        logger: Logger instance
+
+    Returns:
+        Exit code (0 for success, non-zero for failure)
+    """
+    if args.command == "analyze":
+        return analyze_command(args, logger)
+    elif args.command == "list-workflows":
+        return list_workflows_command(args, logger)
+    elif args.command == "batch":
+        return batch_command(args, logger)
+    elif args.command == "history":
+        return history_command(args, logger)
+    elif args.command == "watch":
+        return watch_command(args, logger)
+    elif args.command == "bench":
+        return bench_command(args, logger)
+    elif args.command == "serve":
+        return serve_command(args, logger)
+    else:
+        logger.error(f"Unknown command: {args.command}")
         return 1
 
 
+def run_profiled(args: argparse.Namespace, logger: logging.Logger) -> int:
+    """
+    Execute the requested command under a profiler.
+
+    Only the main process is profiled; worker processes of parallel scans
+    are not.
+
+    Args:
+        args: Parsed command-line arguments
+        logger: Logger instance
+
+    Returns:
+        Exit code of the command
+    """
+    output_path = args.profiler_output
+
+    if args.profiler == "cprofile":
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(run_command, args, logger)
+        finally:
+            if output_path:
+                profiler.dump_stats(output_path)
+                logger.info(f"Profile written to {output_path}")
+            else:
+                stats = pstats.Stats(profiler, stream=sys.stderr)
+                stats.sort_stats("cumulative").print_stats(30)
+
+    from pyinstrument import Profiler
+
+    profiler = Profiler()
+    profiler.start()
+    try:
+        return run_command(args, logger)
+    finally:
+        profiler.stop()
+        if output_path:
+            with open(output_path, "w", encoding="utf-8") as f:
+                if output_path.endswith(".html"):
+                    f.write(profiler.output_html())
+                else:
+                    f.write(profiler.output_text())
+            logger.info(f"Profile written to {output_path}")
+        else:
+            sys.stderr.write(profiler.output_text())
+
+
 if __name__ == "__main__":
     sys.exit(main())
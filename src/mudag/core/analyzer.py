@@ -1,10 +1,29 @@
 """Module for analyzing files and counting lines."""
 
+import hashlib
 import os
-import re
-from typing import Dict, List, Optional, Set
-
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import chain, islice
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..utils.cache import Cache, CacheKey, content_hasher
 from ..utils.ignore_patterns import IgnorePatterns
+from ..utils.instrumentation import STATS, collect
+from ..utils.walker import walk_files
+from .archives import count_archive, is_archive
+from .languages import KNIME, REGISTRY, LanguageSpec
+from .line_classifier import classify_lines, read_chunks
+from .metrics import create_scanner
+from .results import FileResult, ScanResult
+
+# Number of files handed to a worker process at a time in parallel scans
+_BATCH_SIZE = 64
+
+# (path, language, path relative to the base directory) of a file to scan
+_ScanFile = Tuple[str, LanguageSpec, str]
 
 
 def is_workflow_file(file_path: str) -> bool:
@@ -17,177 +36,172 @@ def is_workflow_file(file_path: str) -> bool:
     Returns:
         True if the file is a workflow language file, False otherwise
     """
-    # Define workflow languages and their extensions
-    workflow_languages = {
-        "Galaxy": [".ga", ".galaxy", ".gxwf"],
-        "Common Workflow Language": [".cwl"],
-        "Nextflow": [".nf", ".nextflow", ".config"],
-        "Snakemake": [
-            "Snakefile",
-            "snakefile",
-            "SNAKEFILE",
-            "Snake",
-            "snake",
-            ".smk",
-            ".snake",
-            ".snakefile",
-            ".snakemake",
-            ".rules",
-            ".rule",
-        ],
-        "KNIME": [".knwf", ".workflow.knime", ".knar"],
-        "WDL": [".wdl"],
-    }
-
-    # Flatten the extensions into a single set
-    workflow_extensions: Set[str] = set()
-    for extensions in workflow_languages.values():
-        workflow_extensions.update([ext.lower() for ext in extensions])
-
-    # Check file basename for exact matches (like "Snakefile")
-    basename = os.path.basename(file_path)
-    basename_lower = basename.lower()
-
-    # Handle special case for .workflow.knime
-    if basename_lower.endswith(".workflow.knime"):
-        return True
-
-    # Explicitly exclude yaml files (they may be part of workflows but not workflow languages themselves)
-    _, ext = os.path.splitext(file_path.lower())
-    if ext in [".yml", ".yaml"]:
-        return False
-
-    if basename_lower in workflow_extensions:
-        return True
-
-    # Check if the file follows special Snakemake patterns like "Snakefile.py" or "Snakefile_main"
-    if basename_lower.startswith("snakefile") or basename_lower.startswith("snake"):
-        return True
-
-    # Additional check for numeric suffixes like snake_1, snake_2, etc.
-    if re.match(r"snakefile[\._-]\d+", basename_lower) or re.match(
-        r"snake[\._-]\d+", basename_lower
-    ):
-        return True
-
-    # Check file extension
-    return ext in workflow_extensions
+    return REGISTRY.resolve(file_path).is_workflow
 
 
-def count_lines(file_path: str) -> Dict[str, int]:
+def _hashed(chunks: Iterable[bytes], hasher: hashlib.blake2b) -> Iterator[bytes]:
     """
-    Count the number of code, comment, and blank lines in a file.
+    Feed chunks to a hasher as they are consumed.
+
+    Args:
+        chunks: Chunks of the file contents
+        hasher: Hasher to update
+
+    Yields:
+        The chunks, unchanged
+    """
+    for chunk in chunks:
+        hasher.update(chunk)
+        yield chunk
+
+
+def _classify(
+    file_path: str,
+    spec: LanguageSpec,
+    data: Optional[bytes] = None,
+    hasher: Optional[hashlib.blake2b] = None,
+) -> Tuple[Dict[str, int], int]:
+    """
+    Classify the lines of a text file.
+
+    Structure metrics, e.g. of Galaxy workflows, are collected in the same
+    pass and added to the line counts.
 
     Args:
         file_path: Path to the file to analyze
+        spec: Language of the file
+        data: Contents of the file, or None to read them from file_path
+        hasher: Hasher fed with the file contents as they are read, or None
 
     Returns:
-        Dictionary with counts for 'code', 'comment', and 'blank' lines
+        (line count dictionary, number of bytes classified) tuple
+
+    Raises:
+        UnicodeDecodeError: If the file is not valid UTF-8
+        IOError: If the file cannot be read
     """
-    code_lines = 0
-    comment_lines = 0
-    blank_lines = 0
-
-    # Get file extension and basename
-    basename = os.path.basename(file_path)
-    basename_lower = basename.lower()
-    _, ext = os.path.splitext(file_path.lower())
-
-    # Define comment markers for different file types
-    if (
-        ext in [".py", ".smk", ".snake", ".snakefile", ".snakemake", ".rules", ".rule"]
-        or basename_lower in ["snakefile", "snake"]
-        or basename_lower.startswith("snakefile")
-        or basename_lower.startswith("snake")
-    ):
-        # Python and Snakemake
-        line_comment = "#"
-        block_starts = ['"""', "'''"]
-        block_ends = ['"""', "'''"]
-    elif ext in [".cwl", ".ga", ".galaxy", ".gxwf", ".wdl"] or ext in [".yml", ".yaml"]:
-        # YAML-based formats (including .yml and .yaml, even though they're not considered workflow files)
-        line_comment = "#"
-        block_starts = None
-        block_ends = None
-    elif ext in [".nf", ".nextflow", ".config"]:
-        # Nextflow
-        line_comment = "//"
-        block_starts = ["/*"]
-        block_ends = ["*/"]
-    elif ext in [".knwf", ".workflow.knime", ".knar"] or basename_lower.endswith(
-        ".workflow.knime"
-    ):
-        # KNIME (XML-based)
-        line_comment = "<!--"
-        block_starts = ["<!--"]
-        block_ends = ["-->"]
+    scanner = create_scanner(file_path, spec)
+    if data is not None:
+        chunks: Iterable[bytes] = (data,)
+        if hasher is not None:
+            chunks = _hashed(chunks, hasher)
+        if scanner is not None:
+            chunks = scanner.scan(chunks)
+        counts = classify_lines(
+            chunks, spec.line_comment, spec.block_starts, spec.block_ends
+        )
+        size = len(data)
     else:
-        # Default to Python-like comments if file type is unknown
-        line_comment = "#"
-        block_starts = ['"""', "'''"]
-        block_ends = ['"""', "'''"]
+        with open(file_path, "rb") as file:
+            chunks = read_chunks(file)
+            if hasher is not None:
+                chunks = _hashed(chunks, hasher)
+            if scanner is not None:
+                chunks = scanner.scan(chunks)
+            counts = classify_lines(
+                chunks, spec.line_comment, spec.block_starts, spec.block_ends
+            )
+            size = file.tell()
+    if scanner is not None:
+        counts = scanner.apply(counts)
+    return counts, size
+
+
+def _count(
+    file_path: str,
+    spec: LanguageSpec,
+    data: Optional[bytes] = None,
+    hasher: Optional[hashlib.blake2b] = None,
+) -> Dict[str, int]:
+    """
+    Count lines using the comment syntax of a language.
 
-    in_block_comment = False
-    current_block_end = None
+    KNIME archives are counted by their workflow.knime and settings.xml
+    members.
+
+    Args:
+        file_path: Path to the file to analyze
+        spec: Language of the file
+        data: Contents of the file, or None to read them from file_path
+        hasher: Hasher fed with the file contents, or None
 
+    Returns:
+        Dictionary with counts for 'code', 'comment', and 'blank' lines
+    """
+    start = time.perf_counter()
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
-            lines = file.readlines()
-
-            i = 0
-            while i < len(lines):
-                line = lines[i].rstrip()
-
-                # Handle blank lines
-                if not line.strip():
-                    blank_lines += 1
-                    i += 1
-                    continue
-
-                # Handle block comments
-                if in_block_comment:
-                    comment_lines += 1
-                    if current_block_end and (current_block_end in line):
-                        in_block_comment = False
-                        current_block_end = None
-                    i += 1
-                    continue
-
-                # Check for start of block comments
-                if block_starts:
-                    started_block = False
-                    for j, block_start in enumerate(block_starts):
-                        if line.strip().startswith(block_start):
-                            comment_lines += 1
-                            if (
-                                block_ends[j]
-                                not in line[line.find(block_start) + len(block_start) :]
-                            ):
-                                in_block_comment = True
-                                current_block_end = block_ends[j]
-                            started_block = True
-                            break
-                    if started_block:
-                        i += 1
-                        continue
-
-                # Handle line comments
-                if line.strip().startswith(line_comment):
-                    comment_lines += 1
-                else:
-                    code_lines += 1
-
-                i += 1
+        # Compared by value, since worker processes receive copies of the spec
+        if spec == KNIME and is_archive(file_path):
+            try:
+                # Member bytes are counted as they are classified
+                counts, size = count_archive(file_path, data), 0
+                if hasher is not None:
+                    # Only the members were read, so the archive is hashed
+                    # on its own
+                    with open(file_path, "rb") as file:
+                        for chunk in read_chunks(file):
+                            hasher.update(chunk)
+            except zipfile.BadZipFile:
+                # Not an archive, e.g. a workflow exported as plain XML
+                counts, size = _classify(file_path, spec, data, hasher)
+        else:
+            counts, size = _classify(file_path, spec, data, hasher)
     except (UnicodeDecodeError, IOError) as e:
         print(f"Error reading file {file_path}: {e}")
-        return {"code": 0, "comment": 0, "blank": 0, "error": 1}
+        STATS.count("read_errors")
+        counts = {"code": 0, "comment": 0, "blank": 0, "error": 1}
+        size = 0
 
-    return {
-        "code": code_lines,
-        "comment": comment_lines,
-        "blank": blank_lines,
-        "total": code_lines + comment_lines + blank_lines,
-    }
+    STATS.add_time("count", time.perf_counter() - start)
+    STATS.count("files_counted")
+    STATS.count("bytes_read", size)
+    return counts
+
+
+def count_lines(file_path: str) -> Dict[str, int]:
+    """
+    Count the number of code, comment, and blank lines in a file.
+
+    The file is streamed in binary chunks, so memory use does not grow with
+    the file size.
+
+    Args:
+        file_path: Path to the file to analyze
+
+    Returns:
+        Dictionary with counts for 'code', 'comment', and 'blank' lines
+    """
+    return _count(file_path, REGISTRY.resolve(file_path))
+
+
+def analyze_file(
+    file_path: str,
+    data: Optional[bytes] = None,
+    spec: Optional[LanguageSpec] = None,
+    workflow_only: bool = True,
+) -> Optional[FileResult]:
+    """
+    Classify a file and count its lines in one call.
+
+    The language is resolved once and used both to select the comment syntax
+    and to label the result.
+
+    Args:
+        file_path: Path to the file; also used to determine the language
+        data: Contents of the file, or None to read them from file_path
+        spec: Language of the file if it has already been resolved
+        workflow_only: If True, return None for files that are not workflow
+            language files
+
+    Returns:
+        Result for the file, or None if it is not a workflow language file
+        and workflow_only is set
+    """
+    if spec is None:
+        spec = REGISTRY.resolve(file_path)
+    if workflow_only and not spec.is_workflow:
+        return None
+    return FileResult.from_counts(file_path, spec.name, _count(file_path, spec, data))
 
 
 def get_workflow_language(file_path: str) -> str:
@@ -200,112 +214,301 @@ def get_workflow_language(file_path: str) -> str:
     Returns:
         String identifying the workflow language (e.g., "Snakemake", "CWL")
     """
-    # Get file extension and basename
-    basename = os.path.basename(file_path)
-    basename_lower = basename.lower()
-    _, ext = os.path.splitext(file_path.lower())
+    return REGISTRY.resolve(file_path).name
 
-    # Check for .workflow.knime special case
-    if basename_lower.endswith(".workflow.knime"):
-        return "KNIME"
 
-    # Check for Snakemake
-    if (
-        ext in [".smk", ".snake", ".snakefile", ".snakemake", ".rules", ".rule"]
-        or basename_lower in ["snakefile", "snake"]
-        or basename_lower.startswith("snakefile")
-        or basename_lower.startswith("snake")
-    ):
-        return "Snakemake"
+def _analyze_batch(
+    files: List[_ScanFile], digests: bool = False
+) -> List[Tuple[FileResult, Optional[str]]]:
+    """
+    Analyze a batch of files.
 
-    # Check for CWL
-    if ext == ".cwl":
-        return "CWL"
+    This runs inside the worker processes of a parallel scan.
 
-    # Check for Nextflow
-    if ext in [".nf", ".nextflow", ".config"]:
-        return "Nextflow"
+    Args:
+        files: (path, language, relative path) tuples of the files to analyze
+        digests: If True, also hash the contents of each file for the result
+            cache while it is read
 
-    # Check for Galaxy
-    if ext in [".ga", ".galaxy", ".gxwf"]:
-        return "Galaxy"
+    Returns:
+        List of (file result, content digest or None) tuples in input order
+    """
+    analyzed = []
+    for file_path, spec, rel_path in files:
+        hasher = content_hasher(spec.name) if digests else None
+        counts = _count(file_path, spec, hasher=hasher)
+        analyzed.append(
+            (
+                FileResult.from_counts(file_path, spec.name, counts, rel_path),
+                hasher.hexdigest() if hasher is not None else None,
+            )
+        )
+    return analyzed
 
-    # Check for KNIME
-    if ext in [".knwf", ".knar"]:
-        return "KNIME"
 
-    # Check for WDL
-    if ext == ".wdl":
-        return "WDL"
+def _resolve_workers(workers: Optional[int]) -> int:
+    """
+    Resolve the requested number of worker processes.
+
+    Args:
+        workers: Requested number of workers; None means serial, zero or a
+            negative number means one worker per CPU
+
+    Returns:
+        Number of worker processes to use (1 means serial)
+    """
+    if workers is None:
+        return 1
+    if workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def _relative_prefix(directory: str, relative_to: Optional[str]) -> str:
+    """
+    Get the prefix turning paths within a directory into relative paths.
+
+    Args:
+        directory: Path to the directory
+        relative_to: Base directory of the relative paths (default: the
+            current directory)
+
+    Returns:
+        Path of the directory relative to the base directory with a trailing
+        separator, or "" if both are the same directory
+    """
+    try:
+        prefix = os.path.relpath(directory, relative_to or os.curdir)
+    except ValueError:
+        # No relative path exists, e.g. across Windows drives
+        prefix = os.path.abspath(directory)
+    return "" if prefix == os.curdir else prefix + os.sep
+
+
+def _iter_workflow_files(
+    directory: str,
+    follow_symlinks: bool = False,
+    relative_to: Optional[str] = None,
+    working_dir: Optional[str] = None,
+) -> Iterator[_ScanFile]:
+    """
+    Walk a directory and yield the workflow files that are not ignored.
+
+    Args:
+        directory: Path to the directory to walk
+        follow_symlinks: If True, descend into symbolic links to directories
+        relative_to: Base directory of the relative paths (default: the
+            current directory)
+        working_dir: Directory whose .mudagignore applies as the current
+            directory's (default: the current directory)
+
+    Yields:
+        (path, language, relative path) tuples in traversal order
+    """
+    # The walker yields paths relative to the directory, so the prefix
+    # relative to the base directory is computed once
+    prefix = _relative_prefix(directory, relative_to)
+
+    ignore_patterns = IgnorePatterns(working_dir, directory)
+    for file_path, rel_path in walk_files(directory, ignore_patterns, follow_symlinks):
+        spec = REGISTRY.resolve(rel_path)
+        if spec.is_workflow:
+            yield file_path, spec, prefix + rel_path
+
+
+class _Batch:
+    """Batch of files whose cached results have been looked up."""
+
+    def __init__(self, files: List[_ScanFile], cache: Optional[Cache]) -> None:
+        """
+        Look up the cached results of a batch of files.
+
+        Args:
+            files: (path, language, relative path) tuples of the files
+            cache: Result cache, or None
+        """
+        self.cache = cache
+        self.digests = cache is not None and cache.wants_digests
+        self.results: List[Optional[FileResult]] = [None] * len(files)
+        self.keys: List[Optional[CacheKey]] = [None] * len(files)
+
+        if cache is not None:
+            start = time.perf_counter()
+            for i, (file_path, spec, rel_path) in enumerate(files):
+                self.keys[i] = cache.key(file_path, spec.name)
+                if self.keys[i] is not None:
+                    cached = cache.get(self.keys[i])
+                    if cached is not None:
+                        self.results[i] = FileResult.from_counts(
+                            file_path, spec.name, cached, rel_path
+                        )
+            STATS.add_time("cache", time.perf_counter() - start)
+
+        self.missing = [i for i, result in enumerate(self.results) if result is None]
+        self.todo = [files[i] for i in self.missing]
+        if cache is not None:
+            STATS.count("cache_hits", len(files) - len(self.missing))
+            STATS.count("cache_misses", len(self.missing))
+
+    def complete(
+        self, analyzed: List[Tuple[FileResult, Optional[str]]]
+    ) -> List[FileResult]:
+        """
+        Merge freshly analyzed results into the batch and cache them.
+
+        Args:
+            analyzed: (file result, content digest) tuples of the files in
+                ``todo``, in the same order, as returned by _analyze_batch
+
+        Returns:
+            Results of all files of the batch in input order
+        """
+        start = time.perf_counter()
+        for i, (result, digest) in zip(self.missing, analyzed):
+            self.results[i] = result
+            if self.cache is not None and self.keys[i] is not None:
+                self.cache.put(self.keys[i], result.counts(), digest)
+        if self.cache is not None:
+            STATS.add_time("cache", time.perf_counter() - start)
+        return self.results
+
+
+def _batched(files: Iterator[_ScanFile]) -> Iterator[List[_ScanFile]]:
+    """
+    Group files into batches.
+
+    Args:
+        files: Iterator of (path, language, relative path) tuples
 
-    # Default to "Other" if not recognized
-    return "Other"
+    Yields:
+        Lists of at most _BATCH_SIZE tuples
+    """
+    while True:
+        batch = list(islice(files, _BATCH_SIZE))
+        if not batch:
+            return
+        yield batch
+
+
+def _complete(batch: _Batch, future: Optional[Future]) -> List[FileResult]:
+    """
+    Complete a batch with the results of a worker process.
 
+    The statistics of the worker are merged into those of this process.
 
-def scan_directory(directory: str) -> Dict[str, Dict[str, int]]:
+    Args:
+        batch: Batch submitted to the worker
+        future: Future of the worker's collect(_analyze_batch) call, or None
+            if all results of the batch were cached
+
+    Returns:
+        Results of all files of the batch in input order
+    """
+    if future is None:
+        return batch.complete([])
+    analyzed, stats = future.result()
+    STATS.merge(stats)
+    return batch.complete(analyzed)
+
+
+def iter_scan(
+    directory: str,
+    workers: Optional[int] = None,
+    cache: Optional[Cache] = None,
+    follow_symlinks: bool = False,
+    relative_to: Optional[str] = None,
+    working_dir: Optional[str] = None,
+) -> Iterator[FileResult]:
+    """
+    Scan a directory and yield the results of workflow files as they are produced.
+
+    Results are yielded in traversal order, also when files are analyzed in
+    batches by a process pool. Only a bounded number of batches is in flight
+    at a time, so memory use does not grow with the number of files.
+
+    Args:
+        directory: Path to the directory to scan
+        workers: Number of worker processes (None or 1 for a serial scan,
+            0 for one worker per CPU)
+        cache: Result cache consulted before counting a file, or None to
+            count every file
+        follow_symlinks: If True, descend into symbolic links to directories
+        relative_to: Base directory of the results' relative paths (default:
+            the current directory)
+        working_dir: Directory whose .mudagignore applies as the current
+            directory's (default: the current directory)
+
+    Yields:
+        Result of each workflow file
+    """
+    files = STATS.timed_iter(
+        "walk",
+        _iter_workflow_files(directory, follow_symlinks, relative_to, working_dir),
+    )
+    first_batch = list(islice(files, _BATCH_SIZE))
+    num_workers = _resolve_workers(workers)
+
+    # Small trees are not worth starting a process pool for
+    if num_workers <= 1 or len(first_batch) < _BATCH_SIZE:
+        for batch_files in chain([first_batch], _batched(files)):
+            batch = _Batch(batch_files, cache)
+            yield from batch.complete(_analyze_batch(batch.todo, batch.digests))
+        return
+
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        pending: Deque[Tuple[_Batch, Optional[Future]]] = deque()
+        for batch_files in chain([first_batch], _batched(files)):
+            batch = _Batch(batch_files, cache)
+            future = None
+            if batch.todo:
+                future = executor.submit(
+                    collect, _analyze_batch, batch.todo, batch.digests
+                )
+            pending.append((batch, future))
+
+            # Keep every worker busy without queueing the whole tree
+            while len(pending) > 2 * num_workers:
+                yield from _complete(*pending.popleft())
+
+        while pending:
+            yield from _complete(*pending.popleft())
+
+
+def scan_directory(
+    directory: str,
+    workers: Optional[int] = None,
+    cache: Optional[Cache] = None,
+    follow_symlinks: bool = False,
+    relative_to: Optional[str] = None,
+    working_dir: Optional[str] = None,
+) -> ScanResult:
     """
     Scan a directory and count lines in workflow language files.
 
+    With more than one worker, files are counted in batches by a process pool.
+    Results are merged in traversal order, so the output is identical to a
+    serial scan.
+
     Args:
         directory: Path to the directory to scan
+        workers: Number of worker processes (None or 1 for a serial scan,
+            0 for one worker per CPU)
+        cache: Result cache consulted before counting a file, or None to
+            count every file
+        follow_symlinks: If True, descend into symbolic links to directories
+        relative_to: Base directory of the results' relative paths (default:
+            the current directory)
+        working_dir: Directory whose .mudagignore applies as the current
+            directory's (default: the current directory)
 
     Returns:
-        Dictionary mapping file paths to line count dictionaries
-    """
-    # Initialize ignore patterns
-    ignore_patterns = IgnorePatterns()
-
-    results = {}
-
-    # Add metadata to track file categories
-    results["__metadata__"] = {
-        "workflow_languages": {
-            "Snakemake": {"files": 0, "code": 0, "comment": 0, "blank": 0, "total": 0},
-            "CWL": {"files": 0, "code": 0, "comment": 0, "blank": 0, "total": 0},
-            "Nextflow": {"files": 0, "code": 0, "comment": 0, "blank": 0, "total": 0},
-            "Galaxy": {"files": 0, "code": 0, "comment": 0, "blank": 0, "total": 0},
-            "KNIME": {"files": 0, "code": 0, "comment": 0, "blank": 0, "total": 0},
-            "WDL": {"files": 0, "code": 0, "comment": 0, "blank": 0, "total": 0},
-            "Other": {"files": 0, "code": 0, "comment": 0, "blank": 0, "total": 0},
-        }
-    }
-
-    for root, dirs, files in os.walk(directory):
-        # Exclude directories that match ignore patterns
-        dirs[:] = [
-            d for d in dirs if not ignore_patterns.is_ignored(os.path.join(root, d))
-        ]
-
-        for file in files:
-            file_path = os.path.join(root, file)
-
-            # Skip files that match ignore patterns
-            if ignore_patterns.is_ignored(file_path):
-                continue
-
-            if not is_workflow_file(file_path):
-                continue
-
-            # Count lines in the file
-            line_counts = count_lines(file_path)
-            results[file_path] = line_counts
-
-            # Determine workflow language and update metadata
-            language = get_workflow_language(file_path)
-            results["__metadata__"]["workflow_languages"][language]["files"] += 1
-            results["__metadata__"]["workflow_languages"][language]["code"] += (
-                line_counts["code"]
-            )
-            results["__metadata__"]["workflow_languages"][language]["comment"] += (
-                line_counts["comment"]
-            )
-            results["__metadata__"]["workflow_languages"][language]["blank"] += (
-                line_counts["blank"]
-            )
-            results["__metadata__"]["workflow_languages"][language]["total"] += (
-                line_counts["total"]
-            )
-
+        Column-oriented results, which also behave like the dictionary mapping
+        file paths to line count dictionaries returned by earlier versions
+    """
+    results = ScanResult()
+    results.extend(
+        iter_scan(directory, workers, cache, follow_symlinks, relative_to, working_dir)
+    )
     return results
 
 
@@ -329,9 +532,9 @@ def compare_versions(
     Returns:
         Dictionary with differences in line counts between the two commits
     """
-    # This is a placeholder for the git comparison functionality
-    # It would require implementing git operations to checkout different commits
-    # and compare the files between them
+    # Imported here because git_utils builds on this module
+    from ..utils.git_utils import compare_commits
 
-    # For now, just return an empty dictionary
-    return {}
+    return compare_commits(
+        directory, git_commit1, git_commit2, exclude_dirs, workflow_only
+    )
@@ -0,0 +1,290 @@
+"""Module for counting lines in the members of KNIME workflow archives."""
+
+import io
+import os
+import struct
+import threading
+import zipfile
+import zlib
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..utils.instrumentation import STATS
+from .languages import KNIME
+from .line_classifier import CHUNK_SIZE, classify_lines
+from .results import FileResult
+
+# Extensions of KNIME workflow (.knwf) and workflow group (.knar) archives
+ARCHIVE_EXTENSIONS = (".knwf", ".knar")
+
+# Basenames of the archive members that are counted; other members hold
+# data, images and binary node state
+MEMBER_NAMES = ("workflow.knime", "settings.xml")
+
+# Separator between the archive path and the member name in result paths
+MEMBER_SEPARATOR = "!/"
+
+# Maximum number of archives whose central directory is kept per process
+_MAX_DIRECTORIES = 256
+
+# Local file header, see APPNOTE.TXT 4.3.7
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+# Counted members of recently read archives by path, with the size and
+# modification time they were read at
+_directories: "OrderedDict[str, Tuple[int, int, List[zipfile.ZipInfo]]]" = OrderedDict()
+_directories_lock = threading.Lock()
+
+
+def is_archive(file_path: str) -> bool:
+    """
+    Check if a file is a KNIME archive by its extension.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        True for .knwf and .knar files
+    """
+    return file_path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _read_directory(file: BinaryIO) -> List[zipfile.ZipInfo]:
+    """
+    Parse the central directory of an archive.
+
+    Args:
+        file: Archive opened in binary mode
+
+    Returns:
+        Entries of the counted members in archive order
+
+    Raises:
+        zipfile.BadZipFile: If the file is not a ZIP archive
+    """
+    with zipfile.ZipFile(file) as archive:
+        return [
+            info
+            for info in archive.infolist()
+            if not info.is_dir()
+            and info.filename.rsplit("/", 1)[-1].lower() in MEMBER_NAMES
+        ]
+
+
+def _members(file_path: str, file: BinaryIO) -> List[zipfile.ZipInfo]:
+    """
+    Get the counted members of an archive file, parsing it at most once.
+
+    Args:
+        file_path: Path to the archive
+        file: The archive opened in binary mode
+
+    Returns:
+        Entries of the counted members in archive order
+
+    Raises:
+        zipfile.BadZipFile: If the file is not a ZIP archive
+    """
+    stat = os.fstat(file.fileno())
+    key = os.path.abspath(file_path)
+    with _directories_lock:
+        entry = _directories.get(key)
+        if entry is not None and entry[:2] == (stat.st_size, stat.st_mtime_ns):
+            _directories.move_to_end(key)
+            STATS.count("archive_cache_hits")
+            return entry[2]
+
+    members = _read_directory(file)
+    with _directories_lock:
+        _directories[key] = (stat.st_size, stat.st_mtime_ns, members)
+        _directories.move_to_end(key)
+        while len(_directories) > _MAX_DIRECTORIES:
+            _directories.popitem(last=False)
+    return members
+
+
+def _read_member(file: BinaryIO, info: zipfile.ZipInfo) -> Iterator[bytes]:
+    """
+    Decompress a member of an archive in chunks.
+
+    Stored and deflated members, which is what KNIME writes, are read
+    straight from their local header with the central directory entry, so
+    the archive is not parsed again. Other compression methods go through
+    zipfile.
+
+    Args:
+        file: Archive opened in binary mode
+        info: Central directory entry of the member
+
+    Yields:
+        Chunks of the uncompressed member
+
+    Raises:
+        zipfile.BadZipFile: If the member is corrupt or encrypted
+        NotImplementedError: If zipfile does not support the compression
+            method, e.g. deflate64
+    """
+    if info.flag_bits & 0x1:
+        raise zipfile.BadZipFile(f"{info.filename} is encrypted")
+    if info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+        with zipfile.ZipFile(file) as archive, archive.open(info) as member:
+            while True:
+                chunk = member.read(CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+    file.seek(info.header_offset)
+    header = file.read(_LOCAL_HEADER.size)
+    if len(header) != _LOCAL_HEADER.size or header[:4] != _LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f"Bad local header of {info.filename}")
+    fields = _LOCAL_HEADER.unpack(header)
+    file.seek(fields[-2] + fields[-1], io.SEEK_CUR)
+
+    decompressor = None
+    if info.compress_type == zipfile.ZIP_DEFLATED:
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+    remaining = info.compress_size
+    crc = 0
+    while remaining > 0:
+        data = file.read(min(CHUNK_SIZE, remaining))
+        if not data:
+            raise zipfile.BadZipFile(f"{info.filename} is truncated")
+        remaining -= len(data)
+        if decompressor is not None:
+            data = decompressor.decompress(data)
+        crc = zlib.crc32(data, crc)
+        yield data
+    if decompressor is not None:
+        data = decompressor.flush()
+        crc = zlib.crc32(data, crc)
+        yield data
+    if crc != info.CRC:
+        raise zipfile.BadZipFile(f"Bad CRC of {info.filename}")
+
+
+def _count_members(
+    archive_path: str, file: BinaryIO, members: Iterable[zipfile.ZipInfo]
+) -> List[Tuple[str, Dict[str, int]]]:
+    """
+    Count the lines of archive members.
+
+    Args:
+        archive_path: Path to the archive, for error messages
+        file: Archive opened in binary mode
+        members: Entries of the members to count
+
+    Returns:
+        (member name, line count dictionary) pairs in archive order
+    """
+    counts = []
+    for info in members:
+        try:
+            member_counts = classify_lines(
+                _read_member(file, info),
+                KNIME.line_comment,
+                KNIME.block_starts,
+                KNIME.block_ends,
+            )
+            STATS.count("bytes_read", info.file_size)
+        except (
+            UnicodeDecodeError,
+            zipfile.BadZipFile,
+            zlib.error,
+            NotImplementedError,
+            RuntimeError,
+        ) as e:
+            # One unreadable member does not fail the archive or the scan
+            member_path = f"{archive_path}{MEMBER_SEPARATOR}{info.filename}"
+            print(f"Error reading file {member_path}: {e}")
+            STATS.count("read_errors")
+            member_counts = {"code": 0, "comment": 0, "blank": 0, "error": 1}
+        counts.append((info.filename, member_counts))
+    return counts
+
+
+def count_archive_members(
+    file_path: str, data: Optional[bytes] = None
+) -> List[Tuple[str, Dict[str, int]]]:
+    """
+    Count the lines of the workflow.knime and settings.xml members of an archive.
+
+    Members are decompressed and classified chunk by chunk, without
+    extracting them. The central directory of an archive file is kept per
+    process and reused while the file's size and modification time do not
+    change.
+
+    Args:
+        file_path: Path to the archive
+        data: Contents of the archive, or None to read them from file_path
+
+    Returns:
+        (member name, line count dictionary) pairs in archive order
+
+    Raises:
+        zipfile.BadZipFile: If the file is not a ZIP archive
+        IOError: If the file cannot be read
+    """
+    if data is not None:
+        file = io.BytesIO(data)
+        return _count_members(file_path, file, _read_directory(file))
+    with open(file_path, "rb") as file:
+        return _count_members(file_path, file, _members(file_path, file))
+
+
+def count_archive(file_path: str, data: Optional[bytes] = None) -> Dict[str, int]:
+    """
+    Count the lines of a KNIME archive, summed over its counted members.
+
+    Members that cannot be read are reported and left out of the sums.
+
+    Args:
+        file_path: Path to the archive
+        data: Contents of the archive, or None to read them from file_path
+
+    Returns:
+        Dictionary with counts for 'code', 'comment', 'blank' and 'total' lines
+
+    Raises:
+        zipfile.BadZipFile: If the file is not a ZIP archive
+        IOError: If the file cannot be read
+    """
+    totals = {"code": 0, "comment": 0, "blank": 0, "total": 0}
+    for _, counts in count_archive_members(file_path, data):
+        if not counts.get("error"):
+            for key in totals:
+                totals[key] += counts[key]
+    return totals
+
+
+def expand_archive_members(records: Iterable[FileResult]) -> Iterator[FileResult]:
+    """
+    Replace the results of KNIME archives by one result per counted member.
+
+    Member results have the path of the archive followed by MEMBER_SEPARATOR
+    and the member name. Other results are passed through unchanged.
+
+    Args:
+        records: File results, e.g. of a directory scan
+
+    Yields:
+        File results with archives broken down into their members
+    """
+    for record in records:
+        if record.language != KNIME.name or not is_archive(record.path):
+            yield record
+            continue
+        try:
+            members = count_archive_members(record.path)
+        except (zipfile.BadZipFile, IOError):
+            # Counted as plain text, so there are no members to report
+            yield record
+            continue
+        for name, counts in members:
+            yield FileResult.from_counts(
+                record.path + MEMBER_SEPARATOR + name,
+                record.language,
+                counts,
+                record.rel_path + MEMBER_SEPARATOR + name if record.rel_path else "",
+            )
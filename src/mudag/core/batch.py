@@ -0,0 +1,140 @@
+"""Module for analyzing many repositories in one process."""
+
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from ..utils.cache import Cache
+from ..utils.instrumentation import STATS, collect
+from .analyzer import _resolve_workers, iter_scan
+from .results import FileResult
+
+
+class RepositoryResult(NamedTuple):
+    """Results of all workflow files of one repository."""
+
+    repository: str
+    records: List[FileResult]
+    error: Optional[str] = None
+
+
+def read_repository_list(list_file: str) -> List[str]:
+    """
+    Read repository paths from a file.
+
+    Args:
+        list_file: Path to a file with one repository path per line; empty
+            lines and lines starting with '#' are skipped
+
+    Returns:
+        List of repository paths in file order
+    """
+    with open(list_file, "r", encoding="utf-8") as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+def analyze_repository(
+    repository: str,
+    cache: Optional[Cache] = None,
+    follow_symlinks: bool = False,
+) -> RepositoryResult:
+    """
+    Analyze the workflow files of a repository.
+
+    Errors are captured in the result instead of being raised, so a failing
+    repository does not abort a batch.
+
+    Args:
+        repository: Path to the repository
+        cache: Result cache consulted before counting a file, or None to
+            count every file
+        follow_symlinks: If True, descend into symbolic links to directories
+
+    Returns:
+        Results of the repository's workflow files in traversal order, with
+        paths relative to the repository
+    """
+    if not os.path.isdir(repository):
+        return RepositoryResult(repository, [], f"{repository} is not a directory")
+
+    try:
+        records = list(
+            iter_scan(
+                repository,
+                cache=cache,
+                follow_symlinks=follow_symlinks,
+                relative_to=repository,
+            )
+        )
+    except Exception as e:
+        return RepositoryResult(repository, [], f"{type(e).__name__}: {e}")
+    return RepositoryResult(repository, records)
+
+
+def _collect(repository: str, future: Future) -> RepositoryResult:
+    """
+    Get the result of a repository analyzed by a worker process.
+
+    The statistics of the worker are merged into those of this process.
+
+    Args:
+        repository: Path to the repository
+        future: Future of the worker's collect(analyze_repository) call
+
+    Returns:
+        Result of the repository, with the error if the worker failed
+    """
+    try:
+        result, stats = future.result()
+    except Exception as e:
+        return RepositoryResult(repository, [], f"{type(e).__name__}: {e}")
+    STATS.merge(stats)
+    return result
+
+
+def iter_batch(
+    repositories: Iterable[str],
+    workers: Optional[int] = None,
+    cache: Optional[Cache] = None,
+    follow_symlinks: bool = False,
+) -> Iterator[RepositoryResult]:
+    """
+    Analyze many repositories and yield their results in input order.
+
+    Each repository is scanned by one worker process of a shared pool. Only
+    a bounded number of repositories is in flight at a time, and results
+    are yielded in the order of the input, so output stays deterministic.
+
+    Args:
+        repositories: Paths to the repositories
+        workers: Number of worker processes (None or 1 for a serial run,
+            0 for one worker per CPU)
+        cache: Result cache consulted before counting a file; only used by
+            serial runs, as worker processes do not share the cache
+        follow_symlinks: If True, descend into symbolic links to directories
+
+    Yields:
+        Result of each repository
+    """
+    num_workers = _resolve_workers(workers)
+    if num_workers <= 1:
+        for repository in repositories:
+            yield analyze_repository(repository, cache, follow_symlinks)
+        return
+
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        pending: Deque[Tuple[str, Future]] = deque()
+        for repository in repositories:
+            future = executor.submit(
+                collect, analyze_repository, repository, None, follow_symlinks
+            )
+            pending.append((repository, future))
+
+            # Keep every worker busy without queueing every repository
+            while len(pending) > 2 * num_workers:
+                yield _collect(*pending.popleft())
+
+        while pending:
+            yield _collect(*pending.popleft())
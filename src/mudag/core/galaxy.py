@@ -0,0 +1,265 @@
+"""Module for extracting structure metrics from Galaxy .ga workflow files."""
+
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, Set
+
+# A non-empty annotation ending its line; JSON strings cannot contain line
+# breaks, so if only indentation precedes it, the line holds nothing else
+_ANNOTATION_LINE = re.compile(
+    rb'"annotation"[ \t]*:[ \t]*"(?=[^"])[^"\\\r\n]*(?:\\.[^"\\\r\n]*)*"'
+    rb"[ \t]*,?[ \t]*\r?$",
+    re.MULTILINE,
+)
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# Characters that may continue a decoded number, e.g. '12' of '12.5e3'
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+
+# Positions of the parser in the workflow object and its 'steps' object
+_START = 0
+_KEY = 1
+_COLON = 2
+_VALUE = 3
+_NEXT = 4
+_STEP_KEY = 5
+_STEP_COLON = 6
+_STEP_VALUE = 7
+_STEP_NEXT = 8
+_DONE = 9
+
+_DECODER = json.JSONDecoder()
+
+
+class GalaxyScanner:
+    """
+    Incremental scanner of Galaxy workflow JSON.
+
+    The content is scanned chunk by chunk while it is passed on to the line
+    classifier, so the file is read once. Only the workflow object and its
+    'steps' object are walked incrementally; each step is decoded on its own
+    by the json module, so a large export is never held as one object graph.
+
+    Steps include those of embedded subworkflows; tools are the distinct
+    'tool_id' values of the steps; annotations are the non-empty
+    'annotation' strings of workflows and steps; and connections are the
+    entries of the steps' 'input_connections'. Lines holding nothing but a
+    non-empty annotation are counted as comment lines.
+    """
+
+    def __init__(self) -> None:
+        """Create a scanner at the start of a document."""
+        self.steps = 0
+        self.annotations = 0
+        self.connections = 0
+        self.tools: Set[str] = set()
+        self._annotation_lines = 0
+        self._partial_line = b""
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._text = ""
+        self._state = _START
+        self._key = ""
+        # Text length needed before a value that was incomplete is decoded
+        # again, so that a large value is not decoded once per chunk
+        self._retry_length = 0
+
+    def scan(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Scan chunks while passing them on.
+
+        Args:
+            chunks: Chunks of the file contents
+
+        Yields:
+            The chunks, unchanged
+
+        Raises:
+            UnicodeDecodeError: If the content is not valid UTF-8
+        """
+        for chunk in chunks:
+            self._count_annotation_lines(chunk, False)
+            if self._state != _DONE:
+                self._text += self._decoder.decode(chunk)
+                if len(self._text) >= self._retry_length:
+                    self._parse(False)
+            yield chunk
+        self._count_annotation_lines(b"", True)
+        if self._state != _DONE:
+            self._text += self._decoder.decode(b"", True)
+            self._parse(True)
+
+    def _count_annotation_lines(self, chunk: bytes, final: bool) -> None:
+        """
+        Count the annotation lines among the complete lines received.
+
+        Args:
+            chunk: Next chunk of the contents
+            final: Whether no more chunks follow
+        """
+        lines = self._partial_line + chunk if self._partial_line else chunk
+        end = len(lines) if final else lines.rfind(b"\n") + 1
+        for match in _ANNOTATION_LINE.finditer(lines, 0, end):
+            start = lines.rfind(b"\n", 0, match.start()) + 1
+            if not lines[start : match.start()].strip(b" \t"):
+                self._annotation_lines += 1
+        self._partial_line = lines[end:]
+
+    def _parse(self, final: bool) -> None:
+        """
+        Walk the received text as far as it is complete.
+
+        Args:
+            final: Whether the text is the whole document
+        """
+        text = self._text
+        pos = 0
+        state = self._state
+        while state != _DONE:
+            pos = _WHITESPACE.match(text, pos).end()
+            if pos == len(text):
+                if final:
+                    state = _DONE
+                break
+            char = text[pos]
+
+            if state == _KEY or state == _STEP_KEY:
+                if char == "}":
+                    pos += 1
+                    state = _NEXT if state == _STEP_KEY else _DONE
+                    continue
+                if char != '"':
+                    state = _DONE
+                    break
+                end = text.find('"', pos + 1)
+                if end == -1 or "\\" in text[pos:end]:
+                    # Unusual or incomplete key: leave it to the decoder
+                    try:
+                        self._key, pos = _DECODER.raw_decode(text, pos)
+                    except ValueError:
+                        if final:
+                            state = _DONE
+                        break
+                else:
+                    self._key = text[pos + 1 : end]
+                    pos = end + 1
+                state = _COLON if state == _KEY else _STEP_COLON
+            elif state == _VALUE or state == _STEP_VALUE:
+                if state == _VALUE and self._key == "steps" and char == "{":
+                    pos += 1
+                    state = _STEP_KEY
+                    continue
+                try:
+                    value, end = _DECODER.raw_decode(text, pos)
+                except ValueError:
+                    end = -1
+                if end == -1 or (
+                    # A number ending the text may continue in the next chunk
+                    not final
+                    and isinstance(value, (int, float))
+                    and _NUMBER_TAIL.match(text, end).end() == len(text)
+                ):
+                    if final:
+                        state = _DONE
+                    else:
+                        self._retry_length = 2 * (len(text) - pos)
+                    break
+                pos = end
+                if state == _VALUE:
+                    self._add_member(self._key, value)
+                    state = _NEXT
+                else:
+                    self._add_step(value)
+                    state = _STEP_NEXT
+            elif state == _START:
+                pos += 1
+                # Anything but an object is not a workflow
+                state = _KEY if char == "{" else _DONE
+            elif state == _COLON or state == _STEP_COLON:
+                pos += 1
+                if char != ":":
+                    state = _DONE
+                else:
+                    state = _VALUE if state == _COLON else _STEP_VALUE
+            else:
+                pos += 1
+                if char == ",":
+                    state = _KEY if state == _NEXT else _STEP_KEY
+                elif char == "}" and state == _STEP_NEXT:
+                    state = _NEXT
+                else:
+                    state = _DONE
+
+        self._text = "" if state == _DONE else text[pos:]
+        self._state = state
+
+    def _add_member(self, key: str, value: Any) -> None:
+        """
+        Add a member of a workflow object to the metrics.
+
+        Args:
+            key: Name of the member
+            value: Decoded value of the member
+        """
+        if key == "annotation":
+            if isinstance(value, str) and value:
+                self.annotations += 1
+        elif key == "steps":
+            if isinstance(value, dict):
+                value = list(value.values())
+            if isinstance(value, list):
+                for step in value:
+                    self._add_step(step)
+
+    def _add_step(self, step: Any) -> None:
+        """
+        Add a decoded step, and the steps of its subworkflow, to the metrics.
+
+        Args:
+            step: Decoded step object
+        """
+        if not isinstance(step, dict):
+            return
+        self.steps += 1
+
+        tool_id = step.get("tool_id")
+        if isinstance(tool_id, str):
+            self.tools.add(tool_id)
+        annotation = step.get("annotation")
+        if isinstance(annotation, str) and annotation:
+            self.annotations += 1
+
+        connections = step.get("input_connections")
+        if isinstance(connections, dict):
+            for connection in connections.values():
+                if isinstance(connection, list):
+                    # One input connected to several outputs
+                    self.connections += len(connection)
+                elif connection:
+                    self.connections += 1
+
+        subworkflow = step.get("subworkflow")
+        if isinstance(subworkflow, dict):
+            for key, value in subworkflow.items():
+                self._add_member(key, value)
+
+    def apply(self, counts: Dict[str, int]) -> Dict[str, int]:
+        """
+        Add the metrics to the line counts of the scanned file.
+
+        Args:
+            counts: Line counts of the file
+
+        Returns:
+            The line counts with annotation lines moved from code to comment
+            lines, and the metrics added
+        """
+        counts = dict(counts)
+        counts["code"] -= self._annotation_lines
+        counts["comment"] += self._annotation_lines
+        counts["steps"] = self.steps
+        counts["tools"] = len(self.tools)
+        counts["annotations"] = self.annotations
+        counts["connections"] = self.connections
+        return counts
@@ -0,0 +1,119 @@
+"""Module defining the supported workflow languages and their syntax."""
+
+import os
+import re
+from typing import Dict, NamedTuple, Sequence, Tuple
+
+
+class LanguageSpec(NamedTuple):
+    """Immutable description of a language and its comment syntax."""
+
+    name: str
+    line_comment: str
+    block_starts: Tuple[str, ...]
+    block_ends: Tuple[str, ...]
+    is_workflow: bool
+
+
+_PYTHON_BLOCKS = ('"""', "'''")
+
+SNAKEMAKE = LanguageSpec("Snakemake", "#", _PYTHON_BLOCKS, _PYTHON_BLOCKS, True)
+CWL = LanguageSpec("CWL", "#", (), (), True)
+NEXTFLOW = LanguageSpec("Nextflow", "//", ("/*",), ("*/",), True)
+GALAXY = LanguageSpec("Galaxy", "#", (), (), True)
+KNIME = LanguageSpec("KNIME", "<!--", ("<!--",), ("-->",), True)
+WDL = LanguageSpec("WDL", "#", (), (), True)
+
+# YAML files may be part of a workflow but are not workflow languages
+YAML = LanguageSpec("Other", "#", (), (), False)
+
+# Unknown files default to Python-like comments
+OTHER = LanguageSpec("Other", "#", _PYTHON_BLOCKS, _PYTHON_BLOCKS, False)
+
+# Language names in the order they are reported
+WORKFLOW_LANGUAGES = ("Snakemake", "CWL", "Nextflow", "Galaxy", "KNIME", "WDL", "Other")
+
+
+class LanguageRegistry:
+    """
+    Registry resolving file paths to language specifications.
+
+    A path is resolved by matching its lowercase basename against a single
+    precompiled regular expression of name patterns, which take precedence,
+    and then looking up its extension in a dictionary.
+    """
+
+    def __init__(
+        self,
+        extensions: Dict[str, LanguageSpec],
+        patterns: Sequence[Tuple[str, LanguageSpec]],
+        default: LanguageSpec,
+    ) -> None:
+        """
+        Build the registry.
+
+        Args:
+            extensions: Mapping of file extensions (including the dot) to
+                language specifications
+            patterns: Ordered (regular expression, language specification)
+                pairs matched against the start of the lowercase basename;
+                the first matching pattern wins
+            default: Language specification of unrecognized files
+        """
+        self._extensions = {ext.lower(): spec for ext, spec in extensions.items()}
+        self._pattern_specs = tuple(spec for _, spec in patterns)
+        self._pattern = re.compile(
+            "|".join(f"({pattern})" for pattern, _ in patterns), re.DOTALL
+        )
+        self.default = default
+
+    def resolve(self, file_path: str) -> LanguageSpec:
+        """
+        Resolve the language of a file from its path.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            Language specification of the file
+        """
+        basename = os.path.basename(file_path).lower()
+
+        match = self._pattern.match(basename)
+        if match is not None:
+            return self._pattern_specs[match.lastindex - 1]
+
+        # Hidden files such as ".cwl" resolve by their whole name
+        dot = basename.rfind(".")
+        if dot < 0:
+            return self.default
+        return self._extensions.get(basename[dot:], self.default)
+
+
+REGISTRY = LanguageRegistry(
+    extensions={
+        ".ga": GALAXY,
+        ".galaxy": GALAXY,
+        ".gxwf": GALAXY,
+        ".cwl": CWL,
+        ".nf": NEXTFLOW,
+        ".nextflow": NEXTFLOW,
+        ".config": NEXTFLOW,
+        ".smk": SNAKEMAKE,
+        ".snake": SNAKEMAKE,
+        ".snakefile": SNAKEMAKE,
+        ".snakemake": SNAKEMAKE,
+        ".rules": SNAKEMAKE,
+        ".rule": SNAKEMAKE,
+        ".knwf": KNIME,
+        ".knar": KNIME,
+        ".wdl": WDL,
+    },
+    patterns=[
+        (r".*\.workflow\.knime\Z", KNIME),
+        (r".*\.ya?ml\Z", YAML),
+        # Snakefile, Snakefile.py, snake_1, ...
+        (r"snake", SNAKEMAKE),
+    ],
+    default=OTHER,
+)
@@ -0,0 +1,146 @@
+"""Module for classifying the lines of a file as code, comment or blank."""
+
+import codecs
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional, Sequence
+
+# Size of the binary chunks read from a file
+CHUNK_SIZE = 1 << 16
+
+
+def read_chunks(file: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Read a binary file in fixed-size chunks.
+
+    Args:
+        file: File opened in binary mode
+        chunk_size: Number of bytes per chunk
+
+    Yields:
+        Chunks of the file contents
+    """
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def classify_lines(
+    chunks: Iterable[bytes],
+    line_comment: str,
+    block_starts: Optional[Sequence[str]] = None,
+    block_ends: Optional[Sequence[str]] = None,
+) -> Dict[str, int]:
+    """
+    Count code, comment and blank lines in UTF-8 encoded content.
+
+    The content is processed chunk by chunk in a single pass over the raw
+    bytes. Lines are split on universal newlines (\\n, \\r\\n and \\r) and
+    classified exactly like decoded text would be: only lines that start with
+    a non-ASCII character are decoded to apply Unicode whitespace rules.
+
+    Args:
+        chunks: Iterable of byte chunks forming the content
+        line_comment: Marker starting a line comment
+        block_starts: Markers starting a block comment, if the language has any
+        block_ends: Markers ending the block comment opened by the marker at
+            the same position in block_starts
+
+    Returns:
+        Dictionary with counts for 'code', 'comment', 'blank' and 'total' lines
+
+    Raises:
+        UnicodeDecodeError: If the content is not valid UTF-8
+    """
+    comment_marker = line_comment.encode("utf-8")
+    starts = tuple(start.encode("utf-8") for start in block_starts or ())
+    ends = tuple(end.encode("utf-8") for end in block_ends or ())
+    # First bytes of the block markers, to skip the marker loop for most lines
+    start_bytes = frozenset(start[0] for start in starts)
+
+    code_lines = 0
+    comment_lines = 0
+    blank_lines = 0
+    current_block_end: Optional[bytes] = None
+
+    def classify(lines: Iterable[bytes]) -> None:
+        """
+        Classify complete lines and add them to the counts.
+
+        Args:
+            lines: Lines without their line breaks
+        """
+        nonlocal code_lines, comment_lines, blank_lines, current_block_end
+
+        for line in lines:
+            stripped = line.strip()
+
+            # bytes.strip() only removes ASCII whitespace; fall back to the
+            # Unicode rules for lines starting with other characters
+            if stripped and (stripped[0] >= 0x80 or 0x1C <= stripped[0] <= 0x1F):
+                stripped = stripped.decode("utf-8").strip().encode("utf-8")
+
+            # Handle blank lines
+            if not stripped:
+                blank_lines += 1
+                continue
+
+            # Handle block comments
+            if current_block_end is not None:
+                comment_lines += 1
+                if current_block_end in line:
+                    current_block_end = None
+                continue
+
+            # Check for start of block comments
+            if stripped[0] in start_bytes:
+                started_block = False
+                for block_start, block_end in zip(starts, ends):
+                    if stripped.startswith(block_start):
+                        comment_lines += 1
+                        if stripped.find(block_end, len(block_start)) < 0:
+                            current_block_end = block_end
+                        started_block = True
+                        break
+                if started_block:
+                    continue
+
+            # Handle line comments
+            if stripped.startswith(comment_marker):
+                comment_lines += 1
+            else:
+                code_lines += 1
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    remainder = b""
+    pending_cr = False
+
+    for chunk in chunks:
+        # Validate the encoding; pure ASCII needs no decoding unless a
+        # multi-byte sequence is pending from the previous chunk
+        if not chunk.isascii() or decoder.getstate()[0]:
+            decoder.decode(chunk)
+
+        # A \r at the end of the previous chunk already ended the line
+        if pending_cr and chunk.startswith(b"\n"):
+            chunk = chunk[1:]
+        pending_cr = chunk.endswith(b"\r")
+
+        # Translate \r\n and \r line endings
+        if b"\r" in chunk:
+            chunk = chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+        lines = (remainder + chunk if remainder else chunk).split(b"\n")
+        remainder = lines.pop()
+        classify(lines)
+
+    decoder.decode(b"", final=True)
+    if remainder:
+        classify((remainder,))
+
+    return {
+        "code": code_lines,
+        "comment": comment_lines,
+        "blank": blank_lines,
+        "total": code_lines + comment_lines + blank_lines,
+    }
@@ -0,0 +1,71 @@
+"""Module defining the structure metrics reported alongside line counts."""
+
+import os
+from typing import Iterable, List, Optional, Union
+
+from .galaxy import GalaxyScanner
+from .languages import CWL, GALAXY, NEXTFLOW, SNAKEMAKE, LanguageSpec
+from .structure import (
+    NEXTFLOW_KEYWORDS,
+    SNAKEMAKE_KEYWORDS,
+    KeywordScanner,
+    StepScanner,
+)
+
+# Descriptions of the metrics, in report order
+METRICS = {
+    "steps": "Galaxy and CWL workflow steps",
+    "tools": "Distinct tools run by the steps of Galaxy workflows",
+    "annotations": "Non-empty step and workflow annotations of Galaxy workflows",
+    "connections": "Connections between the steps of Galaxy workflows",
+    "rules": "Snakemake rules",
+    "checkpoints": "Snakemake checkpoints",
+    "includes": "Snakemake include directives",
+    "modules": "Snakemake modules",
+    "processes": "Nextflow processes",
+    "workflows": "Nextflow workflows",
+    "channels": "Nextflow channel factory calls",
+}
+
+# Scanner collecting metrics while a file's lines are classified; it passes
+# the chunks through with scan(chunks) and adds its metrics to the line
+# counts with apply(counts)
+Scanner = Union[GalaxyScanner, KeywordScanner, StepScanner]
+
+
+def create_scanner(file_path: str, spec: LanguageSpec) -> Optional[Scanner]:
+    """
+    Create the metrics scanner for a file.
+
+    Args:
+        file_path: Path to the file
+        spec: Language of the file
+
+    Returns:
+        Scanner, or None if no metrics are computed for the file
+    """
+    # Compared by value, since worker processes receive copies of the spec
+    if spec == SNAKEMAKE:
+        return KeywordScanner(SNAKEMAKE_KEYWORDS)
+    if spec == NEXTFLOW:
+        return KeywordScanner(NEXTFLOW_KEYWORDS)
+    if spec == CWL:
+        return StepScanner()
+    if spec == GALAXY and os.path.splitext(file_path)[1].lower() == ".ga":
+        # .galaxy and .gxwf files are YAML (gxformat2) rather than JSON
+        return GalaxyScanner()
+    return None
+
+
+def ordered_metrics(names: Iterable[str]) -> List[str]:
+    """
+    Sort metric names into report order.
+
+    Args:
+        names: Metric names
+
+    Returns:
+        The names in the order of METRICS, unknown names last
+    """
+    order = {name: i for i, name in enumerate(METRICS)}
+    return sorted(set(names), key=lambda name: (order.get(name, len(order)), name))
@@ -0,0 +1,546 @@
+"""Module defining the results of analyzing files and directories."""
+
+import os
+import sys
+from array import array
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from .languages import REGISTRY, WORKFLOW_LANGUAGES
+from .metrics import METRICS, ordered_metrics
+
+# Key of the metadata entry in the dictionary view of a scan result
+METADATA_KEY = "__metadata__"
+
+
+class FileResult(NamedTuple):
+    """Language and line counts of a single file."""
+
+    path: str
+    language: str
+    code: int
+    comment: int
+    blank: int
+    total: int
+    error: int = 0
+    # Path for display, relative to the base directory of the scan; empty if
+    # the result was not produced by a scan
+    rel_path: str = ""
+    # Structure metrics by name, or None if none are computed for the file
+    metrics: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_counts(
+        cls, path: str, language: str, counts: Dict[str, int], rel_path: str = ""
+    ) -> "FileResult":
+        """
+        Create a result from a line count dictionary.
+
+        Args:
+            path: Path to the file
+            language: Workflow language of the file
+            counts: Line count dictionary as returned by count_lines
+            rel_path: Path for display, relative to the base directory
+
+        Returns:
+            File result
+        """
+        metrics = {name: counts[name] for name in METRICS if name in counts}
+        return cls(
+            path,
+            language,
+            counts.get("code", 0),
+            counts.get("comment", 0),
+            counts.get("blank", 0),
+            counts.get("total", 0),
+            counts.get("error", 0),
+            rel_path,
+            metrics or None,
+        )
+
+    def display_path(self) -> str:
+        """
+        Get the path to display for the file.
+
+        Returns:
+            The relative path computed during the scan, or the path relative
+            to the current directory for results created elsewhere
+        """
+        return self.rel_path or os.path.relpath(self.path)
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Get the line counts in the format returned by count_lines.
+
+        Returns:
+            Dictionary with counts for 'code', 'comment', 'blank' and 'total'
+            lines and any structure metrics, or an 'error' flag if the file
+            could not be read
+        """
+        if self.error:
+            return {"code": 0, "comment": 0, "blank": 0, "error": 1}
+        counts = {
+            "code": self.code,
+            "comment": self.comment,
+            "blank": self.blank,
+            "total": self.total,
+        }
+        if self.metrics:
+            counts.update(self.metrics)
+        return counts
+
+
+# Order of the statistics in the per-language aggregates
+_STATS = ("files", "code", "comment", "blank", "total")
+
+
+class ScanResult(MutableMapping):
+    """
+    Column-oriented results of a directory scan.
+
+    Paths and display paths are stored in interned lists and counts in parallel
+    array('l') columns, so a file costs a few machine words instead of a
+    dictionary of boxed integers. Structure metrics get a column each once a
+    file reports them, with -1 for files without the metric. Totals and
+    per-language aggregates are kept as running sums while rows are added.
+
+    For backward compatibility the result is also a mapping in the format
+    scan_directory used to return: file paths map to line count
+    dictionaries, and the '__metadata__' key holds the workflow language
+    statistics. Formatters should use the columns instead.
+    """
+
+    def __init__(self, with_metadata: bool = True) -> None:
+        """
+        Create an empty result.
+
+        Args:
+            with_metadata: Whether the mapping view includes the
+                '__metadata__' entry with the language statistics
+        """
+        self.paths: List[str] = []
+        self.rel_paths: List[str] = []
+        self.code = array("l")
+        self.comment = array("l")
+        self.blank = array("l")
+        self.total = array("l")
+        self.language_ids = array("l")
+        self.errors = array("l")
+        self.metrics: Dict[str, array] = {}
+
+        # Workflow languages are always reported, even without files
+        self.languages: List[str] = list(WORKFLOW_LANGUAGES)
+        self._language_ids = {name: i for i, name in enumerate(self.languages)}
+        self._language_stats: List[List[int]] = [[0] * 5 for _ in self.languages]
+        # Number of files reporting each metric and the sum of their values
+        self._language_metrics: List[Dict[str, List[int]]] = [
+            {} for _ in self.languages
+        ]
+
+        self.with_metadata = with_metadata
+        self._index: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_dict(cls, results: Dict[str, Dict[str, Any]]) -> "ScanResult":
+        """
+        Create a result from the dictionary format of scan_directory.
+
+        Languages are resolved from the file paths.
+
+        Args:
+            results: Dictionary mapping file paths to line count
+                dictionaries, optionally with a '__metadata__' entry
+
+        Returns:
+            Scan result with the same files in the same order
+        """
+        scan_result = cls(with_metadata=METADATA_KEY in results)
+        for path, counts in results.items():
+            if path != METADATA_KEY:
+                scan_result[path] = counts
+        return scan_result
+
+    @classmethod
+    def coerce(
+        cls, results: Union[Dict[str, Dict[str, Any]], "ScanResult"]
+    ) -> "ScanResult":
+        """
+        Get a scan result for results in either format.
+
+        Args:
+            results: Scan result, or dictionary in the format of
+                scan_directory
+
+        Returns:
+            The scan result itself, or a scan result built from the dictionary
+        """
+        if isinstance(results, ScanResult):
+            return results
+        return cls.from_dict(results)
+
+    @property
+    def file_count(self) -> int:
+        """Number of files in the result."""
+        return len(self.paths)
+
+    @property
+    def metric_names(self) -> List[str]:
+        """Names of the structure metrics reported by any file, in report order."""
+        return ordered_metrics(
+            name
+            for metrics in self._language_metrics
+            for name, (files, _) in metrics.items()
+            if files > 0
+        )
+
+    def language_id(self, language: str) -> int:
+        """
+        Get the id of a language, registering it if it is new.
+
+        Args:
+            language: Language name
+
+        Returns:
+            Index of the language in the languages list
+        """
+        language_id = self._language_ids.get(language)
+        if language_id is None:
+            language_id = len(self.languages)
+            self.languages.append(language)
+            self._language_ids[language] = language_id
+            self._language_stats.append([0] * 5)
+            self._language_metrics.append({})
+        return language_id
+
+    def append(self, record: FileResult) -> None:
+        """
+        Add the result of a file.
+
+        Args:
+            record: Result of the file
+        """
+        language_id = self.language_id(record.language)
+        if self._index is not None:
+            self._index[record.path] = len(self.paths)
+
+        self.paths.append(sys.intern(record.path))
+        self.rel_paths.append(sys.intern(record.display_path()))
+        self.code.append(record.code)
+        self.comment.append(record.comment)
+        self.blank.append(record.blank)
+        self.total.append(record.total)
+        self.language_ids.append(language_id)
+        self.errors.append(record.error)
+        for column in self.metrics.values():
+            column.append(-1)
+        self._set_metrics(len(self.paths) - 1, record.metrics)
+        self._add_stats(language_id, len(self.paths) - 1, 1)
+
+    def extend(self, records: Iterable[FileResult]) -> None:
+        """
+        Add the results of several files.
+
+        Args:
+            records: Results of the files
+        """
+        for record in records:
+            self.append(record)
+
+    def put(self, record: FileResult) -> None:
+        """
+        Add the result of a file, or replace the result of the same path.
+
+        A replaced row keeps its position, and the aggregates are updated by
+        the difference between the old and the new counts.
+
+        Args:
+            record: Result of the file
+        """
+        if record.path not in self:
+            self.append(record)
+            return
+
+        row = self._row(record.path)
+        self._add_stats(self.language_ids[row], row, -1)
+        self.rel_paths[row] = sys.intern(record.display_path())
+        self.code[row] = record.code
+        self.comment[row] = record.comment
+        self.blank[row] = record.blank
+        self.total[row] = record.total
+        self.language_ids[row] = self.language_id(record.language)
+        self.errors[row] = record.error
+        self._set_metrics(row, record.metrics)
+        self._add_stats(self.language_ids[row], row, 1)
+
+    def _set_metrics(self, row: int, metrics: Optional[Dict[str, int]]) -> None:
+        """
+        Set the structure metrics of a row, adding columns for new metrics.
+
+        Args:
+            row: Index of the row
+            metrics: Metrics of the file, or None if it has none
+        """
+        metrics = metrics or {}
+        for name in metrics:
+            if name not in self.metrics:
+                self.metrics[name] = array("l", [-1]) * len(self.paths)
+        for name, column in self.metrics.items():
+            column[row] = metrics.get(name, -1)
+
+    def remove(self, paths: Iterable[str]) -> List[str]:
+        """
+        Remove the results of several files in one pass over the columns.
+
+        Args:
+            paths: Paths of the files; paths not in the result are skipped
+
+        Returns:
+            Display paths of the removed files, in row order
+        """
+        rows = sorted({self._row(path) for path in paths if path in self})
+        if not rows:
+            return []
+
+        removed = [self.rel_paths[row] for row in rows]
+        for row in rows:
+            self._add_stats(self.language_ids[row], row, -1)
+
+        dropped = set(rows)
+        keep = [row for row in range(len(self.paths)) if row not in dropped]
+        for column in self._columns():
+            kept = [column[row] for row in keep]
+            column[:] = (
+                array(column.typecode, kept) if isinstance(column, array) else kept
+            )
+        self._index = None
+        return removed
+
+    def _columns(self) -> List[Any]:
+        """
+        Get all per-row columns.
+
+        Returns:
+            List of the path, count, language, error and metric columns
+        """
+        return [
+            self.paths,
+            self.rel_paths,
+            self.code,
+            self.comment,
+            self.blank,
+            self.total,
+            self.language_ids,
+            self.errors,
+            *self.metrics.values(),
+        ]
+
+    def _add_stats(self, language_id: int, row: int, sign: int) -> None:
+        """
+        Add or subtract a row to the aggregates of its language.
+
+        Args:
+            language_id: Language of the row
+            row: Index of the row
+            sign: 1 to add the row, -1 to subtract it
+        """
+        stats = self._language_stats[language_id]
+        stats[0] += sign
+        stats[1] += sign * self.code[row]
+        stats[2] += sign * self.comment[row]
+        stats[3] += sign * self.blank[row]
+        stats[4] += sign * self.total[row]
+        metrics = self._language_metrics[language_id]
+        for name, column in self.metrics.items():
+            value = column[row]
+            if value >= 0:
+                entry = metrics.setdefault(name, [0, 0])
+                entry[0] += sign
+                entry[1] += sign * value
+
+    def record(self, row: int) -> FileResult:
+        """
+        Get the result of a file by row.
+
+        Args:
+            row: Index of the row
+
+        Returns:
+            Result of the file
+        """
+        return FileResult(
+            self.paths[row],
+            self.languages[self.language_ids[row]],
+            self.code[row],
+            self.comment[row],
+            self.blank[row],
+            self.total[row],
+            self.errors[row],
+            self.rel_paths[row],
+            {
+                name: column[row]
+                for name, column in self.metrics.items()
+                if column[row] >= 0
+            }
+            or None,
+        )
+
+    def records(self) -> Iterator[FileResult]:
+        """
+        Iterate over the results of all files in insertion order.
+
+        Yields:
+            Result of each file
+        """
+        for row in range(len(self.paths)):
+            yield self.record(row)
+
+    def sorted_rows(self) -> List[int]:
+        """
+        Get the row indices ordered by path.
+
+        Returns:
+            Row indices
+        """
+        return sorted(range(len(self.paths)), key=self.paths.__getitem__)
+
+    def totals(self) -> Dict[str, int]:
+        """
+        Get the summed counts of all files.
+
+        Returns:
+            Dictionary with the number of files, their 'code', 'comment',
+            'blank' and 'total' lines, and the sums of their structure metrics
+        """
+        sums = [sum(column) for column in zip(*self._language_stats)]
+        totals = dict(zip(_STATS, sums))
+        for name in self.metric_names:
+            totals[name] = sum(
+                metrics[name][1]
+                for metrics in self._language_metrics
+                if name in metrics
+            )
+        return totals
+
+    def language_stats(self, only_present: bool = False) -> Dict[str, Dict[str, int]]:
+        """
+        Get the aggregated counts per language.
+
+        Args:
+            only_present: If True, leave out languages without files
+
+        Returns:
+            Mapping of language names to dictionaries with the number of
+            files, their 'code', 'comment', 'blank' and 'total' lines, and the
+            sums of the structure metrics their files report
+        """
+        language_stats = {}
+        for language, stats, metrics in zip(
+            self.languages, self._language_stats, self._language_metrics
+        ):
+            if stats[0] > 0 or not only_present:
+                language_stats[language] = dict(zip(_STATS, stats))
+                for name in ordered_metrics(metrics):
+                    files, total = metrics[name]
+                    if files > 0:
+                        language_stats[language][name] = total
+        return language_stats
+
+    # Mapping view in the format of scan_directory
+
+    def _row(self, path: str) -> int:
+        """
+        Get the row of a path.
+
+        Args:
+            path: Path to the file
+
+        Returns:
+            Index of the row
+
+        Raises:
+            KeyError: If the path is not in the result
+        """
+        if self._index is None:
+            self._index = {path: row for row, path in enumerate(self.paths)}
+        return self._index[path]
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        """
+        Get the line counts of a file, or the metadata entry.
+
+        Args:
+            key: File path or METADATA_KEY
+
+        Returns:
+            Line count dictionary of the file, or the language statistics
+
+        Raises:
+            KeyError: If the file is not in the result
+        """
+        if key == METADATA_KEY and self.with_metadata:
+            return {"workflow_languages": self.language_stats()}
+        return self.record(self._row(key)).counts()
+
+    def __setitem__(self, key: str, counts: Dict[str, int]) -> None:
+        """
+        Add or replace the line counts of a file.
+
+        Args:
+            key: File path
+            counts: Line count dictionary of the file
+
+        Raises:
+            KeyError: If the key is METADATA_KEY
+        """
+        if key == METADATA_KEY:
+            raise KeyError(f"{METADATA_KEY} is computed from the rows")
+
+        record = FileResult.from_counts(key, REGISTRY.resolve(key).name, counts)
+        if key in self:
+            # Keep the display path of the row
+            record = record._replace(rel_path=self.rel_paths[self._row(key)])
+        self.put(record)
+
+    def __delitem__(self, key: str) -> None:
+        """
+        Remove a file, or stop reporting the metadata entry.
+
+        Args:
+            key: File path or METADATA_KEY
+
+        Raises:
+            KeyError: If the file is not in the result
+        """
+        if key == METADATA_KEY and self.with_metadata:
+            self.with_metadata = False
+            return
+
+        row = self._row(key)
+        self._add_stats(self.language_ids[row], row, -1)
+        for column in self._columns():
+            del column[row]
+        self._index = None
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the metadata key, if reported, and the file paths."""
+        if self.with_metadata:
+            yield METADATA_KEY
+        yield from self.paths
+
+    def __len__(self) -> int:
+        """Return the number of files, plus one for the metadata entry."""
+        return len(self.paths) + (1 if self.with_metadata else 0)
+
+    def __contains__(self, key: object) -> bool:
+        """Check whether a file, or the metadata entry, is in the result."""
+        if key == METADATA_KEY:
+            return self.with_metadata
+        try:
+            self._row(key)
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __repr__(self) -> str:
+        """Describe the result by its number of files."""
+        return f"ScanResult({self.file_count} files)"
@@ -0,0 +1,283 @@
+"""Module for extracting structure metrics from Snakemake, Nextflow and CWL files."""
+
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Pattern, Sequence
+
+# Snakemake definitions at the start of a line, outside of strings and
+# comments: 'rule name:' (or an anonymous 'rule:'), 'checkpoint name:',
+# 'include:' and 'module name:'
+SNAKEMAKE_KEYWORDS = re.compile(
+    rb"(?P<open>\"\"\"|''')"
+    rb'|"(?:[^"\\\n]|\\.)*"'
+    rb"|'(?:[^'\\\n]|\\.)*'"
+    rb"|#[^\n]*"
+    rb"|^[ \t]*(?:"
+    rb"(?P<rules>rule(?:[ \t]+\w+)?)"
+    rb"|(?P<checkpoints>checkpoint[ \t]+\w+)"
+    rb"|(?P<includes>include)"
+    rb"|(?P<modules>module[ \t]+\w+)"
+    rb")[ \t]*:",
+    re.MULTILINE,
+)
+
+# Nextflow definitions outside of strings and comments: 'process name {' and
+# 'workflow {' (or 'workflow name {') at the start of a line, and channel
+# factory calls such as 'Channel.fromPath(...)' or 'channel.of(...)', whose
+# method may follow on the next line
+NEXTFLOW_KEYWORDS = re.compile(
+    rb"(?P<open>\"\"\"|'''|/\*)"
+    rb'|"(?:[^"\\\n]|\\.)*"'
+    rb"|'(?:[^'\\\n]|\\.)*'"
+    rb"|//[^\n]*"
+    rb"|^[ \t]*(?:"
+    rb"(?P<processes>process[ \t]+\w+)"
+    rb"|(?P<workflows>workflow(?:[ \t]+\w+)?)"
+    rb")[ \t]*(?:\{|\r?$)"
+    rb"|(?P<channels>\b[Cc]hannel\s*\.\s*[A-Za-z_]\w*)"
+    rb"|(?P<partial>\b[Cc]hannel\s*(?:\.\s*)?\Z)",
+    re.MULTILINE,
+)
+
+# End of the multi-line string or comment opened by each opener
+_CLOSERS = {b'"""': b'"""', b"'''": b"'''", b"/*": b"*/"}
+
+# Key of an unindented YAML mapping entry, optionally as a sequence item, with
+# its value
+_YAML_ENTRY = re.compile(
+    rb"(-[ \t]+)?"
+    rb"(?:([^\s#'\"{\[][^:#]*?|\"[^\"]*\"|'[^']*')[ \t]*:(?:[ \t]+|$))?"
+    rb"(.*?)[ \t]*(?:#.*)?\r?$"
+)
+
+# Value introducing a literal or folded block scalar
+_BLOCK_SCALAR = re.compile(rb"[|>][-+0-9]*")
+
+
+class _LineScanner:
+    """
+    Base class of scanners that process the content line by line.
+
+    The chunks are passed through to the line classifier, and the scanner
+    sees the complete lines received so far, so the file is read once.
+    Subclasses implement _feed.
+    """
+
+    def __init__(self, metrics: Sequence[str]) -> None:
+        """
+        Create a scanner at the start of a document.
+
+        Args:
+            metrics: Names of the metrics the scanner counts
+        """
+        self.metrics: Dict[str, int] = dict.fromkeys(metrics, 0)
+        self._partial_line = b""
+
+    def scan(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Scan chunks while passing them on.
+
+        Args:
+            chunks: Chunks of the file contents
+
+        Yields:
+            The chunks, unchanged
+        """
+        for chunk in chunks:
+            lines = self._partial_line + chunk if self._partial_line else chunk
+            end = lines.rfind(b"\n") + 1
+            if end:
+                self._feed(lines[:end])
+            self._partial_line = lines[end:]
+            yield chunk
+        if self._partial_line:
+            self._feed(self._partial_line + b"\n")
+
+    def _feed(self, lines: bytes) -> None:
+        """
+        Process complete lines.
+
+        Args:
+            lines: Lines including their line breaks
+        """
+        raise NotImplementedError
+
+    def apply(self, counts: Dict[str, int]) -> Dict[str, int]:
+        """
+        Add the metrics to the line counts of the scanned file.
+
+        Args:
+            counts: Line counts of the file
+
+        Returns:
+            The line counts with the metrics added
+        """
+        return dict(counts, **self.metrics)
+
+
+class KeywordScanner(_LineScanner):
+    """
+    Scanner counting definitions matched by a keyword pattern.
+
+    The pattern matches strings and comments as well, so definitions inside
+    them are skipped. Its named groups are the metrics to count, except for
+    two: 'open' starts a multi-line string or block comment, which may
+    continue in later lines, and 'partial' matches the start of a definition
+    at the end of the lines received so far, which is completed by the next
+    lines.
+    """
+
+    def __init__(self, pattern: Pattern[bytes]) -> None:
+        """
+        Create a scanner.
+
+        Args:
+            pattern: Keyword pattern, e.g. SNAKEMAKE_KEYWORDS
+        """
+        super().__init__(
+            [name for name in pattern.groupindex if name not in ("open", "partial")]
+        )
+        self._pattern = pattern
+        # End of the multi-line string or comment being skipped, if any
+        self._closer: Optional[bytes] = None
+        # Incomplete definition at the end of the previous lines
+        self._partial = b""
+
+    def _feed(self, lines: bytes) -> None:
+        """
+        Count the definitions in complete lines.
+
+        Args:
+            lines: Lines including their line breaks
+        """
+        if self._partial:
+            lines = self._partial + lines
+            self._partial = b""
+        pos = 0
+        if self._closer is not None:
+            end = lines.find(self._closer)
+            if end == -1:
+                return
+            pos = end + len(self._closer)
+            self._closer = None
+
+        metrics = self.metrics
+        search = self._pattern.search
+        while True:
+            match = search(lines, pos)
+            if match is None:
+                return
+            pos = match.end()
+            name = match.lastgroup
+            if name == "partial":
+                self._partial = lines[match.start() :]
+                return
+            if name == "open":
+                closer = _CLOSERS[match.group()]
+                end = lines.find(closer, pos)
+                if end == -1:
+                    self._closer = closer
+                    return
+                pos = end + len(closer)
+            elif name is not None:
+                metrics[name] += 1
+
+
+class _StepsBlock:
+    """'steps' entry of a YAML document whose items are being counted."""
+
+    __slots__ = ("indent", "item_indent")
+
+    def __init__(self, indent: int) -> None:
+        """
+        Create the block.
+
+        Args:
+            indent: Indentation of the 'steps' key
+        """
+        self.indent = indent
+        # Indentation of the steps, known once the first one is seen
+        self.item_indent: Optional[int] = None
+
+
+class StepScanner(_LineScanner):
+    """
+    Scanner counting the steps of CWL workflows written in YAML.
+
+    Steps are the keys or sequence items of block-style 'steps' entries,
+    including those of workflows embedded in steps or packed in a '$graph'.
+    Comments and block scalars, e.g. multi-line 'doc' strings, are skipped.
+    """
+
+    def __init__(self) -> None:
+        """Create a scanner at the start of a document."""
+        super().__init__(["steps"])
+        self._blocks: List[_StepsBlock] = []
+        # Indentation of the key owning the block scalar being skipped
+        self._scalar_indent: Optional[int] = None
+
+    def _feed(self, lines: bytes) -> None:
+        """
+        Count the steps in complete lines.
+
+        Args:
+            lines: Lines including their line breaks
+        """
+        blocks = self._blocks
+        for line in lines.splitlines():
+            stripped = line.lstrip(b" \t")
+            if not stripped or stripped.startswith(b"#"):
+                continue
+            indent = len(line) - len(stripped)
+            if self._scalar_indent is not None:
+                if indent > self._scalar_indent:
+                    continue
+                self._scalar_indent = None
+            # Lines outside of steps entries, or inside a step, only matter if
+            # they start a steps entry or a block scalar
+            item_indent = blocks[-1].item_indent if blocks else -1
+            if (
+                item_indent is not None
+                and indent > item_indent
+                and b"steps" not in stripped
+                and b"|" not in stripped
+                and b">" not in stripped
+            ):
+                continue
+
+            item, key, value = _YAML_ENTRY.match(stripped).groups()
+            self._add_line(indent, item is not None, key is not None)
+
+            if key is None:
+                continue
+            key_indent = indent + len(item or b"")
+            if not value and key.strip(b"\"'") == b"steps":
+                self._blocks.append(_StepsBlock(key_indent))
+            elif _BLOCK_SCALAR.fullmatch(value):
+                self._scalar_indent = key_indent
+
+    def _add_line(self, indent: int, is_item: bool, is_key: bool) -> None:
+        """
+        Close the steps entries a line ends, and count it if it is a step.
+
+        Args:
+            indent: Indentation of the line
+            is_item: Whether the line starts a sequence item
+            is_key: Whether the line starts a mapping entry
+        """
+        blocks = self._blocks
+        while blocks:
+            block = blocks[-1]
+            if block.item_indent is None:
+                # A sequence of steps may be indented like its key
+                if indent > block.indent or (indent == block.indent and is_item):
+                    block.item_indent = indent
+                    break
+            elif indent > block.item_indent or (
+                indent == block.item_indent
+                and (is_item or block.item_indent > block.indent)
+            ):
+                break
+            blocks.pop()
+
+        if blocks and indent == blocks[-1].item_indent and (is_item or is_key):
+            self.metrics["steps"] += 1
@@ -0,0 +1,236 @@
+"""Module for keeping scan results up to date while files change."""
+
+import os
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set
+
+from ..utils.fs_events import Change, Watcher, create_watcher
+from ..utils.ignore_patterns import IGNORE_FILE, IgnorePatterns
+from ..utils.walker import walk_files
+from .analyzer import _count, _relative_prefix, iter_scan
+from .languages import REGISTRY
+from .results import FileResult, ScanResult
+
+
+class WatchUpdate(NamedTuple):
+    """Results after a scan or after a batch of changes."""
+
+    # "scan" for the initial scan, "rescan" after ignore files changed or
+    # events were lost, "update" for incremental changes
+    event: str
+    # Display paths of the files counted again or added; empty for full scans
+    updated: List[str]
+    # Display paths of the files removed from the results
+    removed: List[str]
+    results: ScanResult
+
+
+class WatchSession:
+    """
+    Scan results of a directory kept up to date from change events.
+
+    After one full scan, only created, modified or deleted workflow files
+    are counted again. Rows are replaced in place and the per-language
+    aggregates are updated by the difference, so an update costs the
+    changed files rather than the whole tree.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        workers: Optional[int] = None,
+        relative_to: Optional[str] = None,
+        polling: bool = False,
+        interval: float = 1.0,
+    ) -> None:
+        """
+        Create a session; call start to scan and begin watching.
+
+        Args:
+            directory: Directory to watch
+            workers: Number of worker processes for full scans
+            relative_to: Base directory of the results' relative paths
+                (default: the current directory)
+            polling: If True, detect changes by polling instead of inotify
+            interval: Seconds between polls of the polling watcher
+        """
+        self.directory = directory
+        self.workers = workers
+        self.relative_to = relative_to
+        self.polling = polling
+        self.interval = interval
+        self.results = ScanResult()
+        self.ignore_patterns = IgnorePatterns(directory=self.directory)
+        self._prefix = _relative_prefix(directory, relative_to)
+        self._watcher: Optional[Watcher] = None
+
+    @property
+    def watcher(self) -> Optional[Watcher]:
+        """Watcher of the directory, or None before start."""
+        return self._watcher
+
+    def start(self) -> WatchUpdate:
+        """
+        Start watching the directory and scan it.
+
+        The watcher is started before the scan, so changes made during the
+        scan are not missed.
+
+        Returns:
+            Update with the results of the full scan
+        """
+        return self._scan("scan")
+
+    def _scan(self, event: str) -> WatchUpdate:
+        """
+        Restart the watcher and scan the whole directory.
+
+        Args:
+            event: Event name of the update
+
+        Returns:
+            Update with the results of the full scan
+        """
+        if self._watcher is not None:
+            self._watcher.close()
+        self.ignore_patterns = IgnorePatterns(directory=self.directory)
+        self._watcher = create_watcher(
+            self.directory, self.ignore_patterns, self.polling, self.interval
+        )
+
+        self.results = ScanResult()
+        self.results.extend(
+            iter_scan(self.directory, self.workers, relative_to=self.relative_to)
+        )
+        return WatchUpdate(event, [], [], self.results)
+
+    def _analyze(self, rel_path: str) -> Optional[FileResult]:
+        """
+        Count the lines of a changed file.
+
+        Args:
+            rel_path: Path of the file relative to the watched directory
+
+        Returns:
+            Result of the file, or None if it no longer exists, is ignored or
+            is not a workflow file
+        """
+        spec = REGISTRY.resolve(rel_path)
+        if not spec.is_workflow or self.ignore_patterns.is_ignored(rel_path, False):
+            return None
+        file_path = os.path.join(self.directory, rel_path)
+        if not os.path.isfile(file_path):
+            return None
+        return FileResult.from_counts(
+            file_path, spec.name, _count(file_path, spec), self._prefix + rel_path
+        )
+
+    def apply(self, changes: Iterable[Change]) -> WatchUpdate:
+        """
+        Update the results for a batch of changes.
+
+        Args:
+            changes: Changed paths, e.g. from the watcher
+
+        Returns:
+            Update with the files counted again and removed
+        """
+        changes = list(changes)
+        if any(
+            not change.rel_path or os.path.basename(change.rel_path) == IGNORE_FILE
+            for change in changes
+        ):
+            # Changed ignore rules may affect any file
+            return self._scan("rescan")
+
+        # Files to count again, and paths whose rows may have to be removed
+        files: Dict[str, None] = {}
+        gone: Set[str] = set()
+        for change in changes:
+            if not change.is_dir:
+                files[change.rel_path] = None
+                continue
+
+            dir_path = os.path.join(self.directory, change.rel_path)
+            prefix = dir_path + os.sep
+            gone.update(path for path in self.results.paths if path.startswith(prefix))
+            if os.path.isdir(dir_path) and not os.path.islink(dir_path):
+                for _, rel_path in walk_files(dir_path):
+                    files[os.path.join(change.rel_path, rel_path)] = None
+
+        updated = []
+        for rel_path in files:
+            record = self._analyze(rel_path)
+            if record is None:
+                gone.add(os.path.join(self.directory, rel_path))
+                continue
+            gone.discard(record.path)
+            self.results.put(record)
+            updated.append(record.rel_path)
+
+        removed = self.results.remove(gone)
+        return WatchUpdate("update", updated, removed, self.results)
+
+    def poll(self, timeout: Optional[float] = None) -> Optional[WatchUpdate]:
+        """
+        Wait for changes and update the results.
+
+        Args:
+            timeout: Maximum number of seconds to wait, or None to wait until
+                a change is detected
+
+        Returns:
+            Update for the detected changes, or None if the timeout expired
+            without changes to workflow files
+        """
+        if self._watcher is None:
+            raise RuntimeError("The session has not been started")
+        changes = self._watcher.read(timeout)
+        if not changes:
+            return None
+        update = self.apply(changes)
+        if update.event == "update" and not update.updated and not update.removed:
+            return None
+        return update
+
+    def close(self) -> None:
+        """Stop watching the directory."""
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+
+    def __enter__(self) -> "WatchSession":
+        """Return the session for use as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Stop watching the directory."""
+        self.close()
+
+
+def watch(
+    directory: str,
+    workers: Optional[int] = None,
+    relative_to: Optional[str] = None,
+    polling: bool = False,
+    interval: float = 1.0,
+) -> Iterator[WatchUpdate]:
+    """
+    Scan a directory and yield updated results whenever workflow files change.
+
+    Args:
+        directory: Directory to watch
+        workers: Number of worker processes for full scans
+        relative_to: Base directory of the results' relative paths (default:
+            the current directory)
+        polling: If True, detect changes by polling instead of inotify
+        interval: Seconds between polls of the polling watcher
+
+    Yields:
+        The initial scan, then an update for every batch of changes
+    """
+    with WatchSession(directory, workers, relative_to, polling, interval) as session:
+        yield session.start()
+        while True:
+            update = session.poll()
+            if update is not None:
+                yield update
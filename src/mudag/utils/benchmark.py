@@ -0,0 +1,470 @@
+"""Module for benchmarking Mudag on synthetic workflow repositories."""
+
+import io
+import os
+import platform
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from ..core.analyzer import count_lines, scan_directory
+from ..core.languages import WORKFLOW_LANGUAGES
+from .formatter import (
+    format_csv,
+    format_json,
+    format_jsonl,
+    format_npz,
+    format_table,
+)
+from .ignore_patterns import IgnorePatterns
+from .walker import walk_files
+
+
+class CorpusSpec(NamedTuple):
+    """Parameters of a synthetic workflow repository."""
+
+    files: int = 2000
+    lines: int = 100
+    languages: Tuple[str, ...] = (
+        "Snakemake",
+        "CWL",
+        "Nextflow",
+        "Galaxy",
+        "KNIME",
+        "WDL",
+    )
+    comment_ratio: float = 0.2
+    blank_ratio: float = 0.1
+    other_ratio: float = 0.1
+    ignore_patterns: int = 50
+    seed: int = 0
+
+
+class _Template(NamedTuple):
+    """Building blocks of the files of one language."""
+
+    file_name: str
+    code: Tuple[str, ...]
+    comment: str
+    block: Optional[Tuple[str, str, str]]
+
+
+# Templates of the generated files; "{i}" is replaced by a counter
+_TEMPLATES = {
+    "Snakemake": _Template(
+        "rules_{i}.smk",
+        (
+            "rule step_{i}:",
+            '    input: "data/{i}.txt"',
+            '    output: "results/{i}.txt"',
+            '    shell: "sort {{input}} > {{output}}"',
+        ),
+        "# Sort the samples of batch {i}",
+        ('"""', "Helper rules for batch {i}.", '"""'),
+    ),
+    "CWL": _Template(
+        "tool_{i}.cwl",
+        (
+            "cwlVersion: v1.2",
+            "class: CommandLineTool",
+            "baseCommand: [sort, -k{i}]",
+            "inputs:",
+            "  samples: File",
+        ),
+        "# Sort column {i} of the samples",
+        None,
+    ),
+    "Nextflow": _Template(
+        "main_{i}.nf",
+        (
+            "process STEP_{i} {",
+            "    input:",
+            "    path samples",
+            "    script:",
+            '    "sort -k{i} $samples"',
+            "}",
+        ),
+        "// Sort column {i} of the samples",
+        ("/*", " * Pipeline step {i}", " */"),
+    ),
+    # Members of the steps of a workflow export; see _generate_galaxy
+    "Galaxy": _Template(
+        "workflow_{i}.ga",
+        (
+            '"tool_id": "sort1"',
+            '"tool_version": "1.{i}.0"',
+            '"type": "tool"',
+        ),
+        '"annotation": "Sort column {i} of the samples"',
+        None,
+    ),
+    "KNIME": _Template(
+        "node_{i}.workflow.knime",
+        (
+            '<config key="node_{i}">',
+            '    <entry key="factory" type="xstring" value="Sorter"/>',
+            '    <entry key="column" type="xint" value="{i}"/>',
+            "</config>",
+        ),
+        "<!-- Sorter node {i} -->",
+        ("<!--", "    Settings of node {i}", "-->"),
+    ),
+    "WDL": _Template(
+        "task_{i}.wdl",
+        (
+            "task sort_{i} {",
+            "  command {",
+            "    sort -k{i} samples.txt",
+            "  }",
+            "}",
+        ),
+        "# Sort column {i} of the samples",
+        None,
+    ),
+}
+
+# Files that are not workflow files
+_OTHER_FILES = ("script_{i}.py", "notes_{i}.txt", "data_{i}.csv")
+
+# Directory excluded by the generated ignore file
+_IGNORED_DIR = "work"
+
+
+def _generate_file(
+    rng: random.Random, template: _Template, spec: CorpusSpec, counter: int
+) -> str:
+    """
+    Generate the contents of a workflow file.
+
+    Args:
+        rng: Random number generator
+        template: Template of the file's language
+        spec: Corpus parameters
+        counter: Number substituted into the template
+
+    Returns:
+        File contents
+    """
+    lines: List[str] = []
+    code_line = 0
+    target = rng.randint(max(1, spec.lines // 2), max(1, spec.lines * 3 // 2))
+    while len(lines) < target:
+        roll = rng.random()
+        if roll < spec.blank_ratio:
+            lines.append("")
+        elif roll < spec.blank_ratio + spec.comment_ratio:
+            if template.block is not None and rng.random() < 0.3:
+                start, body, end = template.block
+                lines.extend([start, body, body, end])
+            else:
+                lines.append(template.comment)
+        else:
+            # Code lines follow the template in order
+            lines.append(template.code[code_line % len(template.code)])
+            code_line += 1
+    return "\n".join(lines[:target]).replace("{i}", str(counter)) + "\n"
+
+
+def _generate_galaxy(
+    rng: random.Random, template: _Template, spec: CorpusSpec, counter: int
+) -> str:
+    """
+    Generate the contents of a Galaxy workflow export.
+
+    The export is valid workflow JSON, so its only comment lines are step
+    annotations on lines of their own, and the share of comment lines only
+    approximates the requested ratio.
+
+    Args:
+        rng: Random number generator
+        template: Template whose code lines and comment are step members
+        spec: Corpus parameters
+        counter: Number substituted into the template
+
+    Returns:
+        File contents
+    """
+    lines = ["{", '    "a_galaxy_workflow": "true",', '    "steps": {']
+    target = rng.randint(max(1, spec.lines // 2), max(1, spec.lines * 3 // 2))
+    # Lines of a step without blank lines
+    step_lines = len(template.code) + 5
+    step = 0
+    while step == 0 or len(lines) + 2 < target:
+        if step > 0:
+            lines[-1] += ","
+        if rng.random() < spec.comment_ratio * step_lines:
+            annotation = template.comment
+        else:
+            annotation = '"annotation": ""'
+        connections = f'{{"input": {{"id": {step - 1}, "output_name": "output"}}}}'
+        members = [
+            annotation,
+            f'"id": {step}',
+            f'"input_connections": {connections if step > 0 else "{}"}',
+            *template.code,
+        ]
+        lines.append(f'        "{step}": {{')
+        for k, member in enumerate(members):
+            if rng.random() < spec.blank_ratio:
+                lines.append("")
+            comma = "," if k < len(members) - 1 else ""
+            lines.append(f"            {member}{comma}")
+        lines.append("        }")
+        step += 1
+    lines.extend(["    }", "}"])
+    return "\n".join(lines).replace("{i}", str(counter)) + "\n"
+
+
+def generate_corpus(root: str, spec: CorpusSpec) -> Dict[str, int]:
+    """
+    Generate a reproducible synthetic repository.
+
+    Workflow files are spread over a two-level directory tree and mixed with
+    other files. A .mudagignore file with the requested number of patterns
+    excludes a work directory holding a copy of some files; the other
+    patterns match nothing, so they only cost matching time.
+
+    Args:
+        root: Existing directory to generate the repository in
+        spec: Corpus parameters
+
+    Returns:
+        Dictionary with the number of 'files', 'workflow_files' and 'ignored'
+        files, and the 'bytes' of the workflow files outside ignored paths
+    """
+    rng = random.Random(spec.seed)
+    top_dirs = max(1, spec.files // 200)
+    stats = {"files": 0, "workflow_files": 0, "ignored": 0, "bytes": 0}
+
+    def write(rel_path: str, content: str) -> None:
+        """
+        Write a file of the repository.
+
+        Args:
+            rel_path: Path relative to the repository root
+            content: File contents
+        """
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(content)
+        stats["files"] += 1
+
+    for i in range(spec.files):
+        directory = f"pkg{i % top_dirs}/mod{(i // top_dirs) % 8}"
+        if rng.random() < spec.other_ratio:
+            name = rng.choice(_OTHER_FILES).format(i=i)
+            write(f"{directory}/{name}", f"value_{i} = {i}\n" * 10)
+            continue
+
+        language = spec.languages[i % len(spec.languages)]
+        template = _TEMPLATES[language]
+        generate = _generate_galaxy if language == "Galaxy" else _generate_file
+        content = generate(rng, template, spec, i)
+        write(f"{directory}/{template.file_name.format(i=i)}", content)
+        stats["workflow_files"] += 1
+        stats["bytes"] += len(content.encode("utf-8"))
+
+        # Every tenth file also has a copy in the ignored directory
+        if spec.ignore_patterns > 0 and i % 10 == 0:
+            write(
+                f"{_IGNORED_DIR}/{directory}/{template.file_name.format(i=i)}", content
+            )
+            stats["ignored"] += 1
+
+    if spec.ignore_patterns > 0:
+        patterns = [f"{_IGNORED_DIR}/"]
+        for k in range(1, spec.ignore_patterns):
+            patterns.append(rng.choice(["*.tmp{k}", "build{k}/", "docs/**/draft{k}.*"]))
+            patterns[-1] = patterns[-1].format(k=k)
+        write(".mudagignore", "\n".join(patterns) + "\n")
+
+    return stats
+
+
+class _NullOutput:
+    """Output that discards what is written, for timing formatters."""
+
+    def write(self, data: Any) -> int:
+        """
+        Discard data.
+
+        Args:
+            data: Text or bytes written by a formatter
+
+        Returns:
+            Length of the data
+        """
+        return len(data)
+
+    def flush(self) -> None:
+        """Do nothing, since nothing is buffered."""
+
+
+def _best_time(function: Callable[[], Any], repeat: int) -> float:
+    """
+    Time a function and keep the fastest run.
+
+    Args:
+        function: Function to time
+        repeat: Number of runs
+
+    Returns:
+        Fastest run time in seconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _throughput(seconds: float, items: int, size: Optional[int]) -> Dict[str, Any]:
+    """
+    Describe a timing as throughput.
+
+    Args:
+        seconds: Run time in seconds
+        items: Number of files or paths processed
+        size: Number of bytes processed, or None if not applicable
+
+    Returns:
+        Dictionary with 'seconds', 'files_per_second' and 'mb_per_second'
+    """
+    seconds = max(seconds, 1e-9)
+    return {
+        "seconds": round(seconds, 6),
+        "files_per_second": round(items / seconds, 1),
+        "mb_per_second": round(size / seconds / 1e6, 3) if size is not None else None,
+    }
+
+
+def run_benchmarks(
+    root: str, repeat: int = 3, workers: Optional[int] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Time the analysis steps on a directory.
+
+    Each step is run several times and the fastest run is reported, so
+    results from different versions can be compared. The directory's own
+    .mudagignore stands in for the current directory's, so the directory
+    the benchmark is started from does not change what is scanned.
+
+    Args:
+        root: Directory to analyze, e.g. from generate_corpus
+        repeat: Number of runs per step
+        workers: Number of worker processes for scan_directory
+
+    Returns:
+        Mapping of step names to throughput dictionaries
+    """
+    results = scan_directory(root, workers=workers, working_dir=root)
+    files = results.file_count
+    size = sum(os.path.getsize(path) for path in results.paths)
+
+    rel_paths = [rel_path for _, rel_path in walk_files(root)]
+
+    def scan() -> None:
+        """Scan the directory."""
+        scan_directory(root, workers=workers, working_dir=root)
+
+    def check_ignored() -> None:
+        """Match every path of the directory against its ignore patterns."""
+        # Fresh patterns, so cached directory verdicts are not reused
+        patterns = IgnorePatterns(root)
+        patterns.load_directory(root, "")
+        for rel_path in rel_paths:
+            patterns.is_ignored(rel_path, False)
+
+    def count_all() -> None:
+        """Count the lines of every workflow file of the directory."""
+        for path in results.paths:
+            count_lines(path)
+
+    steps: Sequence[Tuple[str, Callable[[], Any], int, Optional[int]]] = [
+        ("scan_directory", scan, files, size),
+        ("count_lines", count_all, files, size),
+        ("is_ignored", check_ignored, len(rel_paths), None),
+        ("format_table", lambda: format_table(results, _NullOutput()), files, None),
+        ("format_json", lambda: format_json(results, _NullOutput()), files, None),
+        (
+            "format_json_compact",
+            lambda: format_json(results, _NullOutput(), compact=True),
+            files,
+            None,
+        ),
+        ("format_csv", lambda: format_csv(results, _NullOutput()), files, None),
+        (
+            "format_jsonl",
+            lambda: format_jsonl(results.records(), _NullOutput()),
+            files,
+            None,
+        ),
+        ("format_npz", lambda: format_npz(results, io.BytesIO()), files, None),
+    ]
+
+    return {
+        name: _throughput(_best_time(function, repeat), items, step_size)
+        for name, function, items, step_size in steps
+    }
+
+
+def benchmark(
+    spec: CorpusSpec,
+    directory: str,
+    repeat: int = 3,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Generate a synthetic repository and benchmark it.
+
+    Args:
+        spec: Corpus parameters
+        directory: Empty directory to generate the repository in
+        repeat: Number of runs per step
+        workers: Number of worker processes for scan_directory
+
+    Returns:
+        JSON-serializable report with the environment, the corpus and the
+        timings of each step
+    """
+    generated = generate_corpus(directory, spec)
+    parameters = spec._asdict()
+    parameters["languages"] = list(spec.languages)
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "executable": sys.executable,
+        },
+        "corpus": {"parameters": parameters, "generated": generated},
+        "workers": workers or 1,
+        "repeat": repeat,
+        "results": run_benchmarks(directory, repeat, workers),
+    }
+
+
+def parse_languages(value: str) -> Tuple[str, ...]:
+    """
+    Parse a comma-separated list of workflow languages.
+
+    Args:
+        value: Language names, e.g. "Snakemake,CWL"
+
+    Returns:
+        Tuple of language names
+
+    Raises:
+        ValueError: If a language has no template
+    """
+    languages = tuple(name.strip() for name in value.split(",") if name.strip())
+    unknown = [name for name in languages if name not in _TEMPLATES]
+    if unknown or not languages:
+        supported = ", ".join(name for name in WORKFLOW_LANGUAGES if name in _TEMPLATES)
+        raise ValueError(f"Unknown languages {unknown}; supported: {supported}")
+    return languages
@@ -0,0 +1,403 @@
+"""Module for the persistent on-disk cache of line count results."""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the counting rules change so stale results are discarded
+CACHE_VERSION = 4
+
+# Default maximum number of cached files before the least recently used
+# entries are evicted
+DEFAULT_MAX_ENTRIES = 500_000
+
+# Read size used when hashing file contents
+_HASH_CHUNK_SIZE = 1 << 16
+
+
+class CacheKey(NamedTuple):
+    """Identity of a file as seen by the cache."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    language: str
+
+
+def default_cache_dir() -> str:
+    """
+    Get the default cache directory.
+
+    Returns:
+        $XDG_CACHE_HOME/mudag, or ~/.cache/mudag if XDG_CACHE_HOME is not set
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "mudag")
+
+
+def content_hasher(language: str) -> hashlib.blake2b:
+    """
+    Create the hasher of the content digests stored in the cache.
+
+    The digest is seeded with the language, since the same contents are
+    counted differently in another language.
+
+    Args:
+        language: Workflow language of the file
+
+    Returns:
+        Hasher to feed the file contents to
+    """
+    return hashlib.blake2b(language.encode("utf-8"), digest_size=20)
+
+
+def _stat_key(file_path: str, language: str) -> Optional[CacheKey]:
+    """
+    Build the cache key of a file from its stat information.
+
+    Args:
+        file_path: Path to the file
+        language: Workflow language of the file
+
+    Returns:
+        Cache key, or None if the file cannot be stat'ed
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return CacheKey(
+        os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, language
+    )
+
+
+class ResultCache:
+    """
+    SQLite-backed cache of line count results.
+
+    Entries are keyed by (absolute path, size, mtime_ns). When a file's stat
+    information changed, a hash of its contents is used as a fallback key so
+    that touched but unchanged files (e.g. after a fresh checkout) are not
+    counted again. The cache holds at most ``max_entries`` files and evicts
+    the least recently used ones beyond that.
+
+    Files are only hashed here when the cache holds an outdated entry for
+    their path. The digests of other files are computed by the scan while
+    it reads them and passed to ``put``.
+    """
+
+    # The digest of freshly counted files is passed to put
+    wants_digests = True
+
+    def __init__(
+        self, cache_dir: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES
+    ) -> None:
+        """
+        Open (or create) the cache database.
+
+        Args:
+            cache_dir: Directory holding the cache database (default:
+                ~/.cache/mudag)
+            max_entries: Maximum number of cached files
+
+        Raises:
+            sqlite3.Error: If the database cannot be opened
+            OSError: If the cache directory cannot be created
+        """
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.hash_hits = 0
+        self.misses = 0
+
+        self._digests: Dict[str, str] = {}
+        self._touched: List[Tuple[int, str]] = []
+        self._pending: List[Tuple[str, int, int, str, str, int]] = []
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(
+            os.path.join(self.cache_dir, "results.sqlite3"), timeout=30
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+            "digest TEXT, result TEXT, last_used INTEGER)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)"
+        )
+
+        # Discard entries written by an incompatible version
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'version'"
+        ).fetchone()
+        if row is None or row[0] != str(CACHE_VERSION):
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                (str(CACHE_VERSION),),
+            )
+        self._conn.commit()
+
+    def __enter__(self) -> "ResultCache":
+        """Return the cache for use as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Flush and close the cache."""
+        self.close()
+
+    def key(self, file_path: str, language: str) -> Optional[CacheKey]:
+        """
+        Build the cache key for a file.
+
+        Args:
+            file_path: Path to the file
+            language: Workflow language of the file, which determines the
+                comment syntax used for counting
+
+        Returns:
+            Cache key, or None if the file cannot be stat'ed
+        """
+        return _stat_key(file_path, language)
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, int]]:
+        """
+        Look up the cached line counts for a file.
+
+        Args:
+            key: Cache key of the file
+
+        Returns:
+            Cached line count dictionary, or None on a cache miss
+        """
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, result FROM entries WHERE path = ?", (key.path,)
+        ).fetchone()
+        if row is not None and row[0] == key.size and row[1] == key.mtime_ns:
+            self.hits += 1
+            self._touched.append((time.time_ns(), key.path))
+            return json.loads(row[2])
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        # Fall back to the content hash
+        digest = self._digest(key)
+        if digest is not None:
+            row = self._conn.execute(
+                "SELECT result FROM entries WHERE digest = ? LIMIT 1", (digest,)
+            ).fetchone()
+            if row is not None:
+                self.hash_hits += 1
+                del self._digests[key.path]
+                self._pending.append(
+                    (key.path, key.size, key.mtime_ns, digest, row[0], time.time_ns())
+                )
+                return json.loads(row[0])
+
+        self.misses += 1
+        return None
+
+    def put(
+        self, key: CacheKey, result: Dict[str, int], digest: Optional[str] = None
+    ) -> None:
+        """
+        Store the line counts for a file.
+
+        Results of files that could not be read are not cached.
+
+        Args:
+            key: Cache key of the file
+            result: Line count dictionary returned by count_lines
+            digest: Content digest of the file from content_hasher, or None
+                to hash the file here
+        """
+        if result.get("error"):
+            self._digests.pop(key.path, None)
+            return
+
+        if digest is None:
+            digest = self._digest(key)
+        self._digests.pop(key.path, None)
+        if digest is None:
+            return
+        self._pending.append(
+            (
+                key.path,
+                key.size,
+                key.mtime_ns,
+                digest,
+                json.dumps(result),
+                time.time_ns(),
+            )
+        )
+
+    def close(self) -> None:
+        """Write pending entries, evict old entries and close the database."""
+        try:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries "
+                "(path, size, mtime_ns, digest, result, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                self._pending,
+            )
+            self._conn.executemany(
+                "UPDATE entries SET last_used = ? WHERE path = ?", self._touched
+            )
+
+            # Evict the least recently used entries beyond the size bound
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE path IN "
+                    "(SELECT path FROM entries ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+        finally:
+            self._conn.close()
+            self._pending = []
+            self._touched = []
+
+        logger.info(
+            f"Result cache: {self.hits} hits, {self.hash_hits} content hash hits, "
+            f"{self.misses} misses"
+        )
+
+    def _digest(self, key: CacheKey) -> Optional[str]:
+        """
+        Hash the contents of a file together with its language.
+
+        Args:
+            key: Cache key of the file
+
+        Returns:
+            Hex digest, or None if the file cannot be read
+        """
+        digest = self._digests.get(key.path)
+        if digest is not None:
+            return digest
+
+        hasher = content_hasher(key.language)
+        try:
+            with open(key.path, "rb") as file:
+                for chunk in iter(lambda: file.read(_HASH_CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+        except OSError:
+            return None
+
+        digest = hasher.hexdigest()
+        self._digests[key.path] = digest
+        return digest
+
+
+class MemoryCache:
+    """
+    Thread-safe in-memory cache of line count results.
+
+    Meant for long-running processes such as the analysis server: lookups
+    cost a stat call and a dictionary access, with no database round trip.
+    Entries are only valid for an unchanged (path, size, mtime_ns, language),
+    and the least recently used entries beyond ``max_entries`` are evicted.
+    """
+
+    # Entries are keyed on stat information only
+    wants_digests = False
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        """
+        Create an empty cache.
+
+        Args:
+            max_entries: Maximum number of cached files
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[CacheKey, Dict[str, int]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of cached files."""
+        return len(self._entries)
+
+    def key(self, file_path: str, language: str) -> Optional[CacheKey]:
+        """
+        Build the cache key for a file.
+
+        Args:
+            file_path: Path to the file
+            language: Workflow language of the file
+
+        Returns:
+            Cache key, or None if the file cannot be stat'ed
+        """
+        return _stat_key(file_path, language)
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, int]]:
+        """
+        Look up the cached line counts for a file.
+
+        Args:
+            key: Cache key of the file
+
+        Returns:
+            Cached line count dictionary, or None on a cache miss
+        """
+        with self._lock:
+            entry = self._entries.get(key.path)
+            if entry is not None and entry[0] == key:
+                self._entries.move_to_end(key.path)
+                self.hits += 1
+                return dict(entry[1])
+            self.misses += 1
+            return None
+
+    def put(
+        self, key: CacheKey, result: Dict[str, int], digest: Optional[str] = None
+    ) -> None:
+        """
+        Store the line counts for a file.
+
+        Results of files that could not be read are not cached.
+
+        Args:
+            key: Cache key of the file
+            result: Line count dictionary returned by count_lines
+            digest: Content digest of the file; unused, since entries are
+                keyed on stat information only
+        """
+        if result.get("error"):
+            return
+        with self._lock:
+            self._entries[key.path] = (key, dict(result))
+            self._entries.move_to_end(key.path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def close(self) -> None:
+        """Keep the entries; the cache lives as long as the process."""
+
+
+# Caches accepted by the scanning functions
+Cache = Union[ResultCache, MemoryCache]
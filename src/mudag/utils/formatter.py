@@ -2,31 +2,90 @@
 
 import csv
 import json
-import os
-from typing import Dict, TextIO
+import struct
+import sys
+import zipfile
+from array import array
+from datetime import datetime, timezone
+from itertools import islice, repeat
+from json.encoder import encode_basestring_ascii
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+from ..core.batch import RepositoryResult
+from ..core.metrics import ordered_metrics
+from ..core.results import FileResult, ScanResult
+from ..core.watch import WatchUpdate
+from .git_utils import HistoryPoint
+from .instrumentation import STATS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Number of files serialized at a time by the JSON and NumPy formatters
+_CHUNK_SIZE = 4096
+
+
+def _metric_title(name: str) -> str:
+    """
+    Get the column title of a structure metric.
+
+    Args:
+        name: Metric name
+
+    Returns:
+        Title for table and CSV headers
+    """
+    return name.replace("_", " ").title()
 
 
-def format_table(results: Dict[str, Dict[str, int]], output: TextIO) -> None:
+def _metric_cell(value: Optional[int]) -> Union[int, str]:
+    """
+    Get the table or CSV cell of a metric value.
+
+    Args:
+        value: Metric value, or -1 or None if the file has no such metric
+
+    Returns:
+        The value, or an empty string if the file has no such metric
+    """
+    return "" if value is None or value < 0 else value
+
+
+@STATS.timed("format")
+def format_table(
+    results: Union[ScanResult, Dict[str, Dict[str, int]]], output: TextIO
+) -> None:
     """
     Format the results as a text table.
 
     Args:
-        results: Dictionary mapping file paths to line count dictionaries
+        results: Scan result, or dictionary mapping file paths to line count
+            dictionaries
         output: File-like object to write the formatted output to
     """
-    # Extract metadata if it exists
-    metadata = results.pop("__metadata__", None)
+    results = ScanResult.coerce(results)
+    rel_paths = results.rel_paths
 
     # Calculate column widths
-    path_width = (
-        max(len(os.path.relpath(path)) for path in results.keys()) + 2
-        if results
-        else 10
-    )
+    path_width = max(map(len, rel_paths)) + 2 if rel_paths else 10
     path_width = max(path_width, 10)  # Min width for path column
 
     # Calculate width for index column
-    total_files = len(results)
+    total_files = results.file_count
     idx_width = max(len(str(total_files)), 4)  # Minimum of 4 characters for "No."
 
     # Print summary of analyzed files
@@ -34,185 +93,849 @@ def format_table(results: Dict[str, Dict[str, int]], output: TextIO) -> None:
 
     # Print header
     header = f"{'No.':<{idx_width}} | {'File Path':<{path_width}} | {'Code':<8} | {'Comment':<8} | {'Blank':<8} | {'Total':<8}"
+
+    # Structure metrics get a column each when any file reports them
+    metrics = [
+        (results.metrics[name], _metric_title(name), max(8, len(name)))
+        for name in results.metric_names
+    ]
+    header += "".join(f" | {title:<{width}}" for _, title, width in metrics)
     separator = "-" * len(header)
 
     output.write(f"{header}\n")
     output.write(f"{separator}\n")
 
     # Print data rows
-    total_code = 0
-    total_comment = 0
-    total_blank = 0
-    total_lines = 0
-
-    for idx, (path, counts) in enumerate(sorted(results.items()), 1):
-        rel_path = os.path.relpath(path)
-        code = counts.get("code", 0)
-        comment = counts.get("comment", 0)
-        blank = counts.get("blank", 0)
-        total = counts.get("total", 0)
-
-        total_code += code
-        total_comment += comment
-        total_blank += blank
-        total_lines += total
-
+    code, comment, blank, total = (
+        results.code,
+        results.comment,
+        results.blank,
+        results.total,
+    )
+    for idx, row in enumerate(results.sorted_rows(), 1):
+        cells = "".join(
+            f" | {_metric_cell(column[row]):<{width}}" for column, _, width in metrics
+        )
         output.write(
-            f"{idx:<{idx_width}} | {rel_path:<{path_width}} | {code:<8} | {comment:<8} | {blank:<8} | {total:<8}\n"
+            f"{idx:<{idx_width}} | {rel_paths[row]:<{path_width}} | {code[row]:<8} | {comment[row]:<8} | {blank[row]:<8} | {total[row]:<8}{cells}\n"
         )
 
     # Print separator
     output.write(f"{separator}\n")
 
     # Print overall total
+    totals = results.totals()
+    cells = "".join(
+        f" | {totals[name]:<{width}}"
+        for name, (_, _, width) in zip(results.metric_names, metrics)
+    )
     output.write(
-        f"{'TOTAL':<{idx_width + path_width + 3}} | {total_code:<8} | {total_comment:<8} | {total_blank:<8} | {total_lines:<8}\n"
+        f"{'TOTAL':<{idx_width + path_width + 3}} | {totals['code']:<8} | {totals['comment']:<8} | {totals['blank']:<8} | {totals['total']:<8}{cells}\n"
     )
 
-    # Print workflow language totals if metadata exists
-    if metadata and "workflow_languages" in metadata:
-        languages = metadata["workflow_languages"]
-
-        # Only print the section if there are files
-        if total_files > 0:
-            output.write(f"\n\n{'Workflow Language Statistics':}\n")
-            output.write(f"{'-' * 40}\n")
+    # Print workflow language totals if metadata exists and there are files
+    if results.with_metadata and total_files > 0:
+        output.write(f"\n\n{'Workflow Language Statistics':}\n")
+        output.write(f"{'-' * 40}\n")
+        titles = "".join(f" | {title:<{width}}" for _, title, width in metrics)
+        output.write(
+            f"{'Language':<15} | {'Files':<8} | {'Code':<8} | {'Comment':<8} | {'Blank':<8} | {'Total':<8}{titles}\n"
+        )
+        output.write(f"{'-' * 70}\n")
+
+        # Print statistics for each language that has files
+        languages = results.language_stats(only_present=True)
+        for lang, stats in sorted(languages.items()):
+            cells = "".join(
+                f" | {_metric_cell(stats.get(name)):<{width}}"
+                for name, (_, _, width) in zip(results.metric_names, metrics)
+            )
             output.write(
-                f"{'Language':<15} | {'Files':<8} | {'Code':<8} | {'Comment':<8} | {'Blank':<8} | {'Total':<8}\n"
+                f"{lang:<15} | {stats['files']:<8} | {stats['code']:<8} | {stats['comment']:<8} | {stats['blank']:<8} | {stats['total']:<8}{cells}\n"
             )
-            output.write(f"{'-' * 70}\n")
-
-            # Print statistics for each language that has files
-            for lang, stats in sorted(languages.items()):
-                if stats["files"] > 0:
-                    output.write(
-                        f"{lang:<15} | {stats['files']:<8} | {stats['code']:<8} | {stats['comment']:<8} | {stats['blank']:<8} | {stats['total']:<8}\n"
-                    )
 
 
-def format_json(results: Dict[str, Dict[str, int]], output: TextIO) -> None:
+@STATS.timed("format")
+def format_json(
+    results: Union[ScanResult, Dict[str, Dict[str, int]]],
+    output: TextIO,
+    compact: bool = False,
+) -> None:
     """
     Format the results as JSON.
 
+    The files object is written incrementally from the result columns, so
+    the document is never built in memory. The default output is identical
+    to json.dump with indent=2.
+
     Args:
-        results: Dictionary mapping file paths to line count dictionaries
+        results: Scan result, or dictionary mapping file paths to line count
+            dictionaries
         output: File-like object to write the formatted output to
+        compact: If True, write the document without whitespace, using
+            orjson if it is installed
     """
-    # Extract metadata if it exists
-    metadata = results.pop("__metadata__", None)
+    results = ScanResult.coerce(results)
 
     # Calculate totals
-    total_files = len(results)
-    total_code = sum(counts.get("code", 0) for counts in results.values())
-    total_comment = sum(counts.get("comment", 0) for counts in results.values())
-    total_blank = sum(counts.get("blank", 0) for counts in results.values())
-    total_lines = total_code + total_comment + total_blank
-
-    # Prepare JSON structure
-    output_data = {
-        "summary": {
-            "total_files": total_files,
-            "total_code": total_code,
-            "total_comment": total_comment,
-            "total_blank": total_blank,
-            "total_lines": total_lines,
-        },
-        "files": {},
+    totals = results.totals()
+    summary = {
+        "total_files": results.file_count,
+        "total_code": totals["code"],
+        "total_comment": totals["comment"],
+        "total_blank": totals["blank"],
+        "total_lines": totals["code"] + totals["comment"] + totals["blank"],
     }
+    for name in results.metric_names:
+        summary[f"total_{name}"] = totals[name]
 
-    # Add workflow language statistics if available
-    if metadata and "workflow_languages" in metadata:
-        # Only include languages with files
-        language_stats = {
-            lang: stats
-            for lang, stats in metadata["workflow_languages"].items()
-            if stats["files"] > 0
-        }
-        if language_stats:
-            output_data["workflow_languages"] = language_stats
+    # Add workflow language statistics if available, only for languages with files
+    language_stats = None
+    if results.with_metadata:
+        language_stats = results.language_stats(only_present=True) or None
 
-    # Add file data
-    for path, counts in results.items():
-        rel_path = os.path.relpath(path)
-        output_data["files"][rel_path] = counts
+    if compact:
+        _write_json_compact(results, summary, language_stats, output)
+    else:
+        _write_json_indented(results, summary, language_stats, output)
 
-    # Write JSON to output
-    json.dump(output_data, output, indent=2)
 
+def _iter_json_chunks(results: ScanResult) -> Iterator[List[Tuple]]:
+    """
+    Iterate over the rows of a scan result in chunks.
+
+    Args:
+        results: Scan result
 
-def format_csv(results: Dict[str, Dict[str, int]], output: TextIO) -> None:
+    Yields:
+        Lists of (relative path, code, comment, blank, total, error, metrics)
+        tuples, where metrics is a dictionary of the file's structure metrics
+        or None if the result has none
+    """
+    names = results.metric_names
+    metrics: Iterator[Optional[Dict[str, int]]] = repeat(None)
+    if names:
+        metrics = (
+            {name: value for name, value in zip(names, values) if value >= 0}
+            for values in zip(*(results.metrics[name] for name in names))
+        )
+    rows = zip(
+        results.rel_paths,
+        results.code,
+        results.comment,
+        results.blank,
+        results.total,
+        results.errors,
+        metrics,
+    )
+    while True:
+        chunk = list(islice(rows, _CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _write_json_indented(
+    results: ScanResult,
+    summary: Dict[str, int],
+    language_stats: Optional[Dict[str, Dict[str, int]]],
+    output: TextIO,
+) -> None:
+    """
+    Write the JSON document with an indentation of two spaces.
+
+    Args:
+        results: Scan result
+        summary: Summary object
+        language_stats: Workflow language statistics, or None to leave them out
+        output: File-like object to write the formatted output to
+    """
+    output.write('{\n  "summary": ')
+    output.write(json.dumps(summary, indent=2).replace("\n", "\n  "))
+    output.write(',\n  "files": {')
+
+    separator = "\n"
+    for chunk in _iter_json_chunks(results):
+        parts = []
+        for rel_path, code, comment, blank, total, error, metrics in chunk:
+            key = encode_basestring_ascii(rel_path)
+            if error:
+                parts.append(
+                    f'{separator}    {key}: {{\n      "code": 0,\n      "comment": 0,'
+                    '\n      "blank": 0,\n      "error": 1\n    }'
+                )
+            else:
+                members = "".join(
+                    f',\n      "{name}": {value}'
+                    for name, value in (metrics or {}).items()
+                )
+                parts.append(
+                    f'{separator}    {key}: {{\n      "code": {code},'
+                    f'\n      "comment": {comment},'
+                    f'\n      "blank": {blank},'
+                    f'\n      "total": {total}{members}\n    }}'
+                )
+            separator = ",\n"
+        output.write("".join(parts))
+
+    output.write("\n  }" if results.file_count else "}")
+
+    if language_stats is not None:
+        output.write(',\n  "workflow_languages": ')
+        output.write(json.dumps(language_stats, indent=2).replace("\n", "\n  "))
+    output.write("\n}")
+
+
+def _dumps_compact(value: Any) -> str:
+    """
+    Serialize a value to JSON without whitespace.
+
+    Args:
+        value: Value to serialize
+
+    Returns:
+        JSON text
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(value).decode("utf-8")
+        except orjson.JSONEncodeError:
+            # e.g. undecodable file names; the standard library escapes them
+            pass
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _write_json_compact(
+    results: ScanResult,
+    summary: Dict[str, int],
+    language_stats: Optional[Dict[str, Dict[str, int]]],
+    output: TextIO,
+) -> None:
+    """
+    Write the JSON document without whitespace.
+
+    Args:
+        results: Scan result
+        summary: Summary object
+        language_stats: Workflow language statistics, or None to leave them out
+        output: File-like object to write the formatted output to
+    """
+    output.write('{"summary":')
+    output.write(_dumps_compact(summary))
+    output.write(',"files":{')
+
+    separator = ""
+    for chunk in _iter_json_chunks(results):
+        files = {}
+        for rel_path, code, comment, blank, total, error, metrics in chunk:
+            if error:
+                files[rel_path] = {"code": 0, "comment": 0, "blank": 0, "error": 1}
+            else:
+                files[rel_path] = {
+                    "code": code,
+                    "comment": comment,
+                    "blank": blank,
+                    "total": total,
+                }
+                if metrics:
+                    files[rel_path].update(metrics)
+        output.write(separator)
+        output.write(_dumps_compact(files)[1:-1])
+        separator = ","
+
+    output.write("}")
+    if language_stats is not None:
+        output.write(',"workflow_languages":')
+        output.write(_dumps_compact(language_stats))
+    output.write("}")
+
+
+@STATS.timed("format")
+def format_csv(
+    results: Union[ScanResult, Dict[str, Dict[str, int]]], output: TextIO
+) -> None:
     """
     Format the results as CSV.
 
     Args:
-        results: Dictionary mapping file paths to line count dictionaries
+        results: Scan result, or dictionary mapping file paths to line count
+            dictionaries
         output: File-like object to write the formatted output to
     """
-    # Extract metadata if it exists
-    metadata = results.pop("__metadata__", None)
+    results = ScanResult.coerce(results)
 
     # Initialize CSV writer
     writer = csv.writer(output)
 
-    # Write header
+    # Write header, with a column per structure metric any file reports
+    names = results.metric_names
     writer.writerow(
         ["File Path", "Code Lines", "Comment Lines", "Blank Lines", "Total Lines"]
+        + [_metric_title(name) for name in names]
     )
 
     # Write data rows
+    rel_paths, code, comment, blank, total = (
+        results.rel_paths,
+        results.code,
+        results.comment,
+        results.blank,
+        results.total,
+    )
+    metrics = [results.metrics[name] for name in names]
+    writer.writerows(
+        [rel_paths[row], code[row], comment[row], blank[row], total[row]]
+        + [_metric_cell(column[row]) for column in metrics]
+        for row in results.sorted_rows()
+    )
+
+    # Write total row
+    totals = results.totals()
+    writer.writerow(
+        ["TOTAL", totals["code"], totals["comment"], totals["blank"], totals["total"]]
+        + [totals[name] for name in names]
+    )
+
+    # Write workflow language statistics if available
+    if results.with_metadata and results.file_count > 0:
+        _write_csv_language_stats(writer, results.language_stats(), names)
+
+
+def _npy_header(descr: str, length: int) -> bytes:
+    """
+    Build the header of a one-dimensional array in NumPy's .npy format.
+
+    Args:
+        descr: NumPy type descriptor, e.g. '<i8' or '<U12'
+        length: Number of elements
+
+    Returns:
+        Magic string, version and header, padded so the data is aligned
+    """
+    header = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': ({length},), }}"
+    # Magic (6 bytes), version (2) and header length (2) precede the header;
+    # the data starts on a 64-byte boundary
+    header += " " * (-(10 + len(header) + 1) % 64) + "\n"
+    return (
+        b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("ascii")
+    )
+
+
+def _write_npy_ints(archive: zipfile.ZipFile, name: str, column: array) -> None:
+    """
+    Write an integer column as a .npy member of an archive.
+
+    Args:
+        archive: Archive to write to
+        name: Array name
+        column: Column of machine integers
+    """
+    byte_order = "<" if sys.byteorder == "little" else ">"
+    with archive.open(f"{name}.npy", "w", force_zip64=True) as member:
+        member.write(_npy_header(f"{byte_order}i{column.itemsize}", len(column)))
+        member.write(column.tobytes())
+
+
+def _write_npy_strings(
+    archive: zipfile.ZipFile, name: str, column: Sequence[str]
+) -> None:
+    """
+    Write a string column as a fixed-width unicode .npy member of an archive.
+
+    Args:
+        archive: Archive to write to
+        name: Array name
+        column: Column of strings
+    """
+    width = max(map(len, column), default=0) or 1
+    with archive.open(f"{name}.npy", "w", force_zip64=True) as member:
+        member.write(_npy_header(f"<U{width}", len(column)))
+        for start in range(0, len(column), _CHUNK_SIZE):
+            member.write(
+                b"".join(
+                    value.encode("utf-32-le", "surrogatepass").ljust(4 * width, b"\0")
+                    for value in column[start : start + _CHUNK_SIZE]
+                )
+            )
+
+
+@STATS.timed("format")
+def format_npz(
+    results: Union[ScanResult, Dict[str, Dict[str, int]]], output: BinaryIO
+) -> None:
+    """
+    Format the results as a NumPy .npz archive of typed columns.
+
+    The archive holds the arrays 'path', 'language', 'code', 'comment',
+    'blank', 'total' and 'error', one element per file, and the language
+    summary as 'summary_language', 'summary_files', 'summary_code', ...
+    Structure metrics reported by any file add an array each, e.g. 'steps'
+    and 'summary_steps', with -1 where a file or language has no such
+    metric. It is written without NumPy and loads with
+    numpy.load(allow_pickle=False).
+
+    Args:
+        results: Scan result, or dictionary mapping file paths to line count
+            dictionaries
+        output: Binary file-like object to write the archive to
+    """
+    results = ScanResult.coerce(results)
+    language_stats = results.language_stats(only_present=True)
+
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_STORED, allowZip64=True) as archive:
+        _write_npy_strings(archive, "path", results.rel_paths)
+        _write_npy_strings(
+            archive, "language", [results.languages[i] for i in results.language_ids]
+        )
+        for name in ("code", "comment", "blank", "total"):
+            _write_npy_ints(archive, name, getattr(results, name))
+        _write_npy_ints(archive, "error", results.errors)
+        for name in results.metric_names:
+            _write_npy_ints(archive, name, results.metrics[name])
+
+        _write_npy_strings(archive, "summary_language", list(language_stats))
+        for key in ("files", "code", "comment", "blank", "total"):
+            column = array("l", (stats[key] for stats in language_stats.values()))
+            _write_npy_ints(archive, f"summary_{key}", column)
+        for name in results.metric_names:
+            column = array(
+                "l", (stats.get(name, -1) for stats in language_stats.values())
+            )
+            _write_npy_ints(archive, f"summary_{name}", column)
+
+
+@STATS.timed("format")
+def format_parquet(
+    results: Union[ScanResult, Dict[str, Dict[str, int]]], output: BinaryIO
+) -> None:
+    """
+    Format the results as a Parquet table of typed columns.
+
+    The table has the columns 'path', 'language' (dictionary encoded),
+    'code', 'comment', 'blank', 'total' and 'error', and a nullable column
+    per structure metric reported by any file. The language summary is
+    stored as JSON in the 'mudag.workflow_languages' schema metadata.
+
+    Args:
+        results: Scan result, or dictionary mapping file paths to line count
+            dictionaries
+        output: Binary file-like object to write the table to
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    results = ScanResult.coerce(results)
+
+    columns = {
+        "path": pa.array(results.rel_paths, type=pa.string()),
+        "language": pa.DictionaryArray.from_arrays(
+            pa.array(results.language_ids, type=pa.int32()),
+            pa.array(results.languages, type=pa.string()),
+        ),
+    }
+    for name in ("code", "comment", "blank", "total"):
+        columns[name] = pa.array(getattr(results, name), type=pa.int64())
+    columns["error"] = pa.array(results.errors, type=pa.int8())
+    for name in results.metric_names:
+        columns[name] = pa.array(
+            [value if value >= 0 else None for value in results.metrics[name]],
+            type=pa.int64(),
+        )
+
+    language_stats = results.language_stats(only_present=True)
+    table = pa.table(columns).replace_schema_metadata(
+        {"mudag.workflow_languages": json.dumps(language_stats)}
+    )
+    pq.write_table(table, output)
+
+
+def _write_csv_language_stats(
+    writer: Any, languages: Dict[str, Dict[str, int]], metrics: Sequence[str] = ()
+) -> None:
+    """
+    Write the workflow language statistics section of the CSV output.
+
+    Args:
+        writer: CSV writer
+        languages: Mapping of language names to statistics dictionaries
+        metrics: Names of the structure metric columns
+    """
+    # Add a blank row for separation
+    writer.writerow([])
+
+    # Add workflow language statistics header
+    writer.writerow(
+        [
+            "Workflow Language",
+            "Files",
+            "Code Lines",
+            "Comment Lines",
+            "Blank Lines",
+            "Total Lines",
+        ]
+        + [_metric_title(name) for name in metrics]
+    )
+
+    # Add data for each language that has files
+    for lang, stats in sorted(languages.items()):
+        if stats["files"] > 0:
+            writer.writerow(
+                [
+                    lang,
+                    stats["files"],
+                    stats["code"],
+                    stats["comment"],
+                    stats["blank"],
+                    stats["total"],
+                ]
+                + [_metric_cell(stats.get(name)) for name in metrics]
+            )
+
+
+def _add_to_language_stats(
+    languages: Dict[str, Dict[str, int]], record: FileResult
+) -> None:
+    """
+    Add a file result to per-language statistics.
+
+    Args:
+        languages: Mapping of language names to statistics dictionaries
+        record: File result to add
+    """
+    stats = languages.get(record.language)
+    if stats is None:
+        stats = {"files": 0, "code": 0, "comment": 0, "blank": 0, "total": 0}
+        languages[record.language] = stats
+    stats["files"] += 1
+    stats["code"] += record.code
+    stats["comment"] += record.comment
+    stats["blank"] += record.blank
+    stats["total"] += record.total
+    for name, value in (record.metrics or {}).items():
+        stats[name] = stats.get(name, 0) + value
+
+
+def _metric_totals(languages: Dict[str, Dict[str, int]]) -> Dict[str, int]:
+    """
+    Sum the structure metrics of per-language statistics.
+
+    Args:
+        languages: Mapping of language names to statistics dictionaries
+
+    Returns:
+        Mapping of 'total_<metric>' keys to sums, in report order
+    """
+    names = ordered_metrics(
+        name
+        for stats in languages.values()
+        for name in stats
+        if name not in ("files", "code", "comment", "blank", "total")
+    )
+    return {
+        f"total_{name}": sum(stats.get(name, 0) for stats in languages.values())
+        for name in names
+    }
+
+
+def format_csv_stream(
+    records: Iterable[FileResult], output: TextIO, metrics: Sequence[str] = ()
+) -> None:
+    """
+    Format file results as CSV while they are produced.
+
+    Rows are written in the order the records arrive, followed by the total
+    row and the workflow language statistics. Since the header is written
+    before any file is analyzed, the structure metric columns are chosen by
+    the caller.
+
+    Args:
+        records: Iterable of file results, e.g. from iter_scan
+        output: File-like object to write the formatted output to
+        metrics: Names of the structure metrics to add as columns
+    """
+    writer = csv.writer(output)
+    writer.writerow(
+        ["File Path", "Code Lines", "Comment Lines", "Blank Lines", "Total Lines"]
+        + [_metric_title(name) for name in metrics]
+    )
+
+    languages: Dict[str, Dict[str, int]] = {}
     total_code = 0
     total_comment = 0
     total_blank = 0
     total_lines = 0
 
-    for path, counts in sorted(results.items()):
-        rel_path = os.path.relpath(path)
-        code = counts.get("code", 0)
-        comment = counts.get("comment", 0)
-        blank = counts.get("blank", 0)
-        total = counts.get("total", 0)
+    for record in records:
+        values = record.metrics or {}
+        writer.writerow(
+            [
+                record.display_path(),
+                record.code,
+                record.comment,
+                record.blank,
+                record.total,
+            ]
+            + [_metric_cell(values.get(name)) for name in metrics]
+        )
 
-        total_code += code
-        total_comment += comment
-        total_blank += blank
-        total_lines += total
+        total_code += record.code
+        total_comment += record.comment
+        total_blank += record.blank
+        total_lines += record.total
+        _add_to_language_stats(languages, record)
 
-        writer.writerow([rel_path, code, comment, blank, total])
+    writer.writerow(
+        ["TOTAL", total_code, total_comment, total_blank, total_lines]
+        + [sum(stats.get(name, 0) for stats in languages.values()) for name in metrics]
+    )
 
-    # Write total row
-    writer.writerow(["TOTAL", total_code, total_comment, total_blank, total_lines])
+    if languages:
+        _write_csv_language_stats(writer, languages, metrics)
 
-    # Write workflow language statistics if available
-    if metadata and "workflow_languages" in metadata:
-        languages = metadata["workflow_languages"]
 
-        # Only proceed if there are files
-        if len(results) > 0:
-            # Add a blank row for separation
-            writer.writerow([])
+def format_jsonl(records: Iterable[FileResult], output: TextIO) -> None:
+    """
+    Format file results as JSON Lines while they are produced.
+
+    Each file is written as one JSON object as soon as it arrives. A final
+    line holds the summary and the workflow language statistics.
+
+    Args:
+        records: Iterable of file results, e.g. from iter_scan
+        output: File-like object to write the formatted output to
+    """
+    languages: Dict[str, Dict[str, int]] = {}
+    total_files = 0
+    total_code = 0
+    total_comment = 0
+    total_blank = 0
+
+    for record in records:
+        line = {"path": record.display_path(), "language": record.language}
+        line.update(record.counts())
+        output.write(json.dumps(line))
+        output.write("\n")
+
+        total_files += 1
+        total_code += record.code
+        total_comment += record.comment
+        total_blank += record.blank
+        _add_to_language_stats(languages, record)
+
+    summary = {
+        "summary": {
+            "total_files": total_files,
+            "total_code": total_code,
+            "total_comment": total_comment,
+            "total_blank": total_blank,
+            "total_lines": total_code + total_comment + total_blank,
+            **_metric_totals(languages),
+        },
+        "workflow_languages": dict(sorted(languages.items())),
+    }
+    output.write(json.dumps(summary))
+    output.write("\n")
+
+
+def _commit_date(timestamp: int) -> str:
+    """
+    Format a commit timestamp as an ISO 8601 date in UTC.
+
+    Args:
+        timestamp: Unix timestamp
+
+    Returns:
+        Formatted date
+    """
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def format_history_csv(points: Iterable[HistoryPoint], output: TextIO) -> None:
+    """
+    Format a line count history as CSV while it is computed.
+
+    Each commit is written as one row per language followed by a TOTAL row.
+
+    Args:
+        points: Iterable of history points, e.g. from iter_history
+        output: File-like object to write the formatted output to
+    """
+    writer = csv.writer(output)
+    writer.writerow(
+        [
+            "Commit",
+            "Date",
+            "Language",
+            "Files",
+            "Code Lines",
+            "Comment Lines",
+            "Blank Lines",
+            "Total Lines",
+        ]
+    )
+
+    keys = ("files", "code", "comment", "blank", "total")
+    for point in points:
+        date = _commit_date(point.timestamp)
+        totals = dict.fromkeys(keys, 0)
+        for language, stats in point.languages.items():
+            writer.writerow([point.commit, date, language, *map(stats.get, keys)])
+            for key in keys:
+                totals[key] += stats[key]
+        writer.writerow([point.commit, date, "TOTAL", *map(totals.get, keys)])
+
+
+def format_history_json(points: Iterable[HistoryPoint], output: TextIO) -> None:
+    """
+    Format a line count history as a JSON array of commits.
+
+    Args:
+        points: Iterable of history points, e.g. from iter_history
+        output: File-like object to write the formatted output to
+    """
+    output_data = []
+    for point in points:
+        total = {"files": 0, "code": 0, "comment": 0, "blank": 0, "total": 0}
+        for stats in point.languages.values():
+            for key in total:
+                total[key] += stats[key]
+        output_data.append(
+            {
+                "commit": point.commit,
+                "date": _commit_date(point.timestamp),
+                "languages": point.languages,
+                "total": total,
+            }
+        )
+
+    json.dump(output_data, output, indent=2)
+
+
+def format_batch_csv(
+    results: Iterable[RepositoryResult], output: TextIO, metrics: Sequence[str] = ()
+) -> None:
+    """
+    Format the results of several repositories as one CSV table.
 
-            # Add workflow language statistics header
+    Rows are written as repositories complete, with file paths relative to
+    their repository. Failed repositories are skipped.
+
+    Args:
+        results: Iterable of repository results, e.g. from iter_batch
+        output: File-like object to write the formatted output to
+        metrics: Names of the structure metrics to add as columns
+    """
+    writer = csv.writer(output)
+    writer.writerow(
+        [
+            "Repository",
+            "File Path",
+            "Language",
+            "Code Lines",
+            "Comment Lines",
+            "Blank Lines",
+            "Total Lines",
+        ]
+        + [_metric_title(name) for name in metrics]
+    )
+
+    for result in results:
+        for record in result.records:
+            values = record.metrics or {}
             writer.writerow(
                 [
-                    "Workflow Language",
-                    "Files",
-                    "Code Lines",
-                    "Comment Lines",
-                    "Blank Lines",
-                    "Total Lines",
+                    result.repository,
+                    record.display_path(),
+                    record.language,
+                    record.code,
+                    record.comment,
+                    record.blank,
+                    record.total,
                 ]
+                + [_metric_cell(values.get(name)) for name in metrics]
             )
 
-            # Add data for each language that has files
-            for lang, stats in sorted(languages.items()):
-                if stats["files"] > 0:
-                    writer.writerow(
-                        [
-                            lang,
-                            stats["files"],
-                            stats["code"],
-                            stats["comment"],
-                            stats["blank"],
-                            stats["total"],
-                        ]
-                    )
+
+def format_batch_jsonl(results: Iterable[RepositoryResult], output: TextIO) -> None:
+    """
+    Format the results of several repositories as JSON Lines.
+
+    Each file is written as one JSON object with its repository, followed by
+    one summary line per repository. Failed repositories get a single line
+    with their error.
+
+    Args:
+        results: Iterable of repository results, e.g. from iter_batch
+        output: File-like object to write the formatted output to
+    """
+    for result in results:
+        if result.error is not None:
+            line = {"repository": result.repository, "error": result.error}
+            output.write(json.dumps(line))
+            output.write("\n")
+            continue
+
+        languages: Dict[str, Dict[str, int]] = {}
+        for record in result.records:
+            line = {
+                "repository": result.repository,
+                "path": record.display_path(),
+                "language": record.language,
+            }
+            line.update(record.counts())
+            output.write(json.dumps(line))
+            output.write("\n")
+            _add_to_language_stats(languages, record)
+
+        summary = {
+            "repository": result.repository,
+            "summary": {
+                "total_files": len(result.records),
+                "total_code": sum(stats["code"] for stats in languages.values()),
+                "total_comment": sum(stats["comment"] for stats in languages.values()),
+                "total_blank": sum(stats["blank"] for stats in languages.values()),
+                "total_lines": sum(stats["total"] for stats in languages.values()),
+                **_metric_totals(languages),
+            },
+            "workflow_languages": dict(sorted(languages.items())),
+        }
+        output.write(json.dumps(summary))
+        output.write("\n")
+
+
+def format_watch_updates(updates: Iterable[WatchUpdate], output: TextIO) -> None:
+    """
+    Format watch updates as JSON Lines while they are produced.
+
+    Each update is written as one JSON object with the event, the changed
+    paths and the updated totals, and flushed immediately so consumers see
+    it without delay.
+
+    Args:
+        updates: Iterable of watch updates, e.g. from watch
+        output: File-like object to write the formatted output to
+    """
+    for update in updates:
+        results = update.results
+        totals = results.totals()
+        line = {
+            "event": update.event,
+            "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "updated": update.updated,
+            "removed": update.removed,
+            "summary": {
+                "total_files": results.file_count,
+                "total_code": totals["code"],
+                "total_comment": totals["comment"],
+                "total_blank": totals["blank"],
+                "total_lines": totals["code"] + totals["comment"] + totals["blank"],
+                **{f"total_{name}": totals[name] for name in results.metric_names},
+            },
+            "workflow_languages": results.language_stats(only_present=True),
+        }
+        output.write(json.dumps(line))
+        output.write("\n")
+        output.flush()
@@ -0,0 +1,409 @@
+"""Module for detecting changes to the files of a directory tree."""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from ..core.languages import REGISTRY
+from .ignore_patterns import IGNORE_FILE, IgnorePatterns
+from .walker import walk_files
+
+# inotify event masks, see inotify(7)
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_DONT_FOLLOW = 0x02000000
+_IN_ISDIR = 0x40000000
+
+_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_ONLYDIR
+    | _IN_DONT_FOLLOW
+)
+
+# struct inotify_event without the variable-length name
+_EVENT = struct.Struct("iIII")
+
+# Time without new events after which a burst of changes is reported
+_SETTLE_TIME = 0.05
+
+# Longest time a burst of changes is held back
+_MAX_DELAY = 1.0
+
+
+class Change(NamedTuple):
+    """Change to a path of the watched tree."""
+
+    # Path relative to the watched directory, or "" for the whole tree
+    rel_path: str
+    # Whether the path is a directory whose whole subtree may have changed
+    is_dir: bool = False
+
+
+def _dedupe(changes: Iterable[Change]) -> List[Change]:
+    """
+    Remove repeated changes while keeping their order.
+
+    Args:
+        changes: Changes in the order they were detected
+
+    Returns:
+        Changes with duplicates removed
+    """
+    return list(dict.fromkeys(changes))
+
+
+class PollingWatcher:
+    """
+    Watcher comparing snapshots of file sizes and modification times.
+
+    Works on every platform. Only workflow files and ignore files are
+    stat'ed, and ignored directories are not descended into.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ignore_patterns: Optional[IgnorePatterns] = None,
+        interval: float = 1.0,
+    ) -> None:
+        """
+        Take the initial snapshot.
+
+        Args:
+            directory: Directory to watch
+            ignore_patterns: Ignore patterns of the tree, or None to watch
+                every file
+            interval: Seconds between snapshots
+        """
+        self.directory = directory
+        self.ignore_patterns = ignore_patterns
+        self.interval = interval
+        self._snapshot = self._take_snapshot()
+
+    def _take_snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Get the size and modification time of the relevant files.
+
+        Returns:
+            Dictionary mapping relative paths to (size, mtime_ns) tuples
+        """
+        snapshot = {}
+        for file_path, rel_path in walk_files(self.directory, self.ignore_patterns):
+            if os.path.basename(rel_path) != IGNORE_FILE:
+                if not REGISTRY.resolve(rel_path).is_workflow:
+                    continue
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            snapshot[rel_path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def read(self, timeout: Optional[float] = None) -> List[Change]:
+        """
+        Wait for changes.
+
+        Args:
+            timeout: Maximum number of seconds to wait, or None to wait until
+                a change is detected
+
+        Returns:
+            Changed files, or an empty list if the timeout expired
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            time.sleep(delay)
+
+            snapshot = self._take_snapshot()
+            changes = [
+                Change(rel_path)
+                for rel_path, stat in snapshot.items()
+                if self._snapshot.get(rel_path) != stat
+            ]
+            changes.extend(
+                Change(rel_path)
+                for rel_path in self._snapshot
+                if rel_path not in snapshot
+            )
+            self._snapshot = snapshot
+
+            if changes or (deadline is not None and time.monotonic() >= deadline):
+                return changes
+
+    def close(self) -> None:
+        """Release the resources of the watcher."""
+
+
+def _load_libc() -> ctypes.CDLL:
+    """
+    Load the C library with the inotify functions.
+
+    Returns:
+        C library
+
+    Raises:
+        OSError: If the library or the inotify functions are not available
+    """
+    library = ctypes.util.find_library("c")
+    if library is None:
+        raise OSError("C library not found")
+    libc = ctypes.CDLL(library, use_errno=True)
+    for name in ("inotify_init1", "inotify_add_watch", "inotify_rm_watch"):
+        if not hasattr(libc, name):
+            raise OSError(f"{name} is not available")
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+class InotifyWatcher:
+    """
+    Watcher receiving change events from the Linux kernel through inotify.
+
+    Every directory of the tree that is not ignored gets a watch, including
+    directories created later. Events are collected until the tree has been
+    quiet for a moment, so a burst of writes is reported as one batch.
+    """
+
+    def __init__(
+        self, directory: str, ignore_patterns: Optional[IgnorePatterns] = None
+    ) -> None:
+        """
+        Watch a directory tree.
+
+        Args:
+            directory: Directory to watch
+            ignore_patterns: Ignore patterns of the tree, or None to watch
+                every directory
+
+        Raises:
+            OSError: If inotify is not available or the directory cannot be
+                watched
+        """
+        self.directory = directory
+        self.ignore_patterns = ignore_patterns
+        self._libc = _load_libc()
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+        # Relative paths of the watched directories by watch descriptor
+        self._watches: Dict[int, str] = {}
+        try:
+            if not self._add_watch(""):
+                raise OSError(f"Cannot watch {directory}")
+            self._add_tree("")
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, rel_dir: str) -> bool:
+        """
+        Watch a single directory.
+
+        Args:
+            rel_dir: Path of the directory relative to the watched directory
+
+        Returns:
+            True if the directory is watched, False if it no longer exists
+
+        Raises:
+            OSError: If the watch limit is reached
+        """
+        path = os.path.join(self.directory, rel_dir) if rel_dir else self.directory
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                # fs.inotify.max_user_watches reached
+                raise OSError(error, "inotify watch limit reached")
+            return False
+        self._watches[wd] = rel_dir
+        return True
+
+    def _add_tree(self, rel_dir: str) -> None:
+        """
+        Watch the subdirectories of a watched directory.
+
+        Nested ignore files are loaded on the way, so ignored directories
+        are not watched.
+
+        Args:
+            rel_dir: Path of the directory relative to the watched directory
+        """
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            dir_path = (
+                os.path.join(self.directory, current) if current else self.directory
+            )
+            try:
+                with os.scandir(dir_path) as iterator:
+                    entries = list(iterator)
+            except OSError:
+                continue
+
+            if self.ignore_patterns is not None and any(
+                entry.name == IGNORE_FILE for entry in entries
+            ):
+                self.ignore_patterns.load_directory(dir_path, current)
+
+            for entry in entries:
+                try:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                except OSError:
+                    continue
+                rel_path = os.path.join(current, entry.name) if current else entry.name
+                if self.ignore_patterns is not None and self.ignore_patterns.is_ignored(
+                    rel_path, True
+                ):
+                    continue
+                if self._add_watch(rel_path):
+                    stack.append(rel_path)
+
+    def _remove_tree(self, rel_dir: str) -> None:
+        """
+        Stop watching a directory that was moved away, and its subdirectories.
+
+        Args:
+            rel_dir: Former path of the directory relative to the watched
+                directory
+        """
+        prefix = rel_dir + os.sep
+        for wd, watched in list(self._watches.items()):
+            if watched == rel_dir or watched.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._watches[wd]
+
+    def _read_events(self) -> List[Change]:
+        """
+        Read the pending events.
+
+        Returns:
+            Changes described by the events
+        """
+        try:
+            data = os.read(self._fd, 1 << 16)
+        except BlockingIOError:
+            return []
+
+        changes = []
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & _IN_Q_OVERFLOW:
+                # Events were lost, so everything must be rescanned
+                changes.append(Change("", True))
+                continue
+            if mask & _IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+
+            rel_dir = self._watches.get(wd)
+            if rel_dir is None or not name:
+                continue
+            rel_path = os.path.join(rel_dir, name) if rel_dir else name
+
+            if not mask & _IN_ISDIR:
+                changes.append(Change(rel_path))
+            elif mask & (_IN_CREATE | _IN_MOVED_TO):
+                if self.ignore_patterns is None or not self.ignore_patterns.is_ignored(
+                    rel_path, True
+                ):
+                    if self._add_watch(rel_path):
+                        self._add_tree(rel_path)
+                    changes.append(Change(rel_path, True))
+            elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                self._remove_tree(rel_path)
+                changes.append(Change(rel_path, True))
+        return changes
+
+    def read(self, timeout: Optional[float] = None) -> List[Change]:
+        """
+        Wait for changes.
+
+        Args:
+            timeout: Maximum number of seconds to wait, or None to wait until
+                a change is detected
+
+        Returns:
+            Changed paths, or an empty list if the timeout expired
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        changes: List[Change] = []
+        while not changes:
+            remaining = None
+            if deadline is not None:
+                remaining = max(0.0, deadline - time.monotonic())
+            if not select.select([self._fd], [], [], remaining)[0]:
+                return []
+            changes.extend(self._read_events())
+
+        # Collect the rest of the burst
+        settle_deadline = time.monotonic() + _MAX_DELAY
+        while time.monotonic() < settle_deadline:
+            if not select.select([self._fd], [], [], _SETTLE_TIME)[0]:
+                break
+            changes.extend(self._read_events())
+        return _dedupe(changes)
+
+    def close(self) -> None:
+        """Release the inotify file descriptor."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+Watcher = Union[InotifyWatcher, PollingWatcher]
+
+
+def create_watcher(
+    directory: str,
+    ignore_patterns: Optional[IgnorePatterns] = None,
+    polling: bool = False,
+    interval: float = 1.0,
+) -> Watcher:
+    """
+    Create the best available watcher for a directory tree.
+
+    Args:
+        directory: Directory to watch
+        ignore_patterns: Ignore patterns of the tree, or None to watch
+            everything
+        polling: If True, always use the polling watcher
+        interval: Seconds between snapshots of the polling watcher
+
+    Returns:
+        inotify watcher where available, otherwise a polling watcher
+    """
+    if not polling:
+        try:
+            return InotifyWatcher(directory, ignore_patterns)
+        except OSError:
+            pass
+    return PollingWatcher(directory, ignore_patterns, interval)
@@ -1,11 +1,40 @@
 """Module for git-related operations."""
 
 import os
+import posixpath
 import subprocess
-import tempfile
-from typing import Dict, List, Optional
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
 
-from ..core.analyzer import count_lines, is_workflow_file
+from ..core.analyzer import _relative_prefix, analyze_file, is_workflow_file
+from ..core.languages import REGISTRY, LanguageSpec
+from ..core.results import FileResult, ScanResult
+from .ignore_patterns import IGNORE_FILE, IgnorePatterns, parse_patterns
+from .instrumentation import STATS
+
+# Tree entry mode of symbolic links
+_SYMLINK_MODE = b"120000"
+
+# Links followed from a symbolic link before it is considered a loop
+_MAX_LINK_DEPTH = 40
+
+
+def _run(command: List[str], **kwargs: Any) -> subprocess.CompletedProcess:
+    """
+    Run a git command to completion and capture its output.
+
+    Args:
+        command: Command and arguments
+        **kwargs: Further arguments of subprocess.run
+
+    Returns:
+        Completed process
+    """
+    STATS.count("subprocesses")
+    with STATS.timer("git"):
+        return subprocess.run(
+            command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs
+        )
 
 
 def is_git_repo(directory: str) -> bool:
@@ -19,10 +48,8 @@ def is_git_repo(directory: str) -> bool:
         True if the directory is a git repository, False otherwise
     """
     try:
-        result = subprocess.run(
+        result = _run(
             ["git", "-C", directory, "rev-parse", "--is-inside-work-tree"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
             text=True,
             check=False,
         )
@@ -46,10 +73,8 @@ def get_file_from_commit(
         Content of the file at the given commit, or None if the file doesn't exist
     """
     try:
-        result = subprocess.run(
+        result = _run(
             ["git", "-C", repo_path, "show", f"{commit_hash}:{file_path}"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
             text=True,
             check=False,
         )
@@ -60,6 +85,223 @@ def get_file_from_commit(
         return None
 
 
+class GitObjectReader:
+    """
+    Reader of git objects through a single `git cat-file --batch` process.
+
+    All requests go over the same pipe, so reading many files costs one
+    process instead of one per file. The reader can be used as a context
+    manager to terminate the process.
+    """
+
+    def __init__(self, repo_path: str) -> None:
+        """
+        Start the cat-file process.
+
+        Args:
+            repo_path: Path to the git repository
+        """
+        STATS.count("subprocesses")
+        self._process = subprocess.Popen(
+            ["git", "-C", repo_path, "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def read(self, commit_hash: str, file_path: str) -> Optional[bytes]:
+        """
+        Read the content of a file from a specific commit.
+
+        Args:
+            commit_hash: Git commit hash
+            file_path: Path to the file relative to the repository root
+
+        Returns:
+            Content of the file at the given commit, or None if the file
+            doesn't exist or is not a regular file
+        """
+        return self.read_object(f"{commit_hash}:{file_path}")
+
+    def read_object(self, name: str) -> Optional[bytes]:
+        """
+        Read the content of a blob.
+
+        Args:
+            name: Object name understood by git, such as a blob hash or
+                "<commit>:<path>"
+
+        Returns:
+            Content of the blob, or None if the object doesn't exist or is
+            not a blob
+        """
+        # Requests are line-based, so names with newlines cannot be sent
+        if "\n" in name:
+            return None
+
+        start = time.perf_counter()
+        try:
+            return self._read_object(name)
+        finally:
+            STATS.add_time("git", time.perf_counter() - start)
+
+    def _read_object(self, name: str) -> Optional[bytes]:
+        """
+        Request a blob from the cat-file process.
+
+        Args:
+            name: Object name without newlines
+
+        Returns:
+            Content of the blob, or None if the object doesn't exist or is
+            not a blob
+        """
+        STATS.count("git_objects")
+        stdin = self._process.stdin
+        stdout = self._process.stdout
+        stdin.write(name.encode("utf-8") + b"\n")
+        stdin.flush()
+
+        # Header: "<sha> <type> <size>", or "<name> missing"
+        header = stdout.readline().split()
+        if len(header) != 3 or not header[2].isdigit():
+            if not header:
+                raise RuntimeError("git cat-file exited unexpectedly")
+            return None
+
+        size = int(header[2])
+        content = stdout.read(size)
+        # Each object is followed by a newline
+        stdout.read(1)
+
+        if header[1] != b"blob":
+            return None
+        return content
+
+    def close(self) -> None:
+        """Terminate the cat-file process."""
+        if self._process.poll() is None:
+            self._process.stdin.close()
+            self._process.wait()
+        self._process.stdout.close()
+
+    def __enter__(self) -> "GitObjectReader":
+        """Return the reader for use as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Terminate the cat-file process."""
+        self.close()
+
+
+def _ls_tree(repo_path: str, commit_hash: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    List the blobs of a commit's tree with a single `git ls-tree` call.
+
+    Args:
+        repo_path: Path to the git repository
+        commit_hash: Git commit hash or other revision
+
+    Returns:
+        Dictionaries mapping file paths relative to the repository root to
+        blob hashes, in tree order: one of the regular files, and one of the
+        symbolic links, whose blobs hold the link targets
+
+    Raises:
+        ValueError: If the tree cannot be listed
+    """
+    try:
+        result = _run(
+            ["git", "-C", repo_path, "ls-tree", "-r", "-z", commit_hash, "--"],
+            check=False,
+        )
+    except (subprocess.SubprocessError, FileNotFoundError) as e:
+        raise ValueError(str(e))
+    if result.returncode != 0:
+        raise ValueError(result.stderr.decode("utf-8", "replace").strip())
+
+    blobs = {}
+    links = {}
+    # Entries: "<mode> <type> <hash>\t<path>\0"
+    for entry in result.stdout.split(b"\0"):
+        if not entry:
+            continue
+        info, _, path = entry.partition(b"\t")
+        mode, object_type, object_hash = info.split()
+        if object_type != b"blob":
+            continue
+        entries = links if mode == _SYMLINK_MODE else blobs
+        entries[path.decode("utf-8", "surrogateescape")] = object_hash.decode("ascii")
+    return blobs, links
+
+
+def _resolve_links(
+    reader: "GitObjectReader", blobs: Dict[str, str], links: Dict[str, str]
+) -> Dict[str, str]:
+    """
+    Resolve symbolic links of a tree to the blobs of the files they point to.
+
+    Args:
+        reader: Reader of the repository's objects
+        blobs: Regular files of the tree, as returned by _ls_tree
+        links: Symbolic links of the tree, as returned by _ls_tree
+
+    Returns:
+        Dictionary mapping the paths of links to files of the tree, also
+        through other links, to the blob hashes of those files
+    """
+    targets = {}
+    for link_path, link_blob in links.items():
+        content = reader.read_object(link_blob)
+        if content is not None:
+            target = content.decode("utf-8", "surrogateescape")
+            targets[link_path] = posixpath.normpath(
+                posixpath.join(posixpath.dirname(link_path), target)
+            )
+
+    resolved = {}
+    for link_path in targets:
+        target = targets[link_path]
+        # Follow chains of links, giving up on loops like the OS does
+        for _ in range(_MAX_LINK_DEPTH):
+            if target not in targets:
+                break
+            target = targets[target]
+        # Links to directories or outside of the tree are not followed
+        if target in blobs:
+            resolved[link_path] = blobs[target]
+    return resolved
+
+
+def get_blobs_at_commit(
+    repo_path: str, commit_hash: str, workflow_only: bool = True
+) -> Dict[str, str]:
+    """
+    Get the files at a specific commit with their blob hashes.
+
+    Args:
+        repo_path: Path to the git repository
+        commit_hash: Git commit hash
+        workflow_only: If True, only include workflow language files
+
+    Returns:
+        Dictionary mapping file paths relative to the repository root to
+        blob hashes, in tree order, or an empty dictionary if the tree
+        cannot be listed; symbolic links are left out
+    """
+    try:
+        blobs = _ls_tree(repo_path, commit_hash)[0]
+    except ValueError:
+        return {}
+    if not workflow_only:
+        return blobs
+    return {
+        file_path: blob
+        for file_path, blob in blobs.items()
+        if is_workflow_file(file_path)
+    }
+
+
 def get_files_at_commit(
     repo_path: str, commit_hash: str, workflow_only: bool = True
 ) -> List[str]:
@@ -74,22 +316,181 @@ def get_files_at_commit(
     Returns:
         List of file paths relative to the repository root
     """
-    try:
-        result = subprocess.run(
-            ["git", "-C", repo_path, "ls-tree", "-r", "--name-only", commit_hash],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=False,
-        )
-        if result.returncode == 0:
-            files = result.stdout.strip().split("\n")
-            if workflow_only:
-                files = [f for f in files if is_workflow_file(f)]
-            return files
-        return []
-    except subprocess.SubprocessError:
-        return []
+    return list(get_blobs_at_commit(repo_path, commit_hash, workflow_only))
+
+
+class BlobCounter:
+    """
+    Line counter for git blobs, memoized per blob hash and language.
+
+    A blob shared by several paths or commits is read and counted once.
+    """
+
+    def __init__(self, reader: GitObjectReader) -> None:
+        """
+        Initialize the counter.
+
+        Args:
+            reader: Reader of the repository's objects
+        """
+        self._reader = reader
+        self._counts: Dict[Tuple[str, LanguageSpec], Dict[str, int]] = {}
+
+    def counts(self, blob_hash: str, file_path: str) -> Dict[str, int]:
+        """
+        Count the lines of a blob.
+
+        Args:
+            blob_hash: Hash of the blob
+            file_path: Path of the blob, used to resolve its language
+
+        Returns:
+            Dictionary with line counts, or an empty dictionary if the blob
+            cannot be read
+        """
+        spec = REGISTRY.resolve(file_path)
+        key = (blob_hash, spec)
+        counts = self._counts.get(key)
+        if counts is None:
+            content = self._reader.read_object(blob_hash)
+            if content is None:
+                counts = {}
+            else:
+                counts = analyze_file(
+                    file_path, content, spec=spec, workflow_only=False
+                ).counts()
+            self._counts[key] = counts
+        else:
+            STATS.count("blob_cache_hits")
+        return counts
+
+
+def _load_tree_ignore_files(
+    reader: GitObjectReader,
+    blobs: Dict[str, str],
+    repo_path: str,
+    working_dir: Optional[str] = None,
+) -> IgnorePatterns:
+    """
+    Load the ignore patterns that apply to a git tree.
+
+    Global patterns and those of the current directory are loaded like for a
+    directory scan, followed by the .mudagignore files stored in the tree.
+
+    Args:
+        reader: Reader of the repository's objects
+        blobs: Files of the tree, as returned by _ls_tree
+        repo_path: Path to the git repository, whose tree paths are checked
+        working_dir: Directory whose .mudagignore applies as the current
+            directory's (default: the current directory)
+
+    Returns:
+        Ignore patterns for paths relative to the repository root
+    """
+    ignore_patterns = IgnorePatterns(working_dir, repo_path)
+    ignore_files = [
+        file_path for file_path in blobs if file_path.rpartition("/")[2] == IGNORE_FILE
+    ]
+
+    # Parents before children, so deeper files extend their parents' rules
+    for file_path in sorted(ignore_files, key=lambda path: path.count("/")):
+        content = reader.read_object(blobs[file_path])
+        if content is None:
+            continue
+        try:
+            patterns = parse_patterns(content.decode("utf-8").splitlines())
+        except UnicodeDecodeError as e:
+            print(f"Error reading ignore file {file_path}: {e}")
+            continue
+        STATS.count("ignore_files")
+        ignore_patterns.add_patterns(patterns, file_path.rpartition("/")[0])
+    return ignore_patterns
+
+
+def iter_scan_revision(
+    repo_path: str,
+    rev: str = "HEAD",
+    relative_to: Optional[str] = None,
+    working_dir: Optional[str] = None,
+) -> Iterator[FileResult]:
+    """
+    Scan the tree of a revision without checking it out.
+
+    The tree is listed with a single `git ls-tree` call and the workflow
+    files are read through one `git cat-file --batch` process, so bare
+    repositories can be analyzed and the working tree is never touched.
+    Files are counted from memory with the same rules as count_lines, and
+    .mudagignore files in the tree apply as they would in a checkout.
+    Identical blobs are counted once. Symbolic links to files of the tree
+    are counted with the contents of their targets, like a directory scan
+    does; links to directories or outside of the tree are skipped.
+
+    Args:
+        repo_path: Path to the git repository, which may be bare
+        rev: Revision to analyze
+        relative_to: Base directory of the results' relative paths (default:
+            the current directory)
+        working_dir: Directory whose .mudagignore applies as the current
+            directory's (default: the current directory)
+
+    Yields:
+        Result of each workflow file in tree order, i.e. sorted by path, with
+        the paths the file would have in a checkout
+
+    Raises:
+        ValueError: If the revision's tree cannot be listed
+    """
+    blobs, links = _ls_tree(repo_path, rev)
+    prefix = _relative_prefix(repo_path, relative_to)
+
+    with GitObjectReader(repo_path) as reader:
+        if links:
+            blobs.update(_resolve_links(reader, blobs, links))
+            blobs = dict(sorted(blobs.items()))
+        ignore_patterns = _load_tree_ignore_files(reader, blobs, repo_path, working_dir)
+        counter = BlobCounter(reader)
+
+        for file_path, blob in blobs.items():
+            spec = REGISTRY.resolve(file_path)
+            if not spec.is_workflow or ignore_patterns.is_ignored(file_path, False):
+                continue
+
+            counts = counter.counts(blob, file_path)
+            if not counts:
+                print(f"Error reading file {rev}:{file_path}")
+                counts = {"code": 0, "comment": 0, "blank": 0, "error": 1}
+
+            native_path = file_path.replace("/", os.sep)
+            yield FileResult.from_counts(
+                os.path.join(repo_path, native_path),
+                spec.name,
+                counts,
+                prefix + native_path,
+            )
+
+
+def scan_revision(
+    repo_path: str, rev: str = "HEAD", relative_to: Optional[str] = None
+) -> ScanResult:
+    """
+    Scan the tree of a revision and count lines in workflow language files.
+
+    Args:
+        repo_path: Path to the git repository, which may be bare
+        rev: Revision to analyze
+        relative_to: Base directory of the results' relative paths (default:
+            the current directory)
+
+    Returns:
+        Column-oriented results with the same records as a scan of a
+        checkout of the revision, in tree order rather than traversal order
+
+    Raises:
+        ValueError: If the revision's tree cannot be listed
+    """
+    results = ScanResult()
+    results.extend(iter_scan_revision(repo_path, rev, relative_to))
+    return results
 
 
 def compare_commits(
@@ -119,71 +520,301 @@ def compare_commits(
     if not is_git_repo(repo_path):
         raise ValueError(f"{repo_path} is not a git repository")
 
-    # Get files at both commits
-    files1 = get_files_at_commit(repo_path, commit1, workflow_only)
-    files2 = get_files_at_commit(repo_path, commit2, workflow_only)
+    # Get files and their blob hashes at both commits
+    blobs1 = get_blobs_at_commit(repo_path, commit1, workflow_only)
+    blobs2 = get_blobs_at_commit(repo_path, commit2, workflow_only)
 
     # Filter excluded directories
-    files1 = [f for f in files1 if not any(d in f.split(os.sep) for d in exclude_dirs)]
-    files2 = [f for f in files2 if not any(d in f.split(os.sep) for d in exclude_dirs)]
-
-    # Get all unique files
-    all_files = set(files1) | set(files2)
+    excluded = set(exclude_dirs)
+    all_files = [
+        f
+        for f in sorted(set(blobs1) | set(blobs2))
+        if excluded.isdisjoint(f.split("/"))
+    ]
 
     results = {}
 
-    # Compare each file
-    for file_path in all_files:
-        # Get file content at both commits
-        content1 = get_file_from_commit(repo_path, commit1, file_path)
-        content2 = get_file_from_commit(repo_path, commit2, file_path)
-
-        # Count lines in temporary files
-        counts1 = {}
-        counts2 = {}
-
-        if content1 is not None:
-            with tempfile.NamedTemporaryFile("w", delete=False) as temp1:
-                temp1.write(content1)
-                temp1_path = temp1.name
-
-            try:
-                counts1 = count_lines(temp1_path)
-            finally:
-                os.unlink(temp1_path)
-
-        if content2 is not None:
-            with tempfile.NamedTemporaryFile("w", delete=False) as temp2:
-                temp2.write(content2)
-                temp2_path = temp2.name
-
-            try:
-                counts2 = count_lines(temp2_path)
-            finally:
-                os.unlink(temp2_path)
-
-        # Calculate differences
-        diff = {
-            "code": counts2.get("code", 0) - counts1.get("code", 0),
-            "comment": counts2.get("comment", 0) - counts1.get("comment", 0),
-            "blank": counts2.get("blank", 0) - counts1.get("blank", 0),
-            "total": counts2.get("total", 0) - counts1.get("total", 0),
-            "commit1": {
-                "code": counts1.get("code", 0),
-                "comment": counts1.get("comment", 0),
-                "blank": counts1.get("blank", 0),
-                "total": counts1.get("total", 0),
-            },
-            "commit2": {
-                "code": counts2.get("code", 0),
-                "comment": counts2.get("comment", 0),
-                "blank": counts2.get("blank", 0),
-                "total": counts2.get("total", 0),
-            },
-        }
-
-        # Only include files with differences
-        if diff["total"] != 0:
-            results[file_path] = diff
+    with GitObjectReader(repo_path) as reader:
+        counter = BlobCounter(reader)
+        for file_path in all_files:
+            blob1 = blobs1.get(file_path)
+            blob2 = blobs2.get(file_path)
+
+            # Identical blobs cannot differ, so they are neither read nor counted
+            if blob1 == blob2:
+                continue
+
+            counts1 = counter.counts(blob1, file_path) if blob1 else {}
+            counts2 = counter.counts(blob2, file_path) if blob2 else {}
+            diff = _diff_counts(counts1, counts2)
+
+            # Only include files with differences
+            if diff["total"] != 0:
+                results[file_path] = diff
 
     return results
+
+
+def _diff_counts(counts1: Dict[str, int], counts2: Dict[str, int]) -> Dict:
+    """
+    Compute the differences between the line counts of two file versions.
+
+    Args:
+        counts1: Line counts at the first commit, empty if the file is missing
+        counts2: Line counts at the second commit, empty if the file is missing
+
+    Returns:
+        Dictionary with the differences and the counts at both commits
+    """
+    # Calculate differences
+    diff = {
+        "code": counts2.get("code", 0) - counts1.get("code", 0),
+        "comment": counts2.get("comment", 0) - counts1.get("comment", 0),
+        "blank": counts2.get("blank", 0) - counts1.get("blank", 0),
+        "total": counts2.get("total", 0) - counts1.get("total", 0),
+        "commit1": {
+            "code": counts1.get("code", 0),
+            "comment": counts1.get("comment", 0),
+            "blank": counts1.get("blank", 0),
+            "total": counts1.get("total", 0),
+        },
+        "commit2": {
+            "code": counts2.get("code", 0),
+            "comment": counts2.get("comment", 0),
+            "blank": counts2.get("blank", 0),
+            "total": counts2.get("total", 0),
+        },
+    }
+
+    return diff
+
+
+class HistoryPoint(NamedTuple):
+    """Line counts of a repository at one commit."""
+
+    commit: str
+    timestamp: int
+    languages: Dict[str, Dict[str, int]]
+
+
+# Changed paths of a commit with their new blob hashes (None if deleted)
+_Changes = List[Tuple[str, Optional[str]]]
+
+
+def _iter_log(
+    repo_path: str, rev: str, since: Optional[str], until: Optional[str]
+) -> Iterator[Tuple[str, int, _Changes]]:
+    """
+    Walk the first-parent history of a revision with a single `git log` call.
+
+    Args:
+        repo_path: Path to the git repository
+        rev: Revision whose history is walked
+        since: Only include commits more recent than this date
+        until: Only include commits older than this date
+
+    Yields:
+        (commit hash, commit timestamp, changes against the first parent)
+        tuples, oldest commit first
+
+    Raises:
+        ValueError: If git log fails
+    """
+    command = [
+        "git",
+        "-C",
+        repo_path,
+        "log",
+        "--first-parent",
+        "-m",
+        "--reverse",
+        "--raw",
+        "-z",
+        "--no-renames",
+        "--no-abbrev",
+        "--format=%x01%H %ct",
+    ]
+    if since:
+        command.append(f"--since={since}")
+    if until:
+        command.append(f"--until={until}")
+    command.extend([rev, "--"])
+
+    result = _run(command, check=False)
+    if result.returncode != 0:
+        raise ValueError(result.stderr.decode("utf-8", "replace").strip())
+
+    # Commits: "\x01<hash> <timestamp>\0", each followed by its raw diff
+    # entries ":<old mode> <new mode> <old hash> <new hash> <status>\0<path>\0"
+    commit = None
+    timestamp = 0
+    changes: _Changes = []
+    tokens = iter(result.stdout.split(b"\0"))
+    for token in tokens:
+        token = token.lstrip(b"\n")
+        if token.startswith(b"\x01"):
+            if commit is not None:
+                yield commit, timestamp, changes
+            commit_hash, commit_time = token[1:].split()
+            commit = commit_hash.decode("ascii")
+            timestamp = int(commit_time)
+            changes = []
+        elif token.startswith(b":"):
+            _, new_mode, _, new_hash, status = token[1:].split()
+            path = next(tokens).decode("utf-8", "surrogateescape")
+            # Deleted files, submodules and symbolic links have no counted blob
+            deleted = status == b"D" or new_mode in (b"160000", _SYMLINK_MODE)
+            changes.append((path, None if deleted else new_hash.decode("ascii")))
+
+    if commit is not None:
+        yield commit, timestamp, changes
+
+
+def iter_history(
+    repo_path: str,
+    rev: str = "HEAD",
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    every: int = 1,
+    exclude_dirs: Optional[List[str]] = None,
+    workflow_only: bool = True,
+) -> Iterator[HistoryPoint]:
+    """
+    Compute per-language line counts along the first-parent history.
+
+    The history is read with a single `git log` call. Only the first
+    commit's tree is listed in full; afterwards each sampled commit only
+    recounts the blobs changed since the previous sample and carries the
+    running totals forward. Blob counts are memoized across commits, so the
+    cost grows with the number of changed blobs rather than with the number
+    of commits times the number of files.
+
+    Args:
+        repo_path: Path to the git repository
+        rev: Revision whose history is analyzed
+        since: Only include commits more recent than this date
+        until: Only include commits older than this date
+        every: Sample every N-th commit; the last commit is always sampled
+        exclude_dirs: List of directory names to exclude
+        workflow_only: If True, only analyze workflow language files
+
+    Yields:
+        Line counts of the sampled commits, oldest first
+
+    Raises:
+        ValueError: If the path is not a git repository or the history
+            cannot be read
+    """
+    if exclude_dirs is None:
+        exclude_dirs = [".git", "__pycache__", "node_modules", "venv", "env"]
+    excluded = set(exclude_dirs)
+
+    if not is_git_repo(repo_path):
+        raise ValueError(f"{repo_path} is not a git repository")
+
+    def tracked(file_path: str) -> bool:
+        """
+        Check whether a file is part of the time series.
+
+        Args:
+            file_path: Path relative to the repository root
+
+        Returns:
+            True if the file is counted
+        """
+        return (
+            not workflow_only or is_workflow_file(file_path)
+        ) and excluded.isdisjoint(file_path.split("/"))
+
+    # Blobs of the current commit, blobs included in the totals, and paths
+    # changed since the last sample
+    blobs: Dict[str, str] = {}
+    counted: Dict[str, str] = {}
+    dirty: Set[str] = set()
+    totals: Dict[str, Dict[str, int]] = {}
+
+    with GitObjectReader(repo_path) as reader:
+        counter = BlobCounter(reader)
+
+        def sample(commit: str, timestamp: int) -> HistoryPoint:
+            """
+            Bring the totals up to date with the current commit.
+
+            Args:
+                commit: Hash of the current commit
+                timestamp: Commit time as a Unix timestamp
+
+            Returns:
+                Data point of the commit
+            """
+            for file_path in dirty:
+                old_blob = counted.get(file_path)
+                new_blob = blobs.get(file_path)
+                if old_blob == new_blob:
+                    continue
+                language = REGISTRY.resolve(file_path).name
+                stats = totals.setdefault(
+                    language,
+                    {"files": 0, "code": 0, "comment": 0, "blank": 0, "total": 0},
+                )
+                if old_blob is not None:
+                    _add_counts(stats, counter.counts(old_blob, file_path), -1)
+                    del counted[file_path]
+                if new_blob is not None:
+                    _add_counts(stats, counter.counts(new_blob, file_path), 1)
+                    counted[file_path] = new_blob
+            dirty.clear()
+
+            languages = {
+                language: dict(stats)
+                for language, stats in sorted(totals.items())
+                if stats["files"] > 0
+            }
+            return HistoryPoint(commit, timestamp, languages)
+
+        pending = None
+        for index, (commit, timestamp, changes) in enumerate(
+            _iter_log(repo_path, rev, since, until)
+        ):
+            if index == 0:
+                # The history may start after the root commit
+                blobs = {
+                    file_path: blob
+                    for file_path, blob in get_blobs_at_commit(
+                        repo_path, commit, workflow_only=False
+                    ).items()
+                    if tracked(file_path)
+                }
+                dirty.update(blobs)
+            else:
+                for file_path, blob in changes:
+                    if not tracked(file_path):
+                        continue
+                    if blob is None:
+                        blobs.pop(file_path, None)
+                    else:
+                        blobs[file_path] = blob
+                    dirty.add(file_path)
+
+            if index % every == 0:
+                yield sample(commit, timestamp)
+                pending = None
+            else:
+                pending = (commit, timestamp)
+
+        if pending is not None:
+            yield sample(*pending)
+
+
+def _add_counts(stats: Dict[str, int], counts: Dict[str, int], sign: int) -> None:
+    """
+    Add or subtract the line counts of a file to per-language statistics.
+
+    Args:
+        stats: Statistics dictionary of the file's language
+        counts: Line counts of the file
+        sign: 1 to add the file, -1 to subtract it
+    """
+    stats["files"] += sign
+    for key in ("code", "comment", "blank", "total"):
+        stats[key] += sign * counts.get(key, 0)
@@ -1,91 +1,490 @@
 """Module for handling ignore patterns (similar to .gitignore)."""
 
+import functools
 import os
-import fnmatch
+import re
+import time
 from pathlib import Path
-from typing import List, Pattern
+from typing import Dict, Iterable, List, Optional, Pattern, Set, Tuple
+
+from .instrumentation import STATS
+
+# Name of the ignore files
+IGNORE_FILE = ".mudagignore"
+
+
+def _translate_segment(segment: str) -> str:
+    """
+    Translate one path segment of a glob pattern into a regular expression.
+
+    Args:
+        segment: Pattern segment without slashes
+
+    Returns:
+        Regular expression matching the segment
+    """
+    parts = []
+    i = 0
+    while i < len(segment):
+        char = segment[i]
+        if char == "*":
+            # Consecutive stars within a segment behave like a single one
+            while i + 1 < len(segment) and segment[i + 1] == "*":
+                i += 1
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            # Find the end of the character class; "]" right after the
+            # opening bracket (or its negation) is a literal
+            end = i + 1
+            if end < len(segment) and segment[end] in "!^":
+                end += 1
+            if end < len(segment) and segment[end] == "]":
+                end += 1
+            end = segment.find("]", end)
+            if end < 0:
+                parts.append(re.escape(char))
+            else:
+                content = segment[i + 1 : end].replace("\\", "\\\\")
+                if content[:1] in ("!", "^"):
+                    content = "^" + content[1:]
+                parts.append(f"[{content}]")
+                i = end
+        elif char == "\\" and i + 1 < len(segment):
+            i += 1
+            parts.append(re.escape(segment[i]))
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return "".join(parts)
+
+
+def translate_pattern(pattern: str) -> Optional[Tuple[str, bool, bool, bool]]:
+    """
+    Translate an ignore pattern into a regular expression.
+
+    Patterns follow .gitignore semantics: a leading "!" negates the pattern,
+    a trailing "/" only matches directories, a pattern containing a slash is
+    anchored to the directory of the ignore file (otherwise it matches at any
+    depth), and "**" matches any number of directories.
+
+    Args:
+        pattern: Ignore pattern
+
+    Returns:
+        (regular expression, negated, directory only, anchored) tuple, or None
+        if the pattern cannot match anything. The regular expression of an
+        unanchored pattern matches the last path component only.
+    """
+    negate = False
+    if pattern.startswith("!"):
+        negate = True
+        pattern = pattern[1:]
+    elif pattern.startswith(("\\!", "\\#")):
+        pattern = pattern[1:]
+
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    if not pattern:
+        return None
+
+    segments = pattern.split("/")
+    regex = ""
+    for i, segment in enumerate(segments):
+        last = i == len(segments) - 1
+        if segment == "**":
+            regex += ".*" if last else "(?:.*/)?"
+        else:
+            regex += _translate_segment(segment) + ("" if last else "/")
+
+    return regex, negate, dir_only, anchored
+
+
+class _RuleGroup:
+    """Consecutive patterns with the same kind, combined into one regex."""
+
+    def __init__(
+        self, regexes: List[str], negate: bool, dir_only: bool, anchored: bool
+    ) -> None:
+        """
+        Compile a group of translated patterns.
+
+        Args:
+            regexes: Regular expressions of the patterns
+            negate: Whether the patterns re-include matching paths
+            dir_only: Whether the patterns only match directories
+            anchored: Whether the patterns match the whole relative path
+                rather than the last path component
+        """
+        self.regex = re.compile("|".join(f"(?:{r})" for r in regexes), re.DOTALL)
+        self.negate = negate
+        self.dir_only = dir_only
+        self.anchored = anchored
+
+
+class _RuleSet:
+    """Compiled patterns of one ignore file, relative to its directory."""
+
+    def __init__(self, patterns: List[str], base: str = "", prefix: str = "") -> None:
+        """
+        Compile the patterns of an ignore file.
+
+        Args:
+            patterns: Patterns in file order
+            base: Normalized path of the ignore file's directory relative to
+                the walked directory, with a trailing "/", or "" for the root
+            prefix: Normalized path of the walked directory relative to the
+                ignore file's directory, with a trailing "/", for ignore files
+                outside the walked tree; "" otherwise
+        """
+        self.base = base
+        self.prefix = prefix
+        self.regex_patterns: List[Pattern] = []
+        self.groups: List[_RuleGroup] = []
+
+        current: List[str] = []
+        current_kind: Optional[Tuple[bool, bool, bool]] = None
+        for pattern in patterns:
+            translated = translate_pattern(pattern)
+            if translated is None:
+                continue
+            regex, negate, dir_only, anchored = translated
+            self.regex_patterns.append(re.compile(regex, re.DOTALL))
+
+            # Group consecutive patterns of the same kind
+            if current and (negate, dir_only, anchored) != current_kind:
+                self.groups.append(_RuleGroup(current, *current_kind))
+                current = []
+            current.append(regex)
+            current_kind = (negate, dir_only, anchored)
+
+        if current:
+            self.groups.append(_RuleGroup(current, *current_kind))
+
+    def match(self, path: str, is_dir: Optional[bool]) -> Optional[bool]:
+        """
+        Match a path against the patterns of this file.
+
+        Args:
+            path: Normalized path relative to the walked directory
+            is_dir: Whether the path is a directory, or None if unknown
+
+        Returns:
+            True if the last matching pattern ignores the path, False if it
+            re-includes the path, or None if no pattern matches
+        """
+        if self.base:
+            if not path.startswith(self.base):
+                return None
+            path = path[len(self.base) :]
+        elif self.prefix:
+            path = self.prefix + path
+        basename = path.rpartition("/")[2]
+
+        # The last matching pattern decides
+        for group in reversed(self.groups):
+            if group.dir_only and is_dir is False:
+                continue
+            if group.regex.fullmatch(path if group.anchored else basename):
+                return not group.negate
+        return None
+
+
+# Rule sets in increasing order of precedence
+_RuleStack = Tuple[_RuleSet, ...]
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_rule_set(
+    patterns: Tuple[str, ...], base: str = "", prefix: str = ""
+) -> _RuleSet:
+    """
+    Compile the patterns of an ignore file, reusing earlier compilations.
+
+    Rule sets are never modified after they are built, so walks in the same
+    process share them; this keeps repeated scans of a tree from compiling
+    its ignore files again.
+
+    Args:
+        patterns: Patterns in file order
+        base: Normalized path of the ignore file's directory with a trailing
+            "/", or "" for the root
+        prefix: Normalized path of the walked directory relative to the
+            ignore file's directory with a trailing "/", or ""
+
+    Returns:
+        Compiled rule set
+    """
+    return _RuleSet(list(patterns), base, prefix)
+
+
+def _normalize(path: str) -> str:
+    """
+    Normalize a relative path to "/" separators without leading or trailing slashes.
+
+    Args:
+        path: Path to normalize
+
+    Returns:
+        Normalized path, or "" for the walked directory itself
+    """
+    path = os.path.normpath(path)
+    if os.sep != "/":
+        path = path.replace(os.sep, "/")
+    path = path.strip("/")
+    return "" if path == "." else path
+
+
+def parse_patterns(lines: Iterable[str]) -> List[str]:
+    """
+    Parse the lines of an ignore file.
+
+    Args:
+        lines: Lines of the ignore file
+
+    Returns:
+        Patterns in file order, without empty lines and comments
+    """
+    patterns = []
+    for line in lines:
+        line = line.strip()
+        # Skip empty lines and comments
+        if line and not line.startswith("#"):
+            patterns.append(line)
+    return patterns
 
 
 class IgnorePatterns:
     """Class for handling ignore patterns."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self, working_dir: Optional[str] = None, directory: Optional[str] = None
+    ) -> None:
         """
         Initialize ignore patterns from .mudagignore files.
         Automatically looks for .mudagignore in the current directory and user's home directory.
+        Patterns of the current directory take precedence over global ones.
+        Ignore files found while walking a tree are added with load_directory.
+
+        Anchored patterns of these files are relative to the current
+        directory, so paths within a walked subdirectory are matched with
+        the subdirectory's path in front.
+
+        Args:
+            working_dir: Directory used as the current directory, e.g. the
+                client's in a server (default: the current directory)
+            directory: Directory whose relative paths are checked, e.g. the
+                walked directory (default: the working directory)
         """
         self.patterns: List[str] = []
         self._regex_patterns: List[Pattern] = []
+        self._loaded_files: Set[str] = set()
+        self._stacks: Dict[str, _RuleStack] = {}
+        self._dir_cache: Dict[str, bool] = {}
+        self._has_rules = False
 
-        # Look for .mudagignore in the current directory
-        current_dir_ignore = ".mudagignore"
-        if os.path.isfile(current_dir_ignore):
-            self._load_ignore_file(current_dir_ignore)
+        working_dir = working_dir or os.curdir
+        try:
+            self._prefix = _normalize(
+                os.path.relpath(directory or working_dir, working_dir)
+            )
+        except ValueError:
+            # No relative path exists, e.g. across Windows drives
+            self._prefix = ""
+        if self._prefix:
+            self._prefix += "/"
 
         # Look for global .mudagignore in user's home directory
         home_dir = Path.home()
-        global_ignore = os.path.join(home_dir, ".mudagignore")
+        global_ignore = os.path.join(home_dir, IGNORE_FILE)
         if os.path.isfile(global_ignore):
             self._load_ignore_file(global_ignore)
 
-    def _load_ignore_file(self, ignore_file: str) -> None:
+        # Look for .mudagignore in the current directory
+        local_ignore = os.path.join(working_dir, IGNORE_FILE)
+        if os.path.isfile(local_ignore):
+            self._load_ignore_file(local_ignore)
+
+        self._compile()
+
+    def _read_ignore_file(self, ignore_file: str) -> List[str]:
         """
-        Load ignore patterns from a file.
+        Read the patterns of an ignore file once.
 
         Args:
             ignore_file: Path to the ignore file
+
+        Returns:
+            Patterns of the file, or an empty list if it was already read
         """
+        real_path = os.path.realpath(ignore_file)
+        if real_path in self._loaded_files:
+            return []
+        self._loaded_files.add(real_path)
+        STATS.count("ignore_files")
+
         try:
             with open(ignore_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    # Skip empty lines and comments
-                    if line and not line.startswith("#"):
-                        self.patterns.append(line)
-
-                        # We'll handle the pattern matching in is_ignored method
-                        # Store the raw pattern for now
-                        self._regex_patterns.append(line)
+                return parse_patterns(f)
         except (IOError, UnicodeDecodeError) as e:
             print(f"Error reading ignore file {ignore_file}: {e}")
+            return []
+
+    def _load_ignore_file(self, ignore_file: str) -> None:
+        """
+        Load ignore patterns from a file.
+
+        Args:
+            ignore_file: Path to the ignore file
+        """
+        self.patterns.extend(self._read_ignore_file(ignore_file))
+
+    def _compile(self) -> None:
+        """Compile the patterns into combined regular expressions."""
+        root = _compile_rule_set(tuple(self.patterns), "", self._prefix)
+        self._regex_patterns = list(root.regex_patterns)
+        self._stacks = {"": (root,) if root.groups else ()}
+        self._dir_cache = {}
+        self._has_rules = bool(root.groups)
+
+    def load_directory(self, dir_path: str, rel_path: str) -> None:
+        """
+        Load the .mudagignore file of a directory being walked.
+
+        The directory's rule stack extends the stack of its parent, so its
+        patterns take precedence over those of the enclosing directories.
+        Stacks are immutable and built once per directory; the parent must
+        be loaded first.
+
+        Args:
+            dir_path: Path to the directory
+            rel_path: Path of the directory relative to the walked directory
+        """
+        rel_path = _normalize(rel_path)
+        if rel_path and rel_path in self._stacks:
+            return
+        self.add_patterns(
+            self._read_ignore_file(os.path.join(dir_path, IGNORE_FILE)), rel_path
+        )
+
+    def add_patterns(self, patterns: List[str], rel_path: str) -> None:
+        """
+        Add the patterns of an ignore file in a directory of the walked tree.
+
+        This is used for ignore files that are not read from disk, such as
+        those stored in a git tree. Like with load_directory, the parent
+        directory must be added first, and each directory is added once.
+
+        Args:
+            patterns: Patterns of the ignore file
+            rel_path: Path of the ignore file's directory relative to the
+                walked directory
+        """
+        rel_path = _normalize(rel_path)
+        if not rel_path:
+            stack = self._stacks[""]
+        elif rel_path in self._stacks:
+            return
+        else:
+            stack = self._stack_for(rel_path.rpartition("/")[0])
+
+        if patterns:
+            rule_set = _compile_rule_set(
+                tuple(patterns), rel_path + "/" if rel_path else ""
+            )
+            if rule_set.groups:
+                stack = stack + (rule_set,)
+                self._has_rules = True
+        self._stacks[rel_path] = stack
+
+    def _stack_for(self, rel_dir: str) -> _RuleStack:
+        """
+        Get the rule stack applying to the entries of a directory.
+
+        Args:
+            rel_dir: Normalized path of the directory
 
-    def is_ignored(self, path: str) -> bool:
+        Returns:
+            Rule stack of the closest loaded directory
+        """
+        stack = self._stacks.get(rel_dir)
+        while stack is None:
+            rel_dir = rel_dir.rpartition("/")[0]
+            stack = self._stacks.get(rel_dir)
+        return stack
+
+    def _match(self, path: str, is_dir: Optional[bool], parent: str) -> bool:
+        """
+        Match a path against the patterns, ignoring its parent directories.
+
+        Args:
+            path: Normalized path with "/" separators
+            is_dir: Whether the path is a directory, or None if unknown
+            parent: Normalized path of the parent directory
+
+        Returns:
+            True if the last matching pattern ignores the path
+        """
+        # Deeper ignore files take precedence
+        for rule_set in reversed(self._stack_for(parent)):
+            ignored = rule_set.match(path, is_dir)
+            if ignored is not None:
+                return ignored
+        return False
+
+    def _is_dir_ignored(self, path: str) -> bool:
+        """
+        Check if a directory or any of its parents is ignored.
+
+        Verdicts are cached per directory, so the children of a directory
+        only cost one dictionary lookup for their parents.
+
+        Args:
+            path: Normalized directory path with "/" separators
+
+        Returns:
+            True if the directory is ignored
+        """
+        ignored = self._dir_cache.get(path)
+        if ignored is None:
+            parent = path.rpartition("/")[0]
+            ignored = (bool(parent) and self._is_dir_ignored(parent)) or self._match(
+                path, True, parent
+            )
+            self._dir_cache[path] = ignored
+        return ignored
+
+    def is_ignored(self, path: str, is_dir: Optional[bool] = None) -> bool:
         """
         Check if a path matches any ignore pattern.
 
         Args:
             path: Path to check (either absolute or relative)
+            is_dir: Whether the path is a directory; if None, directory-only
+                patterns also match the path itself
 
         Returns:
             True if the path should be ignored, False otherwise
         """
+        if not self._has_rules:
+            return False
+
+        start = time.perf_counter()
         # Always use normalized path
-        path = os.path.normpath(path)
-
-        # Check each pattern
-        for pattern in self.patterns:
-            # Handle directory patterns (ending with /)
-            if pattern.endswith("/"):
-                dir_name = pattern[:-1]  # Remove the trailing slash
-
-                # Check if path is the directory or is inside this directory
-                # Need to handle both "dir/" and "path/to/dir/"
-                if (
-                    path == dir_name  # Exact match
-                    or path.startswith(
-                        f"{dir_name}/"
-                    )  # Path is inside this directory directly
-                    or f"/{dir_name}/" in f"/{path}/"  # Path contains this directory
-                    or path.endswith(f"/{dir_name}")
-                ):  # Path ends with this directory
-                    return True
+        path = _normalize(path)
+        if not path:
+            ignored = False
+        else:
+            parent = path.rpartition("/")[0]
+            if parent and self._is_dir_ignored(parent):
+                ignored = True
+            elif is_dir:
+                ignored = self._is_dir_ignored(path)
             else:
-                # Regular file pattern
-                # Check against the full path and the basename
-                basename = os.path.basename(path)
-
-                # Use fnmatch for glob-style matching
-                if fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(basename, pattern):
-                    return True
+                ignored = self._match(path, is_dir, parent)
 
-        return False
+        STATS.add_time("ignore", time.perf_counter() - start)
+        return ignored
@@ -0,0 +1,262 @@
+"""Module for collecting timings and counters of the analysis phases."""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+# Descriptions of the phases and counters, in report order
+PHASES = {
+    "walk": "Traversing directories, including ignore matching",
+    "ignore": "Matching ignore patterns",
+    "count": "Reading files and classifying lines",
+    "cache": "Looking up and storing cached results",
+    "git": "Running git and reading objects",
+    "format": "Formatting output",
+}
+COUNTERS = {
+    "dirs_walked": "Directories listed",
+    "files_seen": "Files found that are not ignored",
+    "paths_ignored": "Files and directories skipped by ignore patterns",
+    "ignore_files": "Ignore files loaded",
+    "files_counted": "Files whose lines were counted",
+    "bytes_read": "Bytes of file contents classified",
+    "read_errors": "Files that could not be read or decoded",
+    "cache_hits": "Results taken from the result cache",
+    "cache_misses": "Results missing from the result cache",
+    "subprocesses": "Subprocesses started",
+    "git_objects": "Objects read from git",
+    "blob_cache_hits": "Blobs counted before at another path or commit",
+    "archive_cache_hits": "Archives whose central directory was parsed before",
+}
+
+
+class Stats:
+    """
+    Timers and counters of one process.
+
+    Timers accumulate the wall time spent in a phase; phases may nest, e.g.
+    ignore matching is part of the walk. Counters are plain integers. Both
+    are cheap enough to stay enabled, so a report is available for any run.
+
+    Updates are not locked unless make_thread_safe is called, since most
+    runs update the statistics from one thread only.
+    """
+
+    def __init__(self) -> None:
+        """Create empty timers and counters."""
+        self.timers: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock: Optional[threading.Lock] = None
+
+    def make_thread_safe(self) -> None:
+        """Lock all further updates, e.g. for the request threads of a server."""
+        if self._lock is None:
+            self._lock = threading.Lock()
+
+    def _locked(self) -> ContextManager[Any]:
+        """
+        Get the context holding the lock, if updates are locked.
+
+        Returns:
+            The lock, or a context that does nothing
+        """
+        return self._lock if self._lock is not None else nullcontext()
+
+    def count(self, name: str, value: int = 1) -> None:
+        """
+        Increase a counter.
+
+        Args:
+            name: Counter name
+            value: Amount to add
+        """
+        if self._lock is None:
+            self.counters[name] = self.counters.get(name, 0) + value
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        """
+        Add time to a phase.
+
+        Args:
+            phase: Phase name
+            seconds: Time in seconds
+        """
+        if self._lock is None:
+            self.timers[phase] = self.timers.get(phase, 0.0) + seconds
+            return
+        with self._lock:
+            self.timers[phase] = self.timers.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, phase: str) -> Iterator[None]:
+        """
+        Time a block of code.
+
+        Args:
+            phase: Phase the time is added to
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - start)
+
+    def timed(self, phase: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+        """
+        Create a decorator that times every call of a function.
+
+        Args:
+            phase: Phase the time is added to
+
+        Returns:
+            Decorator
+        """
+
+        def decorator(function: Callable[..., T]) -> Callable[..., T]:
+            """
+            Wrap a function in the phase timer.
+
+            Args:
+                function: Function to time
+
+            Returns:
+                Wrapped function
+            """
+
+            @functools.wraps(function)
+            def wrapper(*args: Any, **kwargs: Any) -> T:
+                """Call the function and add its run time to the phase."""
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.add_time(phase, time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    def timed_iter(self, phase: str, items: Iterable[T]) -> Iterator[T]:
+        """
+        Time the production of the items of an iterator.
+
+        Only the time spent producing items is counted, not the time the
+        consumer spends between them.
+
+        Args:
+            phase: Phase the time is added to
+            items: Items to time
+
+        Yields:
+            The items
+        """
+        iterator = iter(items)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_time(phase, time.perf_counter() - start)
+                return
+            self.add_time(phase, time.perf_counter() - start)
+            yield item
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get a copy of the timers and counters.
+
+        Returns:
+            Dictionary with 'timers' (seconds per phase) and 'counters'
+        """
+        with self._locked():
+            return {"timers": dict(self.timers), "counters": dict(self.counters)}
+
+    def merge(self, snapshot: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Add the timers and counters of another process.
+
+        Args:
+            snapshot: Snapshot as returned by snapshot()
+        """
+        for phase, seconds in snapshot["timers"].items():
+            self.add_time(phase, seconds)
+        for name, value in snapshot["counters"].items():
+            self.count(name, value)
+
+    def reset(self) -> None:
+        """Clear all timers and counters."""
+        with self._locked():
+            self.timers.clear()
+            self.counters.clear()
+
+    def format_report(self, wall_time: float) -> str:
+        """
+        Format the timers and counters as a human-readable report.
+
+        Args:
+            wall_time: Wall time of the whole run in seconds
+
+        Returns:
+            Report text
+        """
+        lines = [f"{'Phase':<10} {'Seconds':>10} {'Share':>7}  Description"]
+        names = list(PHASES) + sorted(set(self.timers) - set(PHASES))
+        for phase in names:
+            if phase in self.timers:
+                seconds = self.timers[phase]
+                share = seconds / wall_time * 100 if wall_time > 0 else 0.0
+                description = PHASES.get(phase, "")
+                lines.append(
+                    f"{phase:<10} {seconds:>10.3f} {share:>6.1f}%  {description}"
+                )
+        lines.append(f"{'total':<10} {wall_time:>10.3f} {100.0:>6.1f}%  Wall time")
+        lines.append("")
+
+        lines.append(f"{'Counter':<16} {'Value':>12}  Description")
+        names = list(COUNTERS) + sorted(set(self.counters) - set(COUNTERS))
+        for name in names:
+            if name in self.counters:
+                description = COUNTERS.get(name, "")
+                lines.append(f"{name:<16} {self.counters[name]:>12}  {description}")
+        return "\n".join(lines) + "\n"
+
+
+# Statistics of the current process
+STATS = Stats()
+
+
+def collect(function: Callable[..., T], *args: Any) -> Tuple[T, Dict[str, Any]]:
+    """
+    Call a function and return the statistics it produced.
+
+    This runs inside worker processes, whose statistics are merged into the
+    parent's with Stats.merge. Workers run one task at a time, so the
+    statistics are reset before each call.
+
+    Args:
+        function: Function to call
+        *args: Arguments of the function
+
+    Returns:
+        (return value, statistics snapshot) tuple
+    """
+    STATS.reset()
+    result = function(*args)
+    return result, STATS.snapshot()
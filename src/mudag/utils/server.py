@@ -0,0 +1,772 @@
+"""Module for serving analyses from a long-running process and querying it."""
+
+import hmac
+import http.client
+import json
+import logging
+import os
+import secrets
+import socket
+import socketserver
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+
+from ..core.analyzer import compare_versions, iter_scan
+from ..core.archives import expand_archive_members
+from ..core.languages import REGISTRY
+from ..core.results import FileResult
+from .cache import DEFAULT_MAX_ENTRIES, MemoryCache, default_cache_dir
+from .git_utils import iter_scan_revision
+from .ignore_patterns import IgnorePatterns
+from .instrumentation import STATS
+from .walker import walk_files
+
+logger = logging.getLogger("mudag")
+
+# Default port of the HTTP server
+DEFAULT_PORT = 8765
+
+# Host names of the loopback interface; TCP requests must name the server by
+# one of them, so pages of other sites cannot reach it through DNS rebinding
+_LOOPBACK_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+# Fields of the file rows returned by the analyze endpoint, in order
+ROW_FIELDS = (
+    "path",
+    "rel_path",
+    "language",
+    "code",
+    "comment",
+    "blank",
+    "total",
+    "error",
+    "metrics",
+)
+
+# (host, port) of a TCP address or path of a Unix socket
+Address = Union[Tuple[str, int], str]
+
+
+class ServerError(Exception):
+    """Error response of the analysis server."""
+
+    def __init__(self, status: int, message: str) -> None:
+        """
+        Create the error.
+
+        Args:
+            status: HTTP status code of the response
+            message: Error message sent by the server
+        """
+        super().__init__(message)
+        self.status = status
+
+
+class _RequestError(Exception):
+    """Invalid request, answered with an error status."""
+
+    def __init__(self, status: int, message: str) -> None:
+        """
+        Create the error.
+
+        Args:
+            status: HTTP status code of the response
+            message: Error message sent to the client
+        """
+        super().__init__(message)
+        self.status = status
+
+
+def default_socket_path() -> str:
+    """
+    Get the Unix socket the server listens on by default.
+
+    Returns:
+        Path of server.sock in the cache directory
+    """
+    return os.path.join(default_cache_dir(), "server.sock")
+
+
+def token_path(port: int) -> str:
+    """
+    Get the file holding the access token of a TCP server.
+
+    Args:
+        port: Port the server listens on
+
+    Returns:
+        Path of the token file in the cache directory
+    """
+    return os.path.join(default_cache_dir(), f"server-{port}.token")
+
+
+def _write_token(path: str) -> str:
+    """
+    Create a random access token in a file readable only by its owner.
+
+    Args:
+        path: Path of the token file; an existing file is replaced
+
+    Returns:
+        The token
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    token = secrets.token_hex(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(token)
+    return token
+
+
+def _read_token(port: int) -> Optional[str]:
+    """
+    Read the access token of the TCP server on a port of this host.
+
+    Args:
+        port: Port of the server
+
+    Returns:
+        The token, or None if no server on the port has written one
+    """
+    try:
+        with open(token_path(port)) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _directory_param(params: Dict[str, Any], name: str = "path") -> str:
+    """
+    Get a directory parameter of a request.
+
+    Args:
+        params: Request parameters
+        name: Parameter name
+
+    Returns:
+        Absolute path of the directory
+
+    Raises:
+        _RequestError: If the parameter is missing, not absolute or not a
+            directory
+    """
+    path = params.get(name)
+    if not isinstance(path, str) or not os.path.isabs(path):
+        raise _RequestError(400, f"'{name}' must be an absolute path")
+    if not os.path.isdir(path):
+        raise _RequestError(404, f"{path} is not a directory")
+    return path
+
+
+class AnalysisService:
+    """
+    State shared by the requests of a server.
+
+    The language registry and the compiled ignore rule sets are cached per
+    process, so they stay warm as long as the service runs. Line counts are
+    kept in a MemoryCache and reused while a file's size and modification
+    time do not change. Each request is counted in the thread handling it,
+    so the number of concurrent requests bounds the CPU use of the server.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        """
+        Create the service.
+
+        Args:
+            max_entries: Maximum number of files in the line count cache
+        """
+        self.cache = MemoryCache(max_entries)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def handle(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Answer a request.
+
+        Args:
+            endpoint: Endpoint name, e.g. 'analyze'
+            params: Request parameters
+
+        Returns:
+            Response data
+
+        Raises:
+            _RequestError: If the request is invalid
+        """
+        with self._lock:
+            self.requests += 1
+        if endpoint == "status":
+            return self.status()
+        elif endpoint == "analyze":
+            return self.analyze(params)
+        elif endpoint == "list-workflows":
+            return self.list_workflows(params)
+        elif endpoint == "compare":
+            return self.compare(params)
+        raise _RequestError(404, f"Unknown endpoint: {endpoint}")
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Describe the state of the service.
+
+        Returns:
+            Process ID, request count and cache statistics
+        """
+        return {
+            "pid": os.getpid(),
+            "requests": self.requests,
+            "cache": {
+                "entries": len(self.cache),
+                "max_entries": self.cache.max_entries,
+                "hits": self.cache.hits,
+                "misses": self.cache.misses,
+            },
+        }
+
+    def analyze(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Analyze a directory or one of its git revisions.
+
+        Paths are returned relative to the analyzed directory, so the client
+        can join them to the directory as it named it. A 'jobs' parameter is
+        ignored: worker processes per request would not be bounded by the
+        number of concurrent requests, and would be forked from a process
+        running several threads.
+
+        Args:
+            params: 'path', and optionally 'rev', 'relative_to', 'working_dir',
+                'follow_symlinks' and 'archive_members'
+
+        Returns:
+            Dictionary with the file rows, whose fields are ROW_FIELDS
+        """
+        directory = _directory_param(params)
+        relative_to = params.get("relative_to")
+        working_dir = params.get("working_dir")
+        rev = params.get("rev")
+
+        if rev is not None:
+            try:
+                records = list(
+                    iter_scan_revision(directory, rev, relative_to, working_dir)
+                )
+            except ValueError as e:
+                raise _RequestError(400, f"Error reading {rev} in {directory}: {e}")
+        else:
+            records = list(
+                iter_scan(
+                    directory,
+                    None,
+                    self.cache,
+                    bool(params.get("follow_symlinks")),
+                    relative_to,
+                    working_dir,
+                )
+            )
+            if params.get("archive_members"):
+                records = list(expand_archive_members(records))
+
+        start = len(os.path.join(directory, ""))
+        return {
+            "files": [
+                [
+                    record.path[start:],
+                    record.rel_path,
+                    record.language,
+                    record.code,
+                    record.comment,
+                    record.blank,
+                    record.total,
+                    record.error,
+                    record.metrics,
+                ]
+                for record in records
+            ]
+        }
+
+    def list_workflows(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        List the workflow files of a directory.
+
+        Args:
+            params: 'path', and optionally 'working_dir' and 'follow_symlinks'
+
+        Returns:
+            Dictionary with the sorted paths relative to the directory
+        """
+        directory = _directory_param(params)
+        ignore_patterns = IgnorePatterns(params.get("working_dir"), directory)
+        files = [
+            rel_path
+            for _, rel_path in walk_files(
+                directory, ignore_patterns, bool(params.get("follow_symlinks"))
+            )
+            if REGISTRY.resolve(rel_path).is_workflow
+        ]
+        return {"files": sorted(files)}
+
+    def compare(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Compare the line counts of two commits.
+
+        Args:
+            params: 'path', 'commit1' and 'commit2'
+
+        Returns:
+            Dictionary with the differences of the changed files
+        """
+        directory = _directory_param(params)
+        commits = [params.get("commit1"), params.get("commit2")]
+        if not all(isinstance(commit, str) for commit in commits):
+            raise _RequestError(400, "'commit1' and 'commit2' are required")
+        try:
+            return {"files": compare_versions(directory, *commits)}
+        except ValueError as e:
+            raise _RequestError(400, str(e))
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler mapping /<endpoint> requests to the service."""
+
+    server: "Union[TCPServer, UnixServer]"
+
+    def do_GET(self) -> None:
+        """Answer a request without parameters, e.g. GET /status."""
+        try:
+            self._authorize()
+        except _RequestError as e:
+            self._send(e.status, {"error": str(e)})
+            return
+        self._respond({})
+
+    def do_POST(self) -> None:
+        """Answer a request whose parameters are a JSON object in the body."""
+        try:
+            self._authorize()
+            content_type = self.headers.get("Content-Type") or ""
+            if content_type.split(";", 1)[0].strip().lower() != "application/json":
+                raise _RequestError(415, "Content-Type must be application/json")
+        except _RequestError as e:
+            self._send(e.status, {"error": str(e)})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            params = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(params, dict):
+                raise ValueError("Request body must be a JSON object")
+        except ValueError as e:
+            self._send(400, {"error": f"Invalid request: {e}"})
+            return
+        self._respond(params)
+
+    def _authorize(self) -> None:
+        """
+        Check that a request comes from a local client of the server's user.
+
+        Requests over TCP must name a loopback host in the Host header and
+        carry the server's token, which only its user can read. Requests over
+        the Unix socket are authorized by the socket's permissions.
+
+        Raises:
+            _RequestError: If the request is not authorized
+        """
+        token = self.server.token
+        if token is None:
+            return
+
+        port = self.server.server_address[1]
+        host = self.headers.get("Host") or ""
+        if host not in self.server.allowed_hosts:
+            raise _RequestError(403, f"Invalid Host header: {host}")
+
+        # Compared in constant time, so the token cannot be guessed by timing
+        authorization = self.headers.get("Authorization") or ""
+        if not hmac.compare_digest(
+            authorization.encode("utf-8"), f"Bearer {token}".encode("utf-8")
+        ):
+            raise _RequestError(
+                401, f"Missing or invalid token, see {token_path(port)}"
+            )
+
+    def _respond(self, params: Dict[str, Any]) -> None:
+        """
+        Answer a request with the service's response.
+
+        Args:
+            params: Request parameters
+        """
+        endpoint = self.path.split("?", 1)[0].strip("/")
+        try:
+            self._send(200, self.server.service.handle(endpoint, params))
+        except _RequestError as e:
+            self._send(e.status, {"error": str(e)})
+        except Exception as e:
+            logger.exception(f"Error handling /{endpoint}: {e}")
+            self._send(500, {"error": str(e)})
+
+    def _send(self, status: int, data: Dict[str, Any]) -> None:
+        """
+        Send a JSON response.
+
+        Args:
+            status: HTTP status code
+            data: Response data
+        """
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """
+        Log a request at debug level instead of writing it to stderr.
+
+        Args:
+            format: Format string of the message
+            *args: Values of the format string
+        """
+        logger.debug(format % args)
+
+
+class _PoolMixIn:
+    """
+    Handle requests in a bounded thread pool.
+
+    Unlike socketserver.ThreadingMixIn, which starts a thread per request,
+    at most ``workers`` requests run at a time. Connections beyond twice that
+    number wait to be accepted, so a burst of clients cannot exhaust memory.
+    """
+
+    # Access token that requests must carry, or None if any client of the
+    # listening socket is trusted
+    token: Optional[str] = None
+
+    # Accepted values of the Host header when a token is required
+    allowed_hosts: FrozenSet[str] = frozenset()
+
+    # Set by init_pool, which is not reached if binding the socket fails
+    _executor: Optional[ThreadPoolExecutor] = None
+
+    def init_pool(self, service: AnalysisService, workers: int) -> None:
+        """
+        Create the pool.
+
+        Args:
+            service: Service answering the requests
+            workers: Number of requests handled concurrently
+        """
+        self.service = service
+        # Requests update the process-wide statistics from several threads
+        STATS.make_thread_safe()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(2 * workers)
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        """
+        Hand an accepted connection to the pool, waiting for a free slot.
+
+        Args:
+            request: Socket of the connection
+            client_address: Address of the client
+        """
+        self._slots.acquire()
+        self._executor.submit(self._process, request, client_address)
+
+    def _process(self, request: Any, client_address: Any) -> None:
+        """
+        Handle a connection in a pool thread and release its slot.
+
+        Args:
+            request: Socket of the connection
+            client_address: Address of the client
+        """
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self) -> None:
+        """Close the socket and wait for the requests being handled."""
+        super().server_close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+
+class TCPServer(_PoolMixIn, HTTPServer):
+    """
+    Analysis server listening on a TCP port.
+
+    Any local process, including a web browser, can connect to the port, so
+    requests must carry the token the server writes to token_path(port) and
+    name a loopback host in the Host header.
+    """
+
+    def server_bind(self) -> None:
+        """Bind the socket and write the access token for its port."""
+        super().server_bind()
+        port = self.server_address[1]
+        self.allowed_hosts = frozenset(
+            f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+            for host in _LOOPBACK_HOSTS
+        )
+        self.token = _write_token(token_path(port))
+
+    def server_close(self) -> None:
+        """Close the server and remove its token file."""
+        super().server_close()
+        if self.token is None:
+            # Binding failed, so the file belongs to another server, if any
+            return
+        try:
+            os.unlink(token_path(self.server_address[1]))
+        except OSError:
+            pass
+
+
+class UnixServer(_PoolMixIn, socketserver.UnixStreamServer):
+    """Analysis server listening on a Unix socket, readable only by its owner."""
+
+    def server_bind(self) -> None:
+        """Bind the socket with permissions for its owner only."""
+        # A socket left behind by a server that was killed blocks binding
+        if os.path.exists(self.server_address) and stat.S_ISSOCK(
+            os.stat(self.server_address).st_mode
+        ):
+            os.unlink(self.server_address)
+        old_umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self) -> None:
+        """Close the server and remove its socket file."""
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def parse_address(address: str) -> Address:
+    """
+    Parse a server address.
+
+    Args:
+        address: 'unix:PATH', a socket path containing a slash, 'HOST:PORT',
+            'PORT' or an http:// URL
+
+    Returns:
+        Socket path, or (host, port) tuple
+
+    Raises:
+        ValueError: If the address is invalid
+    """
+    if address.startswith("unix:"):
+        return address[len("unix:") :]
+    if address.startswith("http://"):
+        address = address[len("http://") :].rstrip("/")
+    elif "/" in address:
+        return address
+
+    host, _, port = address.rpartition(":")
+    try:
+        return (host.strip("[]") or "127.0.0.1", int(port))
+    except ValueError:
+        raise ValueError(f"Invalid server address: {address}")
+
+
+def create_server(
+    address: Address,
+    workers: int = 4,
+    max_entries: int = DEFAULT_MAX_ENTRIES,
+) -> Union[TCPServer, UnixServer]:
+    """
+    Create an analysis server; call serve_forever to run it.
+
+    A TCP server writes its access token to token_path(port) and removes it
+    in server_close.
+
+    Args:
+        address: Socket path, or (host, port) tuple to listen on
+        workers: Number of requests handled concurrently
+        max_entries: Maximum number of files in the line count cache
+
+    Returns:
+        Bound server
+
+    Raises:
+        OSError: If the address cannot be bound or the token not written
+    """
+    server: Union[TCPServer, UnixServer]
+    if isinstance(address, str):
+        server = UnixServer(address, _RequestHandler)
+    else:
+        server = TCPServer(address, _RequestHandler)
+    server.init_pool(AnalysisService(max_entries), max(1, workers))
+    return server
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix socket."""
+
+    def __init__(self, path: str, timeout: Optional[float] = None) -> None:
+        """
+        Create the connection.
+
+        Args:
+            path: Path of the server's socket
+            timeout: Socket timeout in seconds, or None to wait indefinitely
+        """
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self) -> None:
+        """Connect to the server's socket."""
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def request(
+    address: Address,
+    endpoint: str,
+    params: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Send a request to an analysis server.
+
+    Requests to a TCP server on this host carry the token it wrote to
+    token_path(port).
+
+    Args:
+        address: Socket path, or (host, port) tuple of the server
+        endpoint: Endpoint name, e.g. 'analyze'
+        params: Request parameters, or None for a GET request
+        timeout: Socket timeout in seconds, or None to wait indefinitely
+
+    Returns:
+        Response data
+
+    Raises:
+        ConnectionError: If the server cannot be reached
+        ServerError: If the server answers with an error
+    """
+    headers: Dict[str, str] = {}
+    if isinstance(address, str):
+        connection: http.client.HTTPConnection = _UnixHTTPConnection(address, timeout)
+    else:
+        connection = http.client.HTTPConnection(*address, timeout=timeout)
+        # The token must not be sent to other hosts
+        token = _read_token(address[1]) if address[0] in _LOOPBACK_HOSTS else None
+        if token is not None:
+            headers["Authorization"] = f"Bearer {token}"
+
+    try:
+        if params is None:
+            connection.request("GET", f"/{endpoint}", headers=headers)
+        else:
+            body = json.dumps(params).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+            connection.request("POST", f"/{endpoint}", body, headers)
+        response = connection.getresponse()
+        data = json.loads(response.read())
+    except (OSError, http.client.HTTPException) as e:
+        raise ConnectionError(f"Cannot reach the server at {address}: {e}")
+    finally:
+        connection.close()
+
+    if response.status != 200:
+        raise ServerError(response.status, data.get("error", response.reason))
+    return data
+
+
+def rows_to_results(rows: List[List[Any]], directory: str) -> List[FileResult]:
+    """
+    Convert the file rows of an analyze response to file results.
+
+    Args:
+        rows: Rows of the response
+        directory: Directory as named by the client, which the paths of the
+            rows are joined to
+
+    Returns:
+        File results, as produced by an in-process scan
+    """
+    return [
+        FileResult(
+            os.path.join(directory, path),
+            language,
+            code,
+            comment,
+            blank,
+            total,
+            error,
+            rel_path,
+            metrics,
+        )
+        for (
+            path,
+            rel_path,
+            language,
+            code,
+            comment,
+            blank,
+            total,
+            error,
+            metrics,
+        ) in rows
+    ]
+
+
+def analyze_params(
+    directory: str,
+    rev: Optional[str] = None,
+    relative_to: Optional[str] = None,
+    follow_symlinks: bool = False,
+    archive_members: bool = False,
+) -> Dict[str, Any]:
+    """
+    Build the parameters of an analyze request.
+
+    Paths are made absolute, since the server does not share the client's
+    current directory.
+
+    Args:
+        directory: Directory to analyze
+        rev: Git revision to analyze, or None for the working tree
+        relative_to: Base directory of the relative paths (default: the
+            current directory)
+        follow_symlinks: If True, descend into symbolic links to directories
+        archive_members: If True, report the members of KNIME archives as
+            separate results
+
+    Returns:
+        Request parameters
+    """
+    return {
+        "path": os.path.abspath(directory),
+        "rev": rev,
+        "relative_to": os.path.abspath(relative_to or os.curdir),
+        "working_dir": os.getcwd(),
+        "follow_symlinks": follow_symlinks,
+        "archive_members": archive_members,
+    }
@@ -0,0 +1,99 @@
+"""Module for walking directory trees."""
+
+import os
+from typing import Iterator, List, Optional, Set, Tuple
+
+from .ignore_patterns import IGNORE_FILE, IgnorePatterns
+from .instrumentation import STATS
+
+
+def walk_files(
+    directory: str,
+    ignore_patterns: Optional[IgnorePatterns] = None,
+    follow_symlinks: bool = False,
+) -> Iterator[Tuple[str, str]]:
+    """
+    Walk a directory tree and yield the files that are not ignored.
+
+    The tree is traversed top-down in the same order as os.walk: the files of
+    a directory come before the contents of its subdirectories. Entry types
+    are taken from os.scandir, so no extra stat calls are needed, and ignored
+    directories are pruned before they are descended into. Ignore patterns
+    are matched against paths relative to the walked directory; .mudagignore
+    files found in the tree apply to their own directory and below, with
+    deeper files taking precedence.
+
+    Args:
+        directory: Path to the directory to walk
+        ignore_patterns: Ignore patterns to apply, or None to yield all files
+        follow_symlinks: If True, descend into symbolic links to directories;
+            each directory is visited at most once, so link loops terminate
+
+    Yields:
+        (path, relative path) pairs, where path is the file path joined to
+        directory and the relative path is relative to directory
+    """
+    visited: Set[Tuple[int, int]] = set()
+    if follow_symlinks:
+        try:
+            stat = os.stat(directory)
+        except OSError:
+            return
+        visited.add((stat.st_dev, stat.st_ino))
+
+    stack = [(directory, "")]
+    while stack:
+        dir_path, prefix = stack.pop()
+        files: List[Tuple[str, str]] = []
+        subdirs: List[Tuple[str, str]] = []
+
+        try:
+            with os.scandir(dir_path) as iterator:
+                entries = list(iterator)
+        except OSError:
+            # Unreadable directories are skipped like os.walk does
+            continue
+        ignored = 0
+
+        # Rules of the directory's own ignore file apply to its entries
+        if ignore_patterns is not None and any(
+            entry.name == IGNORE_FILE for entry in entries
+        ):
+            ignore_patterns.load_directory(dir_path, prefix)
+
+        for entry in entries:
+            rel_path = prefix + entry.name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            if ignore_patterns is not None and ignore_patterns.is_ignored(
+                rel_path, is_dir
+            ):
+                ignored += 1
+                continue
+
+            if not is_dir:
+                files.append((entry.path, rel_path))
+                continue
+
+            if follow_symlinks:
+                # Skip directories already reached through another link
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if (stat.st_dev, stat.st_ino) in visited:
+                    continue
+                visited.add((stat.st_dev, stat.st_ino))
+            elif entry.is_symlink():
+                continue
+
+            subdirs.append((entry.path, rel_path + os.sep))
+
+        STATS.count("dirs_walked")
+        STATS.count("files_seen", len(files))
+        STATS.count("paths_ignored", ignored)
+        yield from files
+        stack.extend(reversed(subdirs))
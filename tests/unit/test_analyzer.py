@@ -4,7 +4,13 @@ import os
 import tempfile
 
 
-from mudag.core.analyzer import count_lines, is_workflow_file, scan_directory
+from mudag.core.analyzer import (
+    analyze_file,
+    count_lines,
+    is_workflow_file,
+    iter_scan,
+    scan_directory,
+)
 
 
 def test_is_workflow_file() -> None:
@@ -154,3 +160,117 @@ class: Workflow
         finally:
             # Change back to the original directory
             os.chdir(original_dir)
+
+
+def test_scan_subdirectory_with_working_dir_ignore_file() -> None:
+    """Test that anchored patterns of the current directory apply to subdirectories."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for rel_path in ["sub/pkg/skip.nf", "sub/pkg/keep.nf", "pkg/skip.nf"]:
+            path = os.path.join(temp_dir, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write("code\n")
+        with open(os.path.join(temp_dir, ".mudagignore"), "w") as ignore_file:
+            ignore_file.write("sub/pkg/skip.nf\n/pkg/\n")
+
+        original_dir = os.getcwd()
+        try:
+            os.chdir(temp_dir)
+            paths = {path.replace(os.sep, "/") for path in scan_directory("sub").paths}
+            assert paths == {"sub/pkg/keep.nf"}
+        finally:
+            os.chdir(original_dir)
+
+
+def test_scan_directory_parallel_matches_serial() -> None:
+    """Test that a parallel scan produces the same results as a serial scan."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Create enough files to be split into several batches
+        for i in range(150):
+            subdir = os.path.join(temp_dir, f"dir{i % 7}")
+            os.makedirs(subdir, exist_ok=True)
+            ext = [".cwl", ".nf", ".smk"][i % 3]
+            with open(os.path.join(subdir, f"file{i}{ext}"), "w") as f:
+                f.write("# comment\n" * (i % 4) + "code\n" * i + "\n")
+
+        serial = scan_directory(temp_dir)
+        parallel = scan_directory(temp_dir, workers=2)
+
+        assert list(parallel.keys()) == list(serial.keys())
+        assert parallel == serial
+
+
+def test_analyze_file() -> None:
+    """Test classifying and counting a file in one call."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        nf_path = os.path.join(temp_dir, "main.nf")
+        with open(nf_path, "w") as nf_file:
+            nf_file.write("// comment\nprocess foo {\n}\n\n")
+
+        result = analyze_file(nf_path)
+        assert result is not None
+        assert result.language == "Nextflow"
+        assert (result.code, result.comment, result.blank, result.total) == (2, 1, 1, 4)
+        assert result.counts() == count_lines(nf_path)
+
+        # Contents can be passed in memory; the path selects the language
+        result = analyze_file("virtual.nf", data=b"/* a\n b */\nx\n")
+        assert result.counts() == {
+            "code": 1,
+            "comment": 2,
+            "blank": 0,
+            "total": 3,
+            "processes": 0,
+            "workflows": 0,
+            "channels": 0,
+        }
+
+        # Non-workflow files are skipped unless requested
+        assert analyze_file("script.py", data=b"x = 1\n") is None
+        result = analyze_file("script.py", data=b"x = 1\n", workflow_only=False)
+        assert result.language == "Other"
+        assert result.code == 1
+
+        # Undecodable contents are flagged as errors
+        result = analyze_file("broken.cwl", data=b"\xff\n")
+        assert result.error == 1
+        assert result.counts() == {"code": 0, "comment": 0, "blank": 0, "error": 1}
+
+
+def test_iter_scan() -> None:
+    """Test that iter_scan yields the same files as scan_directory."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for i in range(100):
+            with open(os.path.join(temp_dir, f"file{i}.nf"), "w") as f:
+                f.write("// comment\n" + "code\n" * i)
+
+        results = scan_directory(temp_dir)
+        records = iter_scan(temp_dir, workers=2)
+
+        # Results are produced lazily
+        first = next(records)
+        assert first.language == "Nextflow"
+
+        records = [first] + list(records)
+        assert [record.path for record in records] == list(results)[1:]
+        for record in records:
+            assert record.counts() == results[record.path]
+
+
+def test_iter_scan_relative_paths() -> None:
+    """Test that relative paths are computed once during traversal."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.makedirs(os.path.join(temp_dir, "repo", "sub"))
+        with open(os.path.join(temp_dir, "repo", "sub", "main.nf"), "w") as f:
+            f.write("process a {}\n")
+
+        repo = os.path.join(temp_dir, "repo")
+        (record,) = iter_scan(repo, relative_to=repo)
+        assert record.rel_path == os.path.join("sub", "main.nf")
+
+        (record,) = iter_scan(repo, relative_to=temp_dir)
+        assert record.rel_path == os.path.join("repo", "sub", "main.nf")
+
+        # By default paths are relative to the current directory
+        (record,) = iter_scan(repo)
+        assert record.rel_path == os.path.relpath(record.path)
@@ -0,0 +1,131 @@
+"""Unit tests for the archives module."""
+
+import os
+import tempfile
+import zipfile
+
+from mudag.core.analyzer import count_lines, scan_directory
+from mudag.core.archives import (
+    count_archive,
+    count_archive_members,
+    expand_archive_members,
+)
+from mudag.utils.instrumentation import STATS
+
+WORKFLOW = (
+    '<?xml version="1.0"?>\n<!-- Workflow -->\n<config key="workflow">\n\n</config>\n'
+)
+SETTINGS = '<config key="settings">\n    <entry key="a"/>\n</config>\n'
+
+
+def _create_archive(path: str) -> None:
+    """
+    Create a KNIME workflow archive with a deflated and a stored member.
+
+    Args:
+        path: Path of the archive
+    """
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("wf/", "")
+        archive.writestr("wf/workflow.knime", WORKFLOW, zipfile.ZIP_DEFLATED)
+        archive.writestr("wf/Sorter (#1)/settings.xml", SETTINGS, zipfile.ZIP_STORED)
+        archive.writestr(
+            "wf/Sorter (#1)/data.bin", b"\xff\xfe\x00", zipfile.ZIP_DEFLATED
+        )
+
+
+def test_count_archive_members() -> None:
+    """Test that only workflow.knime and settings.xml members are counted."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "example.knwf")
+        _create_archive(path)
+
+        members = count_archive_members(path)
+        assert members == [
+            ("wf/workflow.knime", {"code": 3, "comment": 1, "blank": 1, "total": 5}),
+            (
+                "wf/Sorter (#1)/settings.xml",
+                {"code": 3, "comment": 0, "blank": 0, "total": 3},
+            ),
+        ]
+        totals = {"code": 6, "comment": 1, "blank": 1, "total": 8}
+        assert count_lines(path) == totals
+
+        with open(path, "rb") as f:
+            assert count_archive(path, f.read()) == totals
+
+        # The central directory is parsed once per process
+        STATS.reset()
+        count_archive(path)
+        assert STATS.counters["archive_cache_hits"] == 1
+
+
+def test_scan_and_expand_archives() -> None:
+    """Test that archives are counted in scans and broken down per member."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _create_archive(os.path.join(temp_dir, "example.knar"))
+        with open(os.path.join(temp_dir, "plain.knwf"), "w") as f:
+            f.write("<!-- exported as XML -->\n<config/>\n")
+
+        results = scan_directory(temp_dir, relative_to=temp_dir)
+        assert results.language_stats()["KNIME"]["code"] == 7
+        assert not any(record.error for record in results.records())
+
+        expanded = sorted(
+            record.rel_path for record in expand_archive_members(results.records())
+        )
+        assert expanded == [
+            "example.knar!/wf/Sorter (#1)/settings.xml",
+            "example.knar!/wf/workflow.knime",
+            "plain.knwf",
+        ]
+
+        # Enough archives to be counted by the worker processes
+        for i in range(70):
+            _create_archive(os.path.join(temp_dir, f"copy{i}.knwf"))
+        serial = scan_directory(temp_dir, relative_to=temp_dir)
+        parallel = scan_directory(temp_dir, workers=2, relative_to=temp_dir)
+        assert serial.language_stats()["KNIME"]["code"] == 7 + 70 * 6
+        assert parallel == serial
+
+
+def test_corrupt_member() -> None:
+    """Test that a corrupt member is reported and left out of the totals."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "example.knwf")
+        _create_archive(path)
+        with open(path, "rb") as f:
+            data = f.read()
+        # Flip a byte of the stored settings.xml member
+        offset = data.index(b'<config key="settings">')
+        data = data[:offset] + b"X" + data[offset + 1 :]
+        with open(path, "wb") as f:
+            f.write(data)
+
+        members = dict(count_archive_members(path))
+        assert members["wf/Sorter (#1)/settings.xml"]["error"] == 1
+        assert count_lines(path)["total"] == 5
+
+
+def test_unsupported_compression_method() -> None:
+    """Test that a member zipfile cannot decompress is reported, not raised."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "example.knwf")
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("wf/workflow.knime", WORKFLOW, zipfile.ZIP_STORED)
+        with open(path, "rb") as f:
+            data = bytearray(f.read())
+        # Mark the member as deflate64 (method 9) in both of its headers
+        local = data.index(b"PK\x03\x04")
+        central = data.index(b"PK\x01\x02")
+        data[local + 8 : local + 10] = (9).to_bytes(2, "little")
+        data[central + 10 : central + 12] = (9).to_bytes(2, "little")
+        with open(path, "wb") as f:
+            f.write(data)
+        with open(os.path.join(temp_dir, "main.nf"), "w") as f:
+            f.write("process a {}\n")
+
+        results = scan_directory(temp_dir, relative_to=temp_dir)
+        assert results[os.path.join(temp_dir, "main.nf")]["code"] == 1
+        members = dict(count_archive_members(path))
+        assert members["wf/workflow.knime"]["error"] == 1
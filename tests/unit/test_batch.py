@@ -0,0 +1,62 @@
+"""Unit tests for the batch module."""
+
+import os
+import tempfile
+
+from mudag.core.batch import iter_batch, read_repository_list
+
+
+def _make_repositories(root: str, count: int) -> list:
+    """
+    Create repositories with a few workflow files each.
+
+    Args:
+        root: Directory to create the repositories in
+        count: Number of repositories
+
+    Returns:
+        Paths to the repositories
+    """
+    repositories = []
+    for i in range(count):
+        repository = os.path.join(root, f"repo{i}")
+        os.makedirs(os.path.join(repository, "sub"))
+        with open(os.path.join(repository, "main.nf"), "w") as f:
+            f.write("// comment\n" + "process a {}\n" * i)
+        with open(os.path.join(repository, "sub", "tool.cwl"), "w") as f:
+            f.write("cwlVersion: v1.2\n\n")
+        repositories.append(repository)
+    return repositories
+
+
+def test_iter_batch_order_and_failures() -> None:
+    """Test that results keep input order and failures are isolated."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        repositories = _make_repositories(temp_dir, 6)
+        missing = os.path.join(temp_dir, "missing")
+        repositories.insert(2, missing)
+
+        serial = list(iter_batch(repositories))
+        parallel = list(iter_batch(repositories, workers=2))
+
+        assert serial == parallel
+        assert [result.repository for result in serial] == repositories
+
+        failed = serial[2]
+        assert failed.error is not None
+        assert failed.records == []
+
+        for result in serial[:2] + serial[3:]:
+            assert result.error is None
+            assert len(result.records) == 2
+        assert serial[-1].records[0].code == 5
+
+
+def test_read_repository_list() -> None:
+    """Test that empty lines and comments are skipped."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        list_file = os.path.join(temp_dir, "repos.txt")
+        with open(list_file, "w") as f:
+            f.write("# repositories\nrepo1\n\n  repo2  \n")
+
+        assert read_repository_list(list_file) == ["repo1", "repo2"]
@@ -0,0 +1,115 @@
+"""Unit tests for the benchmark module."""
+
+import json
+import os
+import tempfile
+
+import pytest
+
+from mudag.core.analyzer import scan_directory
+from mudag.utils.benchmark import (
+    CorpusSpec,
+    benchmark,
+    generate_corpus,
+    parse_languages,
+)
+
+
+def _read_tree(root: str) -> dict:
+    """
+    Read the contents of all files below a directory.
+
+    Args:
+        root: Directory to read
+
+    Returns:
+        Dictionary mapping relative paths to file contents
+    """
+    contents = {}
+    for dir_path, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(dir_path, name)
+            with open(path, "r", encoding="utf-8") as f:
+                contents[os.path.relpath(path, root)] = f.read()
+    return contents
+
+
+def test_generate_corpus_is_reproducible() -> None:
+    """Test that equal specs generate equal trees and ignored files are skipped."""
+    spec = CorpusSpec(files=60, lines=20, ignore_patterns=5, seed=3)
+    with tempfile.TemporaryDirectory() as first:
+        with tempfile.TemporaryDirectory() as second:
+            stats = generate_corpus(first, spec)
+            assert generate_corpus(second, spec) == stats
+            assert _read_tree(first) == _read_tree(second)
+
+        # Copies in the ignored directory are not counted
+        assert stats["ignored"] > 0
+        results = scan_directory(first)
+        assert results.file_count == stats["workflow_files"]
+        assert sum(os.path.getsize(path) for path in results.paths) == stats["bytes"]
+
+        with open(os.path.join(first, ".mudagignore")) as f:
+            assert len(f.read().splitlines()) == 5
+
+        with tempfile.TemporaryDirectory() as other:
+            generate_corpus(other, spec._replace(seed=4))
+            assert _read_tree(other) != _read_tree(first)
+
+
+def test_generate_corpus_languages() -> None:
+    """Test that only the requested languages are generated."""
+    spec = CorpusSpec(files=20, lines=10, languages=("CWL", "WDL"), other_ratio=0)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        generate_corpus(temp_dir, spec)
+        stats = scan_directory(temp_dir).language_stats(only_present=True)
+        assert set(stats) == {"CWL", "WDL"}
+        assert stats["CWL"]["files"] == stats["WDL"]["files"] == 10
+
+
+def test_generate_galaxy_workflows() -> None:
+    """Test that Galaxy files are workflow exports with annotation comments."""
+    spec = CorpusSpec(files=10, lines=60, languages=("Galaxy",), other_ratio=0)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        generate_corpus(temp_dir, spec)
+        results = scan_directory(temp_dir)
+        for path in results.paths:
+            with open(path) as f:
+                assert len(json.load(f)["steps"]) > 1
+
+        stats = results.language_stats()["Galaxy"]
+        assert stats["files"] == 10
+        assert stats["steps"] > 10
+        assert stats["comment"] > 0
+        assert stats["blank"] > 0
+
+
+def test_benchmark_report() -> None:
+    """Test that every step is timed and reported as throughput."""
+    spec = CorpusSpec(files=30, lines=10)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        report = benchmark(spec, temp_dir, repeat=1)
+
+    assert report["corpus"]["parameters"]["files"] == 30
+    assert set(report["results"]) == {
+        "scan_directory",
+        "count_lines",
+        "is_ignored",
+        "format_table",
+        "format_json",
+        "format_json_compact",
+        "format_csv",
+        "format_jsonl",
+        "format_npz",
+    }
+    for result in report["results"].values():
+        assert result["seconds"] > 0
+        assert result["files_per_second"] > 0
+    assert report["results"]["scan_directory"]["mb_per_second"] > 0
+
+
+def test_parse_languages() -> None:
+    """Test parsing of the language list."""
+    assert parse_languages("Snakemake, CWL") == ("Snakemake", "CWL")
+    with pytest.raises(ValueError):
+        parse_languages("Snakemake,Fortran")
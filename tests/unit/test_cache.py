@@ -0,0 +1,149 @@
+"""Unit tests for the cache module."""
+
+import os
+import tempfile
+from unittest import mock
+
+from mudag.core.analyzer import scan_directory
+from mudag.utils.cache import MemoryCache, ResultCache
+
+
+def test_cache_hit_after_put() -> None:
+    """Test that an unchanged file is served from the cache."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "workflow.cwl")
+        with open(file_path, "w") as f:
+            f.write("# comment\ncwlVersion: v1.0\n")
+
+        counts = {"code": 1, "comment": 1, "blank": 0, "total": 2}
+        with ResultCache(os.path.join(temp_dir, "cache")) as cache:
+            key = cache.key(file_path, "CWL")
+            assert cache.get(key) is None
+            cache.put(key, counts)
+
+        with ResultCache(os.path.join(temp_dir, "cache")) as cache:
+            assert cache.get(cache.key(file_path, "CWL")) == counts
+            assert cache.hits == 1
+            assert cache.misses == 0
+
+
+def test_cache_content_hash_fallback() -> None:
+    """Test that a touched but unchanged file is found by its content hash."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "workflow.cwl")
+        with open(file_path, "w") as f:
+            f.write("cwlVersion: v1.0\n")
+
+        counts = {"code": 1, "comment": 0, "blank": 0, "total": 1}
+        with ResultCache(os.path.join(temp_dir, "cache")) as cache:
+            cache.put(cache.key(file_path, "CWL"), counts)
+
+        # Change the modification time but not the contents
+        os.utime(file_path, ns=(0, 0))
+
+        with ResultCache(os.path.join(temp_dir, "cache")) as cache:
+            assert cache.get(cache.key(file_path, "CWL")) == counts
+            assert cache.hash_hits == 1
+
+            # The same contents in another language must not match
+            assert cache.get(cache.key(file_path, "Nextflow")) is None
+
+
+def test_cache_skips_errors() -> None:
+    """Test that results of unreadable files are not cached."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "workflow.cwl")
+        with open(file_path, "wb") as f:
+            f.write(b"\xff\xfe")
+
+        with ResultCache(os.path.join(temp_dir, "cache")) as cache:
+            key = cache.key(file_path, "CWL")
+            cache.put(key, {"code": 0, "comment": 0, "blank": 0, "error": 1})
+
+        with ResultCache(os.path.join(temp_dir, "cache")) as cache:
+            assert cache.get(key) is None
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    """Test that the cache is bounded in size."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        counts = {"code": 1, "comment": 0, "blank": 0, "total": 1}
+        with ResultCache(os.path.join(temp_dir, "cache"), max_entries=2) as cache:
+            for i in range(4):
+                file_path = os.path.join(temp_dir, f"workflow{i}.cwl")
+                with open(file_path, "w") as f:
+                    f.write(f"step{i}: x\n")
+                cache.put(cache.key(file_path, "CWL"), counts)
+
+        with ResultCache(os.path.join(temp_dir, "cache")) as cache:
+            found = [
+                cache.get(cache.key(os.path.join(temp_dir, f"workflow{i}.cwl"), "CWL"))
+                is not None
+                for i in range(4)
+            ]
+            assert found == [False, False, True, True]
+
+
+def test_memory_cache() -> None:
+    """Test invalidation and eviction of the in-memory cache."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        counts = {"code": 1, "comment": 0, "blank": 0, "total": 1}
+        cache = MemoryCache(max_entries=2)
+        paths = []
+        for i in range(3):
+            paths.append(os.path.join(temp_dir, f"workflow{i}.cwl"))
+            with open(paths[-1], "w") as f:
+                f.write(f"step{i}: x\n")
+            cache.put(cache.key(paths[-1], "CWL"), counts)
+
+        assert len(cache) == 2
+        assert cache.get(cache.key(paths[0], "CWL")) is None
+        assert cache.get(cache.key(paths[2], "CWL")) == counts
+        assert cache.get(cache.key(paths[2], "WDL")) is None
+
+        with open(paths[2], "a") as f:
+            f.write("more: x\n")
+        assert cache.get(cache.key(paths[2], "CWL")) is None
+        assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_scan_directory_with_cache() -> None:
+    """Test that cached scans return the same results as uncached scans."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name in ["a.cwl", "b.nf", "Snakefile"]:
+            with open(os.path.join(temp_dir, name), "w") as f:
+                f.write("# comment\ncode\n\n")
+
+        expected = scan_directory(temp_dir)
+        cache_dir = os.path.join(temp_dir, ".cache")
+
+        with ResultCache(cache_dir) as cache:
+            assert scan_directory(temp_dir, cache=cache) == expected
+            assert cache.misses == 3
+
+        with ResultCache(cache_dir) as cache:
+            assert scan_directory(temp_dir, cache=cache) == expected
+            assert cache.hits == 3
+
+
+def test_scan_directory_hashes_files_once() -> None:
+    """Test that a cold scan hashes files while counting them, not before."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name in ["a.cwl", "b.nf", "Snakefile"]:
+            with open(os.path.join(temp_dir, name), "w") as f:
+                f.write("# comment\ncode\n\n")
+
+        expected = scan_directory(temp_dir)
+        cache_dir = os.path.join(temp_dir, ".cache")
+
+        with ResultCache(cache_dir) as cache:
+            with mock.patch.object(ResultCache, "_digest", side_effect=AssertionError):
+                assert scan_directory(temp_dir, cache=cache) == expected
+            assert cache.misses == 3
+
+        # The digests computed during the scan serve touched files
+        for name in ["a.cwl", "b.nf", "Snakefile"]:
+            os.utime(os.path.join(temp_dir, name), ns=(0, 0))
+        with ResultCache(cache_dir) as cache:
+            assert scan_directory(temp_dir, cache=cache) == expected
+            assert cache.hash_hits == 3
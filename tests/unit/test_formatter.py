@@ -1,11 +1,27 @@
 """Unit tests for the formatter module."""
 
+import ast
 import io
-from typing import Dict
+import json
+import os
+import struct
+import zipfile
+from typing import Dict, List
 
 import pytest
 
-from mudag.utils.formatter import format_csv, format_json, format_table
+from mudag.core.analyzer import FileResult
+from mudag.core.results import ScanResult
+from mudag.utils import formatter
+from mudag.utils.formatter import (
+    format_csv,
+    format_csv_stream,
+    format_json,
+    format_jsonl,
+    format_npz,
+    format_parquet,
+    format_table,
+)
 
 
 @pytest.fixture
@@ -22,6 +38,20 @@ def sample_results() -> Dict[str, Dict[str, int]]:
     }
 
 
+@pytest.fixture
+def sample_records() -> List[FileResult]:
+    """
+    Create a fixture with sample file results.
+
+    Returns:
+        List of file results
+    """
+    return [
+        FileResult("/path/to/file2.smk", "Snakemake", 20, 10, 5, 35),
+        FileResult("/path/to/file1.cwl", "CWL", 10, 5, 2, 17),
+    ]
+
+
 def test_format_table(sample_results: Dict[str, Dict[str, int]]) -> None:
     """
     Test the table formatter.
@@ -156,3 +186,280 @@ def test_format_csv(sample_results: Dict[str, Dict[str, int]]) -> None:
     assert "15" in lines[3]
     assert "7" in lines[3]
     assert "52" in lines[3]
+
+
+def test_format_csv_stream(sample_records: List[FileResult]) -> None:
+    """
+    Test the streaming CSV formatter.
+
+    Args:
+        sample_records: Fixture with sample file results
+    """
+    output = io.StringIO()
+    format_csv_stream(iter(sample_records), output)
+
+    output.seek(0)
+    lines = output.read().splitlines()
+
+    # Rows are written in arrival order
+    assert lines[0].startswith("File Path,Code Lines")
+    assert lines[1].endswith("file2.smk,20,10,5,35")
+    assert lines[2].endswith("file1.cwl,10,5,2,17")
+    assert lines[3] == "TOTAL,30,15,7,52"
+
+    # Language statistics follow the totals
+    assert lines[4] == ""
+    assert lines[5].startswith("Workflow Language,Files")
+    assert lines[6] == "CWL,1,10,5,2,17"
+    assert lines[7] == "Snakemake,1,20,10,5,35"
+
+
+def test_format_jsonl(sample_records: List[FileResult]) -> None:
+    """
+    Test the JSON Lines formatter.
+
+    Args:
+        sample_records: Fixture with sample file results
+    """
+    output = io.StringIO()
+    format_jsonl(iter(sample_records), output)
+
+    output.seek(0)
+    lines = [json.loads(line) for line in output.read().splitlines()]
+
+    assert len(lines) == 3
+    assert lines[0]["path"].endswith("file2.smk")
+    assert lines[0]["language"] == "Snakemake"
+    assert lines[0]["code"] == 20
+    assert lines[1]["total"] == 17
+
+    assert lines[2]["summary"]["total_files"] == 2
+    assert lines[2]["summary"]["total_lines"] == 52
+    assert lines[2]["workflow_languages"]["CWL"]["files"] == 1
+
+
+def test_metric_columns(sample_records: List[FileResult]) -> None:
+    """
+    Test that structure metrics add columns to the CSV and JSON output.
+
+    Args:
+        sample_records: Fixture with sample file results
+    """
+    galaxy = FileResult(
+        "/path/to/file3.ga",
+        "Galaxy",
+        30,
+        2,
+        0,
+        32,
+        metrics={"steps": 4, "connections": 3},
+    )
+    results = ScanResult()
+    results.extend(sample_records + [galaxy])
+
+    output = io.StringIO()
+    format_csv(results, output)
+    lines = output.getvalue().splitlines()
+    assert lines[0].endswith("Total Lines,Steps,Connections")
+    assert lines[1].endswith("file1.cwl,10,5,2,17,,")
+    assert lines[3].endswith("file3.ga,30,2,0,32,4,3")
+    assert lines[4] == "TOTAL,60,17,7,84,4,3"
+    assert lines[7] == "CWL,1,10,5,2,17,,"
+    assert lines[8] == "Galaxy,1,30,2,0,32,4,3"
+
+    for compact in (False, True):
+        output = io.StringIO()
+        format_json(results, output, compact=compact)
+        data = json.loads(output.getvalue())
+        assert data["summary"]["total_steps"] == 4
+        assert data["files"][os.path.relpath("/path/to/file3.ga")]["connections"] == 3
+        assert "steps" not in data["files"][os.path.relpath("/path/to/file1.cwl")]
+        assert data["workflow_languages"]["Galaxy"]["steps"] == 4
+
+    output = io.StringIO()
+    format_csv_stream(iter(sample_records + [galaxy]), output, ("steps",))
+    lines = output.getvalue().splitlines()
+    assert lines[1].endswith("file2.smk,20,10,5,35,")
+    assert lines[4] == "TOTAL,60,17,7,84,4"
+
+    output = io.StringIO()
+    format_jsonl(iter([galaxy]), output)
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert lines[0]["steps"] == 4
+    assert lines[1]["summary"]["total_connections"] == 3
+
+
+def _legacy_json(results: Dict[str, Dict[str, int]], **kwargs) -> str:
+    """
+    Serialize results like the formatter did before streaming.
+
+    Args:
+        results: Dictionary mapping file paths to line count dictionaries
+        **kwargs: Arguments of json.dumps
+
+    Returns:
+        JSON text
+    """
+    files = {os.path.relpath(path): counts for path, counts in results.items()}
+    output_data = {
+        "summary": {
+            "total_files": len(files),
+            "total_code": sum(c.get("code", 0) for c in files.values()),
+            "total_comment": sum(c.get("comment", 0) for c in files.values()),
+            "total_blank": sum(c.get("blank", 0) for c in files.values()),
+            "total_lines": sum(
+                c["code"] + c["comment"] + c["blank"] for c in files.values()
+            ),
+        },
+        "files": files,
+    }
+    return json.dumps(output_data, **kwargs)
+
+
+@pytest.mark.parametrize("use_orjson", [False, True])
+def test_format_json_modes(
+    sample_results: Dict[str, Dict[str, int]], monkeypatch, use_orjson: bool
+) -> None:
+    """
+    Test that streamed JSON matches json.dump in both modes.
+
+    Args:
+        sample_results: Fixture with sample results
+        monkeypatch: Pytest fixture for patching the optional encoder
+        use_orjson: Whether to use orjson for the compact mode if installed
+    """
+    if not use_orjson:
+        monkeypatch.setattr(formatter, "orjson", None)
+    elif formatter.orjson is None:
+        pytest.skip("orjson is not installed")
+
+    results = dict(sample_results)
+    results["/path/to/ünïcödé.nf"] = {
+        "code": 1,
+        "comment": 0,
+        "blank": 0,
+        "total": 1,
+    }
+    results["/path/to/broken.cwl"] = {"code": 0, "comment": 0, "blank": 0, "error": 1}
+
+    output = io.StringIO()
+    format_json(results, output)
+    assert output.getvalue() == _legacy_json(results, indent=2)
+
+    output = io.StringIO()
+    format_json(results, output, compact=True)
+    assert "\n" not in output.getvalue()
+    assert json.loads(output.getvalue()) == json.loads(_legacy_json(results))
+
+    # Empty results
+    output = io.StringIO()
+    format_json({}, output)
+    assert output.getvalue() == _legacy_json({}, indent=2)
+    output = io.StringIO()
+    format_json({}, output, compact=True)
+    assert json.loads(output.getvalue()) == json.loads(_legacy_json({}))
+
+
+def _read_npy(data: bytes) -> list:
+    """
+    Read a one-dimensional .npy array without NumPy.
+
+    Args:
+        data: Contents of the .npy file
+
+    Returns:
+        List of the array's elements
+    """
+    assert data[:8] == b"\x93NUMPY\x01\x00"
+    header_length = struct.unpack("<H", data[8:10])[0]
+    assert (10 + header_length) % 64 == 0
+    header = ast.literal_eval(data[10 : 10 + header_length].decode("ascii"))
+    body = data[10 + header_length :]
+
+    descr = header["descr"]
+    (length,) = header["shape"]
+    if descr[1] == "U":
+        width = 4 * int(descr[2:])
+        return [
+            body[i : i + width].decode("utf-32-le").rstrip("\0")
+            for i in range(0, len(body), width)
+        ]
+    assert descr[1] == "i"
+    return list(
+        struct.unpack(f"{descr[0]}{length}{'q' if descr[2] == '8' else 'i'}", body)
+    )
+
+
+def test_format_npz(sample_records: List[FileResult]) -> None:
+    """
+    Test that the .npz archive holds typed columns and the language summary.
+
+    Args:
+        sample_records: Fixture with sample file results
+    """
+    results = ScanResult()
+    results.extend(sample_records)
+    results.append(
+        FileResult("ünï.cwl", "CWL", 0, 0, 0, 0, error=1, rel_path="ünï.cwl")
+    )
+
+    output = io.BytesIO()
+    format_npz(results, output)
+
+    with zipfile.ZipFile(output) as archive:
+        arrays = {
+            name[: -len(".npy")]: _read_npy(archive.read(name))
+            for name in archive.namelist()
+        }
+
+    assert arrays["path"] == [
+        os.path.relpath("/path/to/file2.smk"),
+        os.path.relpath("/path/to/file1.cwl"),
+        "ünï.cwl",
+    ]
+    assert arrays["language"] == ["Snakemake", "CWL", "CWL"]
+    assert arrays["code"] == [20, 10, 0]
+    assert arrays["total"] == [35, 17, 0]
+    assert arrays["error"] == [0, 0, 1]
+    assert arrays["summary_language"] == ["Snakemake", "CWL"]
+    assert arrays["summary_files"] == [1, 2]
+    assert arrays["summary_blank"] == [5, 2]
+
+
+def test_format_npz_loads_with_numpy(sample_results: Dict[str, Dict[str, int]]) -> None:
+    """
+    Test that NumPy loads the archive without pickle.
+
+    Args:
+        sample_results: Fixture with sample results
+    """
+    numpy = pytest.importorskip("numpy")
+
+    output = io.BytesIO()
+    format_npz(sample_results, output)
+    output.seek(0)
+
+    with numpy.load(output, allow_pickle=False) as arrays:
+        assert arrays["code"].tolist() == [10, 20]
+        assert arrays["path"].dtype.kind == "U"
+
+
+def test_format_parquet(sample_results: Dict[str, Dict[str, int]]) -> None:
+    """
+    Test the Parquet formatter.
+
+    Args:
+        sample_results: Fixture with sample results
+    """
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    output = io.BytesIO()
+    format_parquet(sample_results, output)
+    output.seek(0)
+
+    table = pq.read_table(output)
+    assert table.column("code").to_pylist() == [10, 20]
+    assert table.column("language").to_pylist() == ["CWL", "Snakemake"]
+    languages = json.loads(table.schema.metadata[b"mudag.workflow_languages"])
+    assert languages["CWL"]["files"] == 1
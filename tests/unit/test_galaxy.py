@@ -0,0 +1,168 @@
+"""Unit tests for the galaxy module."""
+
+import json
+import os
+import tempfile
+from typing import Any, Dict
+
+from mudag.core.analyzer import count_lines, scan_directory
+from mudag.core.galaxy import GalaxyScanner
+from mudag.core.languages import GALAXY
+from mudag.core.line_classifier import classify_lines
+
+
+def _step(index: int, **fields: Any) -> Dict[str, Any]:
+    """
+    Create a workflow step.
+
+    Args:
+        index: Step index
+        **fields: Additional step fields
+
+    Returns:
+        Step object
+    """
+    step = {"id": index, "annotation": "", "input_connections": {}, "tool_id": None}
+    step.update(fields)
+    return step
+
+
+def _workflow() -> Dict[str, Any]:
+    """
+    Create a workflow with three steps and a subworkflow of two steps.
+
+    Returns:
+        Workflow object
+    """
+    subworkflow = {
+        "annotation": "",
+        "steps": {
+            "0": _step(0, annotation="Sub input"),
+            "1": _step(
+                1,
+                tool_id="toolshed/sort/1.0",
+                input_connections={"input": {"id": 0, "output_name": "output"}},
+            ),
+        },
+    }
+    return {
+        "a_galaxy_workflow": "true",
+        "annotation": 'Sorts "things"\nand more',
+        "name": "Example",
+        "steps": {
+            "0": _step(0, annotation="Input"),
+            "1": _step(
+                1,
+                tool_id="toolshed/sort/1.0",
+                input_connections={
+                    "input": {"id": 0, "output_name": "output"},
+                    "queries": [
+                        {"id": 0, "output_name": "output"},
+                        {"id": 0, "output_name": "output"},
+                    ],
+                },
+            ),
+            "2": _step(
+                2,
+                tool_id="toolshed/cat/2.0",
+                type="subworkflow",
+                subworkflow=subworkflow,
+                input_connections={"input": {"id": 1, "output_name": "out"}},
+            ),
+        },
+    }
+
+
+def _scan(content: str, chunk_size: int) -> Dict[str, int]:
+    """
+    Count the lines and metrics of workflow JSON passed in small chunks.
+
+    Args:
+        content: Workflow JSON
+        chunk_size: Size of the chunks in bytes
+
+    Returns:
+        Line counts with the metrics
+    """
+    data = content.encode("utf-8")
+    chunks = [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
+    scanner = GalaxyScanner()
+    counts = classify_lines(
+        scanner.scan(chunks),
+        GALAXY.line_comment,
+        GALAXY.block_starts,
+        GALAXY.block_ends,
+    )
+    return scanner.apply(counts)
+
+
+def test_metrics() -> None:
+    """Test that steps, tools, annotations and connections are counted."""
+    content = json.dumps(_workflow(), indent=4)
+    metrics = {"steps": 5, "tools": 2, "annotations": 3, "connections": 5}
+
+    counts = _scan(content, 1 << 16)
+    assert {name: counts[name] for name in metrics} == metrics
+    # Lines holding only an annotation are comments
+    assert counts["comment"] == 3
+    assert counts["code"] + counts["comment"] == content.count("\n") + 1
+
+    # The same metrics when tokens and UTF-8 sequences span chunks
+    for chunk_size in (1, 7, 64):
+        assert _scan(content.replace("Input", "Ïnput"), chunk_size) == counts
+
+
+def test_compact_and_invalid_documents() -> None:
+    """Test single-line exports and documents that are not workflows."""
+    counts = _scan(json.dumps(_workflow()), 5)
+    assert counts["code"] == 1
+    assert counts["comment"] == 0
+    assert counts["steps"] == 5
+
+    for content in ("[]", "", '{"steps": {"0": {"tool_id": "a"}', "{,}"):
+        counts = _scan(content, 3)
+        assert counts["tools"] == (1 if content.startswith('{"steps"') else 0)
+
+
+def test_number_split_between_chunks() -> None:
+    """Test that a number cut off by the end of a chunk is not decoded early."""
+    workflow = {"format-version": "0.1", "size": 1234567, "uuid": 12.5e3}
+    workflow.update(_workflow())
+    content = json.dumps(workflow)
+    expected = _scan(content, 1 << 16)
+    assert expected["steps"] == 5
+
+    for number in ("1234567", "12500.0"):
+        offset = content.index(number)
+        for split in range(offset + 1, offset + len(number)):
+            assert _scan(content, split) == expected
+
+
+def test_count_lines() -> None:
+    """Test that only .ga files get Galaxy metrics."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "example.ga")
+        with open(path, "w") as f:
+            json.dump(_workflow(), f, indent=2)
+        counts = count_lines(path)
+        assert counts["steps"] == 5
+        assert counts["connections"] == 5
+
+        path = os.path.join(temp_dir, "example.gxwf")
+        with open(path, "w") as f:
+            f.write("class: GalaxyWorkflow\nsteps: {}\n")
+        assert "steps" not in count_lines(path)
+
+
+def test_parallel_scan() -> None:
+    """Test that worker processes of a parallel scan compute the metrics too."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Enough files to be counted by the worker processes
+        for i in range(70):
+            with open(os.path.join(temp_dir, f"example{i}.ga"), "w") as f:
+                json.dump(_workflow(), f, indent=2)
+
+        serial = scan_directory(temp_dir)
+        parallel = scan_directory(temp_dir, workers=2)
+        assert serial.language_stats()["Galaxy"]["steps"] == 70 * 5
+        assert parallel == serial
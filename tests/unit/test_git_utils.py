@@ -0,0 +1,281 @@
+"""Unit tests for the git_utils module."""
+
+import os
+import shutil
+import subprocess
+import tempfile
+
+import pytest
+
+from mudag.core.analyzer import scan_directory
+from mudag.utils.git_utils import (
+    BlobCounter,
+    GitObjectReader,
+    compare_commits,
+    get_blobs_at_commit,
+    iter_history,
+    scan_revision,
+)
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git not found")
+
+
+def _git(repo: str, *args: str) -> str:
+    """
+    Run a git command in a repository.
+
+    Args:
+        repo: Path to the repository
+        *args: Arguments of the git command
+
+    Returns:
+        Standard output of the command
+    """
+    env = dict(
+        os.environ,
+        GIT_AUTHOR_NAME="test",
+        GIT_AUTHOR_EMAIL="test@example.com",
+        GIT_COMMITTER_NAME="test",
+        GIT_COMMITTER_EMAIL="test@example.com",
+    )
+    return subprocess.run(
+        ["git", "-C", repo, *args],
+        stdout=subprocess.PIPE,
+        check=True,
+        text=True,
+        env=env,
+    ).stdout.strip()
+
+
+def _commit(repo: str, files: dict) -> str:
+    """
+    Write files and commit them.
+
+    Args:
+        repo: Path to the repository
+        files: Mapping of relative paths to contents, or None to delete
+
+    Returns:
+        Hash of the new commit
+    """
+    for rel_path, content in files.items():
+        path = os.path.join(repo, rel_path)
+        if content is None:
+            os.remove(path)
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", "commit")
+    return _git(repo, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def repo():
+    """Create a repository with two commits."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _git(temp_dir, "init", "-q")
+        first = _commit(
+            temp_dir,
+            {
+                "main.nf": "// comment\nprocess a {}\n",
+                "same.cwl": "cwlVersion: v1.2\n",
+                "gone.smk": "rule a:\n",
+            },
+        )
+        second = _commit(
+            temp_dir,
+            {
+                "main.nf": "// comment\nprocess a {}\n\nprocess b {}\n",
+                "gone.smk": None,
+                "sub/new.wdl": "# comment\nworkflow w {}\n",
+            },
+        )
+        yield temp_dir, first, second
+
+
+def test_git_object_reader(repo) -> None:
+    """Test reading several blobs over one cat-file process."""
+    path, first, second = repo
+    with GitObjectReader(path) as reader:
+        assert reader.read(first, "main.nf") == b"// comment\nprocess a {}\n"
+        assert reader.read(first, "sub/new.wdl") is None
+        # Trees are not files
+        assert reader.read(second, "sub") is None
+        assert reader.read(second, "sub/new.wdl") == b"# comment\nworkflow w {}\n"
+
+
+def test_compare_commits(repo) -> None:
+    """Test that files with differences are reported with their counts."""
+    path, first, second = repo
+    results = compare_commits(path, first, second)
+
+    assert set(results) == {"main.nf", "gone.smk", "sub/new.wdl"}
+    assert results["main.nf"]["code"] == 1
+    assert results["main.nf"]["blank"] == 1
+    assert results["main.nf"]["commit1"]["total"] == 2
+    assert results["gone.smk"]["total"] == -1
+    assert results["sub/new.wdl"]["commit2"] == {
+        "code": 1,
+        "comment": 1,
+        "blank": 0,
+        "total": 2,
+    }
+
+
+def test_blob_counter_memoizes_blobs(repo) -> None:
+    """Test that a blob shared by several paths is read and counted once."""
+    path, first, second = repo
+    blobs1 = get_blobs_at_commit(path, first)
+    blobs2 = get_blobs_at_commit(path, second)
+    assert blobs1["same.cwl"] == blobs2["same.cwl"]
+    assert blobs1["main.nf"] != blobs2["main.nf"]
+
+    with GitObjectReader(path) as reader:
+        reads = []
+        read_object = reader.read_object
+        reader.read_object = lambda name: reads.append(name) or read_object(name)
+        counter = BlobCounter(reader)
+
+        blob = blobs1["main.nf"]
+        assert counter.counts(blob, "main.nf")["total"] == 2
+        assert counter.counts(blob, "copy/main.nf")["total"] == 2
+        assert reads == [blob]
+
+        # The same blob counted as another language is counted again
+        counter.counts(blob, "main.cwl")
+        assert reads == [blob, blob]
+
+
+def test_iter_history(repo) -> None:
+    """Test that running totals match a full recount at every sampled commit."""
+    path, first, second = repo
+
+    # A side branch merged back into the main line
+    _git(path, "checkout", "-q", "-b", "side")
+    _commit(path, {"side.nf": "process s {}\n"})
+    _git(path, "checkout", "-q", "-")
+    third = _commit(path, {"same.cwl": "cwlVersion: v1.2\n\nclass: Workflow\n"})
+    _git(path, "merge", "-q", "--no-ff", "-m", "merge", "side")
+    merge = _git(path, "rev-parse", "HEAD")
+
+    points = list(iter_history(path))
+    assert [point.commit for point in points] == [first, second, third, merge]
+
+    with GitObjectReader(path) as reader:
+        counter = BlobCounter(reader)
+        for point in points:
+            expected = {}
+            for file_path, blob in get_blobs_at_commit(path, point.commit).items():
+                language = {"nf": "Nextflow", "cwl": "CWL", "smk": "Snakemake"}.get(
+                    file_path.rsplit(".", 1)[1], "WDL"
+                )
+                stats = expected.setdefault(
+                    language,
+                    {"files": 0, "code": 0, "comment": 0, "blank": 0, "total": 0},
+                )
+                stats["files"] += 1
+                counts = counter.counts(blob, file_path)
+                for key in ("code", "comment", "blank", "total"):
+                    stats[key] += counts[key]
+            assert point.languages == expected
+
+    # Sampling keeps the last commit
+    sampled = list(iter_history(path, every=3))
+    assert [point.commit for point in sampled] == [first, merge]
+    assert sampled[-1].languages == points[-1].languages
+
+
+def test_scan_revision(repo) -> None:
+    """Test that scanning a revision matches scanning its checkout."""
+    path, first, second = repo
+    _commit(
+        path,
+        {
+            ".mudagignore": "build/\n",
+            "build/skip.nf": "process x {}\n",
+            "sub/.mudagignore": "*.cwl\n",
+            "sub/skip.cwl": "cwlVersion: v1.2\n",
+            "sub/deep/keep.smk": "rule k:\n",
+        },
+    )
+    # Uncommitted changes are not part of the revision
+    with open(os.path.join(path, "main.nf"), "w") as f:
+        f.write("changed\n")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        bare = os.path.join(temp_dir, "bare.git")
+        checkout = os.path.join(temp_dir, "checkout")
+        subprocess.run(["git", "clone", "-q", "--bare", path, bare], check=True)
+        subprocess.run(["git", "clone", "-q", bare, checkout], check=True)
+
+        expected = scan_directory(checkout, relative_to=checkout)
+        results = scan_revision(bare, "HEAD", relative_to=bare)
+        assert (
+            sorted(results.rel_paths)
+            == sorted(expected.rel_paths)
+            == [
+                "main.nf",
+                "same.cwl",
+                os.path.join("sub", "deep", "keep.smk"),
+                os.path.join("sub", "new.wdl"),
+            ]
+        )
+        assert sorted(results.records()) == sorted(
+            record._replace(path=os.path.join(bare, record.rel_path))
+            for record in expected.records()
+        )
+        assert results.language_stats() == expected.language_stats()
+
+    results = scan_revision(path, first, relative_to=path)
+    assert results.rel_paths == ["gone.smk", "main.nf", "same.cwl"]
+    assert results[os.path.join(path, "main.nf")] == {
+        "code": 1,
+        "comment": 1,
+        "blank": 0,
+        "total": 2,
+        "processes": 1,
+        "workflows": 0,
+        "channels": 0,
+    }
+
+    with pytest.raises(ValueError):
+        scan_revision(path, "no-such-revision")
+
+
+def test_scan_revision_symlinks(repo) -> None:
+    """Test that symbolic links are counted like in a directory scan."""
+    path = repo[0]
+    _commit(path, {"a/Snakefile": "# Rules\nrule all:\n    input: 'x'\n"})
+    os.makedirs(os.path.join(path, "c"))
+    os.symlink(
+        os.path.join("..", "a", "Snakefile"), os.path.join(path, "c", "Snakefile")
+    )
+    # Chained, directory, dangling and outside links
+    os.symlink("Snakefile", os.path.join(path, "c", "rules.smk"))
+    os.symlink("a", os.path.join(path, "linked"))
+    os.symlink("missing.nf", os.path.join(path, "dangling.nf"))
+    os.symlink(os.path.join("..", "outside.cwl"), os.path.join(path, "outside.cwl"))
+    _git(path, "add", "-A")
+    _git(path, "commit", "-q", "-m", "links")
+
+    results = scan_revision(path, "HEAD", relative_to=path)
+    assert results.rel_paths == sorted(results.rel_paths)
+    for rel_path in (os.path.join("c", "Snakefile"), os.path.join("c", "rules.smk")):
+        counts = results[os.path.join(path, rel_path)]
+        assert counts["code"] == 2
+        assert counts["rules"] == 1
+    assert "dangling.nf" not in results.rel_paths
+    assert "outside.cwl" not in results.rel_paths
+
+    # The same records as a directory scan, apart from unreadable links
+    expected = scan_directory(path, relative_to=path)
+    assert sorted(results.records()) == sorted(
+        record for record in expected.records() if not record.error
+    )
+
+    # Links are left out of the blobs compared between commits
+    assert "c/Snakefile" not in get_blobs_at_commit(path, "HEAD")
+    points = list(iter_history(path))
+    assert points[-1].languages == points[-2].languages
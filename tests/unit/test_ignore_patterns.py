@@ -129,3 +129,51 @@ test?.xml
         finally:
             # Change back to the original directory
             os.chdir(original_dir)
+
+
+def test_gitignore_semantics() -> None:
+    """Test negation, anchoring, ** and directory-only patterns."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with open(os.path.join(temp_dir, ".mudagignore"), "w") as mudagignore:
+            mudagignore.write("""*.cwl
+!keep.cwl
+/root_only.nf
+docs/*.nf
+**/generated/**
+logs/
+a/**/b.smk
+""")
+
+        original_dir = os.getcwd()
+        try:
+            os.chdir(temp_dir)
+            patterns = IgnorePatterns()
+
+            # Negation: the last matching pattern wins
+            assert patterns.is_ignored("x/other.cwl") is True
+            assert patterns.is_ignored("x/keep.cwl") is False
+
+            # Leading slash anchors the pattern to the ignore file's directory
+            assert patterns.is_ignored("root_only.nf") is True
+            assert patterns.is_ignored("sub/root_only.nf") is False
+
+            # A slash in the middle also anchors, and * does not cross slashes
+            assert patterns.is_ignored("docs/main.nf") is True
+            assert patterns.is_ignored("docs/sub/main.nf") is False
+            assert patterns.is_ignored("sub/docs/main.nf") is False
+
+            # ** matches any number of directories
+            assert patterns.is_ignored("generated/main.nf") is True
+            assert patterns.is_ignored("x/y/generated/z/main.nf") is True
+            assert patterns.is_ignored("a/b.smk") is True
+            assert patterns.is_ignored("a/x/y/b.smk") is True
+
+            # Directory-only patterns do not match files
+            assert patterns.is_ignored("logs", is_dir=True) is True
+            assert patterns.is_ignored("logs", is_dir=False) is False
+            assert patterns.is_ignored("logs/today.nf") is True
+
+            # Files inside an ignored directory cannot be re-included
+            assert patterns.is_ignored("logs/keep.cwl") is True
+        finally:
+            os.chdir(original_dir)
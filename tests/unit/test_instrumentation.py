@@ -0,0 +1,90 @@
+"""Unit tests for the instrumentation module."""
+
+import os
+import tempfile
+import threading
+
+from mudag.core.analyzer import scan_directory
+from mudag.utils.instrumentation import STATS, Stats, collect
+
+
+def test_stats_timers_and_counters() -> None:
+    """Test counting, timing, merging and reporting."""
+    stats = Stats()
+    stats.count("files_counted")
+    stats.count("files_counted", 2)
+    with stats.timer("count"):
+        pass
+
+    @stats.timed("format")
+    def double(value: int) -> int:
+        """Double a value."""
+        return 2 * value
+
+    assert double(2) == 4
+    assert list(stats.timed_iter("walk", iter([1, 2]))) == [1, 2]
+    assert set(stats.timers) == {"count", "format", "walk"}
+    assert stats.counters == {"files_counted": 3}
+
+    other = Stats()
+    other.merge(stats.snapshot())
+    other.merge(stats.snapshot())
+    assert other.counters == {"files_counted": 6}
+    assert other.timers["count"] == 2 * stats.timers["count"]
+
+    report = other.format_report(1.0)
+    assert "files_counted" in report
+    assert report.index("walk") < report.index("count") < report.index("format")
+
+    stats.reset()
+    assert stats.snapshot() == {"timers": {}, "counters": {}}
+
+
+def test_thread_safe_statistics() -> None:
+    """Test that no updates are lost when threads update the statistics."""
+    stats = Stats()
+    stats.make_thread_safe()
+
+    def update() -> None:
+        """Update a counter and a timer many times."""
+        for _ in range(10_000):
+            stats.count("files_counted")
+            stats.add_time("count", 1.0)
+
+    threads = [threading.Thread(target=update) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stats.counters == {"files_counted": 80_000}
+    assert stats.timers == {"count": 80_000.0}
+
+
+def test_collect_resets_statistics() -> None:
+    """Test that collect returns only the statistics of its call."""
+    STATS.count("files_counted", 5)
+    result, stats = collect(STATS.count, "cache_hits")
+    assert result is None
+    assert stats["counters"] == {"cache_hits": 1}
+
+
+def test_scan_merges_worker_statistics() -> None:
+    """Test that serial and parallel scans report the same counters."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for i in range(150):
+            with open(os.path.join(temp_dir, f"main{i}.nf"), "w") as f:
+                f.write("// comment\nprocess a {}\n")
+        with open(os.path.join(temp_dir, ".mudagignore"), "w") as f:
+            f.write("main1*.nf\n")
+
+        counters = []
+        for workers in (None, 2):
+            STATS.reset()
+            results = scan_directory(temp_dir, workers=workers)
+            counters.append(dict(STATS.counters))
+
+    assert counters[0] == counters[1]
+    assert counters[0]["files_counted"] == results.file_count == 89
+    assert counters[0]["paths_ignored"] == 61
+    assert counters[0]["bytes_read"] == 89 * len("// comment\nprocess a {}\n")
+    assert "count" in STATS.timers
@@ -0,0 +1,40 @@
+"""Unit tests for the languages module."""
+
+from mudag.core.languages import (
+    CWL,
+    KNIME,
+    NEXTFLOW,
+    OTHER,
+    REGISTRY,
+    SNAKEMAKE,
+    YAML,
+)
+
+
+def test_resolve_by_extension() -> None:
+    """Test resolving languages from file extensions."""
+    assert REGISTRY.resolve("workflow.cwl") is CWL
+    assert REGISTRY.resolve("path/to/main.NF") is NEXTFLOW
+    assert REGISTRY.resolve("nextflow.config") is NEXTFLOW
+    assert REGISTRY.resolve("rules/align.smk") is SNAKEMAKE
+    assert REGISTRY.resolve("bundle.knwf") is KNIME
+    assert REGISTRY.resolve("script.py") is OTHER
+    assert REGISTRY.resolve("README") is OTHER
+
+
+def test_resolve_by_name_pattern() -> None:
+    """Test that name patterns take precedence over extensions."""
+    assert REGISTRY.resolve("Snakefile") is SNAKEMAKE
+    assert REGISTRY.resolve("snakefile_2.txt") is SNAKEMAKE
+    assert REGISTRY.resolve("dir/my.workflow.knime") is KNIME
+    assert REGISTRY.resolve("Snakefile.yaml") is YAML
+    assert REGISTRY.resolve("Snakefile.yaml").is_workflow is False
+
+
+def test_language_specs() -> None:
+    """Test the comment syntax of the language specifications."""
+    assert NEXTFLOW.line_comment == "//"
+    assert NEXTFLOW.block_starts == ("/*",)
+    assert NEXTFLOW.block_ends == ("*/",)
+    assert CWL.block_starts == ()
+    assert SNAKEMAKE.name == "Snakemake"
@@ -0,0 +1,186 @@
+"""Unit tests for the line_classifier module."""
+
+import io
+import random
+from typing import Dict, List, Optional
+
+import pytest
+
+from mudag.core.line_classifier import classify_lines
+
+PYTHON_SYNTAX = ("#", ['"""', "'''"], ['"""', "'''"])
+YAML_SYNTAX = ("#", None, None)
+NEXTFLOW_SYNTAX = ("//", ["/*"], ["*/"])
+KNIME_SYNTAX = ("<!--", ["<!--"], ["-->"])
+SYNTAXES = [PYTHON_SYNTAX, YAML_SYNTAX, NEXTFLOW_SYNTAX, KNIME_SYNTAX]
+
+# Line fragments used to generate the parity corpus
+FRAGMENTS = [
+    "",
+    "   ",
+    "\t",
+    "code = 1",
+    "    indented_code()",
+    "# comment",
+    "   # indented comment",
+    "// comment",
+    "/* block",
+    "/* one-line block */",
+    " * inside",
+    "end */",
+    '"""',
+    '"""docstring"""',
+    "'''",
+    "x = '''not a docstring'''",
+    "<!-- xml",
+    "<!-- one-line -->",
+    "-->",
+    "<node/>",
+    " ",
+    " # comment after nbsp",
+    " code after em space",
+    "\x1c# comment after file separator",
+    "\x0c",
+    "﻿# comment after byte order mark",
+    "ünïcödé = 'text'",
+    "# ünïcödé comment",
+]
+NEWLINES = ["\n", "\r\n", "\r"]
+
+
+def reference_count(
+    data: bytes,
+    line_comment: str,
+    block_starts: Optional[List[str]],
+    block_ends: Optional[List[str]],
+) -> Dict[str, int]:
+    """
+    Count lines with the original readlines()-based implementation.
+
+    Args:
+        data: UTF-8 encoded content
+        line_comment: Marker starting a line comment
+        block_starts: Markers starting a block comment
+        block_ends: Markers ending a block comment
+
+    Returns:
+        Dictionary with counts for 'code', 'comment', 'blank' and 'total' lines
+    """
+    code_lines = 0
+    comment_lines = 0
+    blank_lines = 0
+    in_block_comment = False
+    current_block_end = None
+
+    lines = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8").readlines()
+    for raw_line in lines:
+        line = raw_line.rstrip()
+
+        if not line.strip():
+            blank_lines += 1
+            continue
+
+        if in_block_comment:
+            comment_lines += 1
+            if current_block_end and (current_block_end in line):
+                in_block_comment = False
+                current_block_end = None
+            continue
+
+        if block_starts:
+            started_block = False
+            for j, block_start in enumerate(block_starts):
+                if line.strip().startswith(block_start):
+                    comment_lines += 1
+                    if (
+                        block_ends[j]
+                        not in line[line.find(block_start) + len(block_start) :]
+                    ):
+                        in_block_comment = True
+                        current_block_end = block_ends[j]
+                    started_block = True
+                    break
+            if started_block:
+                continue
+
+        if line.strip().startswith(line_comment):
+            comment_lines += 1
+        else:
+            code_lines += 1
+
+    return {
+        "code": code_lines,
+        "comment": comment_lines,
+        "blank": blank_lines,
+        "total": code_lines + comment_lines + blank_lines,
+    }
+
+
+def chunked(data: bytes, size: int) -> List[bytes]:
+    """
+    Split data into chunks of a fixed size.
+
+    Args:
+        data: Data to split
+        size: Chunk size
+
+    Returns:
+        List of chunks
+    """
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def generate_corpus(count: int, seed: int = 1234) -> List[bytes]:
+    """
+    Generate reproducible documents mixing all line fragments.
+
+    Args:
+        count: Number of documents
+        seed: Random seed
+
+    Returns:
+        List of UTF-8 encoded documents
+    """
+    rng = random.Random(seed)
+    corpus = [b""]
+    for _ in range(count):
+        newline = rng.choice(NEWLINES + ["mixed"])
+        parts = []
+        for _ in range(rng.randint(1, 30)):
+            parts.append(rng.choice(FRAGMENTS))
+            parts.append(rng.choice(NEWLINES) if newline == "mixed" else newline)
+        # Randomly drop the final newline
+        if rng.random() < 0.3:
+            parts.pop()
+        corpus.append("".join(parts).encode("utf-8"))
+    return corpus
+
+
+@pytest.mark.parametrize("syntax", SYNTAXES)
+def test_parity_with_reference(syntax) -> None:
+    """Test that the byte-level classifier matches the original implementation."""
+    for data in generate_corpus(300):
+        expected = reference_count(data, *syntax)
+        for size in [1, 2, 3, 7, 64, 1 << 16]:
+            assert classify_lines(chunked(data, size), *syntax) == expected, (
+                data,
+                size,
+            )
+
+
+def test_invalid_utf8_raises() -> None:
+    """Test that invalid UTF-8 is reported like the text-based reader did."""
+    data = "ok\n# ü\n".encode("utf-8") + b"\xff\n"
+    for size in [1, 3, 64]:
+        with pytest.raises(UnicodeDecodeError):
+            classify_lines(chunked(data, size), *PYTHON_SYNTAX)
+
+    # A multi-byte sequence cut off at the end of the content
+    with pytest.raises(UnicodeDecodeError):
+        classify_lines(chunked("ü".encode("utf-8")[:1], 1), *PYTHON_SYNTAX)
+
+
+def test_crlf_split_across_chunks() -> None:
+    """Test that a \\r\\n pair split between two chunks ends a single line."""
+    result = classify_lines([b"code\r", b"\n\r", b"\n# comment"], *YAML_SYNTAX)
+    assert result == {"code": 1, "comment": 1, "blank": 1, "total": 3}
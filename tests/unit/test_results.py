@@ -0,0 +1,128 @@
+"""Unit tests for the results module."""
+
+from mudag.core.results import FileResult, ScanResult
+
+
+def _sample() -> ScanResult:
+    """
+    Create a scan result with a few files.
+
+    Returns:
+        Scan result
+    """
+    results = ScanResult()
+    results.extend(
+        [
+            FileResult("b/main.nf", "Nextflow", 20, 10, 5, 35),
+            FileResult("a/tool.cwl", "CWL", 10, 5, 2, 17),
+            FileResult("a/broken.cwl", "CWL", 0, 0, 0, 0, error=1),
+        ]
+    )
+    return results
+
+
+def test_columns_and_aggregates() -> None:
+    """Test that columns and running aggregates follow the added rows."""
+    results = _sample()
+
+    assert results.file_count == 3
+    assert list(results.code) == [20, 10, 0]
+    assert [results.paths[row] for row in results.sorted_rows()] == [
+        "a/broken.cwl",
+        "a/tool.cwl",
+        "b/main.nf",
+    ]
+    assert results.totals() == {
+        "files": 3,
+        "code": 30,
+        "comment": 15,
+        "blank": 7,
+        "total": 52,
+    }
+
+    languages = results.language_stats(only_present=True)
+    assert list(languages) == ["CWL", "Nextflow"]
+    assert languages["CWL"]["files"] == 2
+    assert languages["CWL"]["total"] == 17
+    # Results created outside a scan are displayed relative to the current directory
+    assert list(results.records())[0] == FileResult(
+        "b/main.nf", "Nextflow", 20, 10, 5, 35, rel_path="b/main.nf"
+    )
+
+
+def test_dictionary_view() -> None:
+    """Test that the mapping view matches the former scan_directory format."""
+    results = _sample()
+
+    assert len(results) == 4
+    assert list(results)[0] == "__metadata__"
+    assert results["b/main.nf"] == {"code": 20, "comment": 10, "blank": 5, "total": 35}
+    assert results["a/broken.cwl"] == {"code": 0, "comment": 0, "blank": 0, "error": 1}
+    assert results["__metadata__"]["workflow_languages"]["Nextflow"]["files"] == 1
+    assert "a/tool.cwl" in results
+    assert "missing.cwl" not in results
+
+    # Equal to the dictionary built the old way
+    expected = dict(results.items())
+    assert results == expected
+    assert ScanResult.from_dict(expected) == results
+
+    # Updating a file keeps its position and the aggregates consistent
+    results["a/tool.cwl"] = {"code": 1, "comment": 0, "blank": 0, "total": 1}
+    assert list(results)[2] == "a/tool.cwl"
+    assert results.language_stats()["CWL"]["total"] == 1
+
+    # Removing entries
+    assert results.pop("b/main.nf")["code"] == 20
+    assert results.language_stats()["Nextflow"]["files"] == 0
+    assert "workflow_languages" in results.pop("__metadata__")
+    assert "__metadata__" not in results
+    assert len(results) == 2
+
+
+def test_put_and_remove() -> None:
+    """Test replacing rows in place and removing several rows at once."""
+    results = _sample()
+
+    results.put(FileResult("a/tool.cwl", "CWL", 1, 1, 1, 3, rel_path="tool.cwl"))
+    results.put(FileResult("c/new.wdl", "WDL", 2, 0, 0, 2))
+    assert results.paths == ["b/main.nf", "a/tool.cwl", "a/broken.cwl", "c/new.wdl"]
+    assert results.rel_paths[1] == "tool.cwl"
+    assert results.language_stats()["CWL"]["total"] == 3
+
+    removed = results.remove(["c/new.wdl", "missing.cwl", "b/main.nf"])
+    assert removed == ["b/main.nf", "c/new.wdl"]
+    assert results.paths == ["a/tool.cwl", "a/broken.cwl"]
+    assert list(results.code) == [1, 0]
+    assert results["a/broken.cwl"]["error"] == 1
+    assert results.totals() == {
+        "files": 2,
+        "code": 1,
+        "comment": 1,
+        "blank": 1,
+        "total": 3,
+    }
+    assert results.remove(["b/main.nf"]) == []
+
+
+def test_metric_columns() -> None:
+    """Test that structure metrics get columns once a file reports them."""
+    results = _sample()
+    assert results.metric_names == []
+
+    metrics = {"steps": 3, "tools": 2}
+    results.append(FileResult("w.ga", "Galaxy", 9, 1, 0, 10, metrics=metrics))
+    assert results.metric_names == ["steps", "tools"]
+    assert list(results.metrics["steps"]) == [-1, -1, -1, 3]
+    assert results.record(3).metrics == metrics
+    assert results.record(0).metrics is None
+    assert results["w.ga"]["tools"] == 2
+    assert results.language_stats()["Galaxy"]["steps"] == 3
+    assert "steps" not in results.language_stats()["CWL"]
+
+    results.put(FileResult("w.ga", "Galaxy", 9, 1, 0, 10, metrics={"steps": 5}))
+    assert results.totals()["steps"] == 5
+    assert "tools" not in results.totals()
+
+    results.remove(["b/main.nf"])
+    assert list(results.metrics["steps"]) == [-1, -1, 5]
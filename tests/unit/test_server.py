@@ -0,0 +1,204 @@
+"""Unit tests for the server module."""
+
+import http.client
+import json
+import os
+import stat
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+import pytest
+
+from mudag.core.analyzer import scan_directory
+from mudag.utils.server import (
+    Address,
+    ServerError,
+    analyze_params,
+    create_server,
+    parse_address,
+    rows_to_results,
+    token_path,
+)
+from mudag.utils.server import request as send_request
+
+
+@pytest.fixture(params=["unix", "tcp"])
+def address(
+    request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> Iterator[Address]:
+    """Run a server on a temporary Unix socket or a free localhost port."""
+    # Token files of TCP servers are written to the cache directory
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if request.param == "unix":
+            server = create_server(os.path.join(temp_dir, "mudag.sock"), workers=2)
+        else:
+            server = create_server(("127.0.0.1", 0), workers=2)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            if request.param == "unix":
+                yield server.server_address
+            else:
+                yield server.server_address[:2]
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        assert os.listdir(temp_dir) == []
+
+
+def _create_tree(root: str) -> None:
+    """
+    Create a small tree of workflow files with an ignore file.
+
+    Args:
+        root: Directory to create the files in
+    """
+    os.makedirs(os.path.join(root, "sub"))
+    os.makedirs(os.path.join(root, "skip"))
+    files = {
+        "Snakefile": "# comment\nrule a:\n\n    shell: 'x'\n",
+        os.path.join("sub", "main.nf"): "// comment\nprocess a {}\n",
+        os.path.join("skip", "tool.cwl"): "cwlVersion: v1.2\n",
+        ".mudagignore": "skip/\n",
+        "README.md": "text\n",
+    }
+    for rel_path, content in files.items():
+        with open(os.path.join(root, rel_path), "w") as f:
+            f.write(content)
+
+
+def test_analyze_matches_in_process_scan(address: Address) -> None:
+    """Test that the server's results equal an in-process scan."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _create_tree(temp_dir)
+        expected = list(scan_directory(temp_dir, relative_to=temp_dir).records())
+
+        for _ in range(2):
+            response = send_request(
+                address, "analyze", analyze_params(temp_dir, relative_to=temp_dir)
+            )
+            assert rows_to_results(response["files"], temp_dir) == expected
+
+        status = send_request(address, "status")
+        assert status["requests"] == 3
+        assert status["cache"]["entries"] == 2
+        assert status["cache"]["hits"] == 2
+
+        response = send_request(address, "list-workflows", {"path": temp_dir})
+        assert response["files"] == ["Snakefile", os.path.join("sub", "main.nf")]
+
+
+def test_analyze_ignores_jobs(
+    address: Address, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that requests are counted in the server's threads."""
+
+    def no_pool(*args: Any, **kwargs: Any) -> None:
+        """Fail instead of starting worker processes."""
+        raise AssertionError("process pool started by a request")
+
+    monkeypatch.setattr("mudag.core.analyzer.ProcessPoolExecutor", no_pool)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Enough files for a process pool if 'jobs' applied
+        for i in range(70):
+            with open(os.path.join(temp_dir, f"rules{i}.smk"), "w") as f:
+                f.write("rule a:\n")
+        params = dict(analyze_params(temp_dir, relative_to=temp_dir), jobs=2)
+        response = send_request(address, "analyze", params)
+        assert len(response["files"]) == 70
+
+
+def test_error_responses(address: Address) -> None:
+    """Test that invalid requests are answered with errors."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with pytest.raises(ServerError) as error:
+            send_request(address, "analyze", {"path": "relative"})
+        assert error.value.status == 400
+
+        missing = os.path.join(temp_dir, "missing")
+        with pytest.raises(ServerError) as error:
+            send_request(address, "analyze", {"path": missing})
+        assert error.value.status == 404
+
+        with pytest.raises(ServerError) as error:
+            send_request(address, "compare", {"path": temp_dir})
+        assert error.value.status == 400
+
+        with pytest.raises(ServerError) as error:
+            send_request(address, "unknown", {})
+        assert error.value.status == 404
+
+
+def test_rejects_unauthorized_requests(address: Address) -> None:
+    """Test that TCP requests need a loopback Host, the token and JSON bodies."""
+    if isinstance(address, str):
+        pytest.skip("Unix sockets are protected by their permissions")
+
+    token_file = token_path(address[1])
+    assert stat.S_IMODE(os.stat(token_file).st_mode) == 0o600
+    with open(token_file) as f:
+        authorization = f"Bearer {f.read()}"
+
+    def post(headers: Dict[str, str]) -> int:
+        """
+        Send a status request with the given headers.
+
+        Args:
+            headers: Request headers
+
+        Returns:
+            HTTP status of the response
+        """
+        connection = http.client.HTTPConnection(*address, timeout=10)
+        try:
+            connection.request("POST", "/status", json.dumps({}), headers)
+            return connection.getresponse().status
+        finally:
+            connection.close()
+
+    json_type = {"Content-Type": "application/json"}
+    assert post(dict(json_type, Authorization=authorization)) == 200
+    # A page of another site that resolves to this host (DNS rebinding)
+    rebound = dict(json_type, Authorization=authorization, Host="evil.test:80")
+    assert post(rebound) == 403
+    # A cross-origin form post cannot read the token file
+    assert post({"Content-Type": "text/plain"}) == 401
+    assert post(dict(json_type, Authorization="Bearer guess")) == 401
+    assert post({"Content-Type": "text/plain", "Authorization": authorization}) == 415
+
+
+def test_bind_failure_keeps_token(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Test that a server failing to bind leaves the running server's token."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    server = create_server(("127.0.0.1", 0), workers=1)
+    try:
+        with pytest.raises(OSError):
+            create_server(server.server_address[:2], workers=1)
+        assert os.path.exists(token_path(server.server_address[1]))
+    finally:
+        server.server_close()
+    assert not os.path.exists(token_path(server.server_address[1]))
+
+
+def test_unreachable_server() -> None:
+    """Test that a missing server raises ConnectionError."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with pytest.raises(ConnectionError):
+            send_request(os.path.join(temp_dir, "missing.sock"), "status")
+
+
+def test_parse_address() -> None:
+    """Test parsing of Unix socket and TCP addresses."""
+    assert parse_address("unix:mudag.sock") == "mudag.sock"
+    assert parse_address("/run/mudag.sock") == "/run/mudag.sock"
+    assert parse_address("localhost:8000") == ("localhost", 8000)
+    assert parse_address("http://127.0.0.1:8000/") == ("127.0.0.1", 8000)
+    assert parse_address("8000") == ("127.0.0.1", 8000)
+    with pytest.raises(ValueError):
+        parse_address("localhost")
@@ -0,0 +1,139 @@
+"""Unit tests for the structure module."""
+
+from typing import Dict
+
+from mudag.core.metrics import Scanner
+from mudag.core.structure import (
+    NEXTFLOW_KEYWORDS,
+    SNAKEMAKE_KEYWORDS,
+    KeywordScanner,
+    StepScanner,
+)
+
+SNAKEFILE = '''"""
+Pipeline documentation mentioning
+rule fake:
+"""
+configfile: "config.yaml"
+include: "rules/common.smk"
+
+module other:
+    snakefile: "other/Snakefile"
+
+# rule commented:
+rule all:
+    input: "a.txt"
+
+rule:
+    output: "anonymous.txt"
+
+checkpoint split:
+    output: directory("out")
+    shell:
+        """
+        rule in_shell:
+        """
+
+if config.get("extra"):
+    rule conditional:
+        run:
+            print('rule x:')
+'''
+
+NEXTFLOW = """/*
+ * process commented {
+ */
+// Channel.of(1)
+
+process FASTQC {
+    script:
+    \"\"\"
+    echo "process fake {"
+    \"\"\"
+}
+
+process MULTIQC
+{
+    script: 'echo Channel.from(1)'
+}
+
+workflow QC {
+    reads = Channel.fromPath(params.reads)
+}
+
+workflow {
+    numbers = channel
+        .of(1, 2)
+    QC()
+}
+workflow.onComplete { println "done" }
+"""
+
+CWL = """cwlVersion: v1.2
+class: Workflow
+doc: |
+  Documentation with
+  steps:
+    fake: x
+steps:
+  # first step
+  first:
+    run: tool.cwl
+  "second":
+    run:
+      class: Workflow
+      steps:
+      - id: inner1
+        run: a.cwl
+      - id: inner2
+        run: b.cwl
+  third:
+    run: tool.cwl
+requirements:
+  SubworkflowFeatureRequirement: {}
+"""
+
+
+def _scan(scanner: Scanner, content: str, chunk_size: int) -> Dict[str, int]:
+    """
+    Scan content passed in chunks.
+
+    Args:
+        scanner: New scanner
+        content: Content to scan
+        chunk_size: Size of the chunks in bytes
+
+    Returns:
+        The metrics of the scanner
+    """
+    data = content.encode("utf-8")
+    chunks = [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
+    assert b"".join(scanner.scan(chunks)) == data
+    return scanner.apply({})
+
+
+def test_snakemake() -> None:
+    """Test that definitions in strings and comments are skipped."""
+    expected = {"rules": 3, "checkpoints": 1, "includes": 1, "modules": 1}
+    for chunk_size in (1, 10, 1 << 16):
+        scanner = KeywordScanner(SNAKEMAKE_KEYWORDS)
+        assert _scan(scanner, SNAKEFILE, chunk_size) == expected
+
+
+def test_nextflow() -> None:
+    """Test processes, workflows and channel factories split over lines."""
+    expected = {"processes": 2, "workflows": 2, "channels": 2}
+    for chunk_size in (1, 10, 1 << 16):
+        scanner = KeywordScanner(NEXTFLOW_KEYWORDS)
+        assert _scan(scanner, NEXTFLOW, chunk_size) == expected
+
+
+def test_cwl_steps() -> None:
+    """Test that steps of embedded workflows count and block scalars do not."""
+    for chunk_size in (1, 10, 1 << 16):
+        assert _scan(StepScanner(), CWL, chunk_size) == {"steps": 5}
+
+    # A sequence of steps indented like its key, then a new document
+    content = "steps:\n- id: a\n  run: a.cwl\n- b\nouts: []\n---\n- c\n"
+    assert _scan(StepScanner(), content, 4) == {"steps": 2}
+    assert _scan(StepScanner(), "steps: []\n", 4) == {"steps": 0}
@@ -0,0 +1,127 @@
+"""Unit tests for the walker module."""
+
+import os
+import tempfile
+
+from mudag.utils.ignore_patterns import IgnorePatterns
+from mudag.utils.walker import walk_files
+
+
+def _make_tree(root: str) -> None:
+    """
+    Create a small directory tree.
+
+    Args:
+        root: Directory to create the tree in
+    """
+    for rel_path in [
+        "a.cwl",
+        "sub/b.nf",
+        "sub/deeper/c.smk",
+        "sub2/d.wdl",
+        "node_modules/e.cwl",
+    ]:
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write("x\n")
+
+
+def test_walk_files_matches_os_walk() -> None:
+    """Test that files are yielded in the same order as with os.walk."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _make_tree(temp_dir)
+
+        expected = [
+            os.path.join(root, name)
+            for root, _, files in os.walk(temp_dir)
+            for name in files
+        ]
+        walked = list(walk_files(temp_dir))
+
+        assert [path for path, _ in walked] == expected
+        for path, rel_path in walked:
+            assert rel_path == os.path.relpath(path, temp_dir)
+
+
+def test_walk_files_prunes_ignored_directories() -> None:
+    """Test that ignored directories are not descended into."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _make_tree(temp_dir)
+        with open(os.path.join(temp_dir, ".mudagignore"), "w") as ignore_file:
+            ignore_file.write("node_modules/\ndeeper/\n")
+
+        original_dir = os.getcwd()
+        try:
+            os.chdir(temp_dir)
+            rel_paths = {rel for _, rel in walk_files(".", IgnorePatterns())}
+        finally:
+            os.chdir(original_dir)
+
+        assert rel_paths == {
+            ".mudagignore",
+            "a.cwl",
+            os.path.join("sub", "b.nf"),
+            os.path.join("sub2", "d.wdl"),
+        }
+
+
+def test_walk_files_symlinks() -> None:
+    """Test skipping and following symbolic links to directories."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _make_tree(temp_dir)
+        # A link to another directory and a link back to the root
+        os.symlink(os.path.join(temp_dir, "sub2"), os.path.join(temp_dir, "link"))
+        os.symlink(temp_dir, os.path.join(temp_dir, "sub", "loop"))
+
+        skipped = {rel for _, rel in walk_files(temp_dir)}
+        assert os.path.join("link", "d.wdl") not in skipped
+        assert len(skipped) == 5
+
+        followed = [rel for _, rel in walk_files(temp_dir, follow_symlinks=True)]
+        # Each directory is visited once, so the loop terminates
+        assert len(followed) == 5
+        assert sorted(os.path.basename(rel) for rel in followed) == sorted(
+            os.path.basename(rel) for rel in skipped
+        )
+
+
+def test_walk_files_nested_ignore_files() -> None:
+    """Test that ignore files in the walked tree apply to their directories."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _make_tree(temp_dir)
+        files = {
+            ".mudagignore": "*.cwl\nwork/\n",
+            "work/f.nf": "x\n",
+            "sub/.mudagignore": "!keep.cwl\n/b.nf\n",
+            "sub/keep.cwl": "x\n",
+            "sub/work/g.nf": "x\n",
+            "sub/deeper/b.nf": "x\n",
+            "sub2/keep.cwl": "x\n",
+        }
+        for rel_path, content in files.items():
+            path = os.path.join(temp_dir, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(content)
+
+        # Scan from another directory, so only the tree's own files apply
+        original_dir = os.getcwd()
+        with tempfile.TemporaryDirectory() as cwd:
+            try:
+                os.chdir(cwd)
+                rel_paths = {
+                    rel.replace(os.sep, "/")
+                    for _, rel in walk_files(temp_dir, IgnorePatterns())
+                }
+            finally:
+                os.chdir(original_dir)
+
+        assert rel_paths == {
+            ".mudagignore",
+            "sub/.mudagignore",
+            "sub/keep.cwl",
+            "sub/deeper/b.nf",
+            "sub/deeper/c.smk",
+            "sub2/d.wdl",
+        }
@@ -0,0 +1,112 @@
+"""Unit tests for the watch module."""
+
+import os
+import shutil
+import tempfile
+from typing import Optional
+
+import pytest
+
+from mudag.core.analyzer import scan_directory
+from mudag.core.watch import WatchSession, WatchUpdate
+from mudag.utils.fs_events import InotifyWatcher
+
+
+def _write(path: str, content: str) -> None:
+    """
+    Write a file, creating its directory.
+
+    Args:
+        path: Path to the file
+        content: Contents of the file
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def _inotify_available() -> bool:
+    """
+    Check if inotify can be used.
+
+    Returns:
+        True if an inotify watcher can be created
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        try:
+            InotifyWatcher(temp_dir).close()
+        except OSError:
+            return False
+    return True
+
+
+@pytest.mark.parametrize(
+    "polling",
+    [
+        True,
+        pytest.param(
+            False,
+            marks=pytest.mark.skipif(
+                not _inotify_available(), reason="inotify not available"
+            ),
+        ),
+    ],
+)
+def test_watch_session(polling: bool) -> None:
+    """Test that updates match a full scan after each batch of changes."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _write(os.path.join(temp_dir, "main.nf"), "// comment\nprocess a {}\n")
+        _write(os.path.join(temp_dir, "sub", "tool.cwl"), "cwlVersion: v1.2\n")
+        _write(os.path.join(temp_dir, "work", "skip.nf"), "process s {}\n")
+        _write(os.path.join(temp_dir, ".mudagignore"), "work/\n")
+
+        def check(update: Optional[WatchUpdate]) -> None:
+            """
+            Check an update against a full scan.
+
+            Args:
+                update: Update of the session
+            """
+            assert update is not None
+            expected = scan_directory(temp_dir, relative_to=temp_dir)
+            assert sorted(update.results.records()) == sorted(expected.records())
+            assert update.results.language_stats() == expected.language_stats()
+
+        with WatchSession(
+            temp_dir, relative_to=temp_dir, polling=polling, interval=0.05
+        ) as session:
+            update = session.start()
+            assert update.event == "scan"
+            assert update.results.file_count == 2
+
+            # Modified, created and ignored files
+            _write(os.path.join(temp_dir, "main.nf"), "process a {}\n\nprocess b {}\n")
+            _write(os.path.join(temp_dir, "sub", "deep", "new.smk"), "rule a:\n")
+            _write(os.path.join(temp_dir, "work", "other.nf"), "process o {}\n")
+            update = session.poll(timeout=5)
+            check(update)
+            assert update.event == "update"
+            assert sorted(update.updated) == [
+                "main.nf",
+                os.path.join("sub", "deep", "new.smk"),
+            ]
+
+            # Deleted directory
+            shutil.rmtree(os.path.join(temp_dir, "sub"))
+            update = session.poll(timeout=5)
+            check(update)
+            assert sorted(update.removed) == [
+                os.path.join("sub", "deep", "new.smk"),
+                os.path.join("sub", "tool.cwl"),
+            ]
+
+            # Changed ignore rules trigger a full rescan
+            _write(os.path.join(temp_dir, ".mudagignore"), "")
+            update = session.poll(timeout=5)
+            check(update)
+            assert update.event == "rescan"
+            assert update.results.file_count == 3
+
+            # Changes to other files are not reported
+            _write(os.path.join(temp_dir, "notes.txt"), "text\n")
+            assert session.poll(timeout=0.2) is None